@@ -0,0 +1,139 @@
+"""Audio post-processing benchmark: pydub against the NumPy stage.
+
+Builds chapters from fake TTS clips padded with silence, then trims every
+clip, joins them with pauses and normalizes the chapter twice: with pydub
+AudioSegments (strip_silence-style trimming, append with silence, apply_gain
+on the whole chapter), and with epub2tts_edge.postprocess streaming into a
+null encoder. Prints the time of each as one JSON record, plus how far the
+two trimmed lengths and output levels differ:
+
+    python benchmarks/bench_audio.py
+    python benchmarks/bench_audio.py --chapters 5 --sentences 400
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import synthetic  # noqa: E402
+from epub2tts_edge import postprocess  # noqa: E402
+from epub2tts_edge.audio import SAMPLE_RATE, SAMPLE_WIDTH, CHANNELS  # noqa: E402
+from epub2tts_edge.backends import FakeBackend  # noqa: E402
+
+with warnings.catch_warnings():
+    # pydub warns about ffmpeg at import; nothing here needs it
+    warnings.simplefilter("ignore")
+    from pydub import AudioSegment  # noqa: E402
+    from pydub.silence import detect_leading_silence  # noqa: E402
+
+PAUSE_MS = 250
+PARAGRAPH_MS = 1200
+
+
+def make_chapters(chapters, sentences, seed):
+    """Lists of (pcm, ends_paragraph) with 50-400 ms of silence around each."""
+    rng = random.Random(seed)
+    backend = FakeBackend(latency=0, seconds_per_char=0.02, gap=0.02)
+    book = []
+    for chapter in synthetic.make_chapters(
+        chapters=chapters, paragraphs=(sentences, sentences), seed=seed
+    ):
+        clips = []
+        for paragraph in chapter["paragraphs"]:
+            pcm, _ = asyncio.run(backend.synthesize(paragraph[:120], "fake"))
+            lead = bytes(rng.randint(50, 400) * SAMPLE_RATE // 1000 * SAMPLE_WIDTH)
+            tail = bytes(rng.randint(50, 400) * SAMPLE_RATE // 1000 * SAMPLE_WIDTH)
+            clips.append((lead + pcm + tail, rng.random() < 0.2))
+        book.append(clips)
+    return book
+
+
+def with_pydub(clips, target_db):
+    chapter = AudioSegment.empty()
+    for pcm, ends_paragraph in clips:
+        clip = AudioSegment(
+            pcm, sample_width=SAMPLE_WIDTH, frame_rate=SAMPLE_RATE, channels=CHANNELS
+        )
+        start = detect_leading_silence(clip, postprocess.TRIM_THRESHOLD_DB)
+        end = detect_leading_silence(clip.reverse(), postprocess.TRIM_THRESHOLD_DB)
+        chapter += clip[start : len(clip) - end]
+        pause = PARAGRAPH_MS if ends_paragraph else PAUSE_MS
+        chapter += AudioSegment.silent(pause, frame_rate=SAMPLE_RATE)
+    return chapter.apply_gain(target_db - chapter.dBFS).raw_data
+
+
+class NullEncoder:
+    def __init__(self, outfile):
+        self.outfile = outfile
+        self.data = bytearray()
+
+    def write(self, pcm):
+        self.data += pcm
+
+    def close(self):
+        return bytes(self.data)
+
+
+def with_numpy(clips, target_db, workdir):
+    encoder = postprocess.NormalizingEncoder(
+        NullEncoder(os.path.join(workdir, "chapter")), target_db
+    )
+    for pcm, ends_paragraph in clips:
+        pcm, _ = postprocess.trim_silence(pcm)
+        encoder.write(pcm)
+        encoder.write_silence(PARAGRAPH_MS if ends_paragraph else PAUSE_MS)
+    return encoder.close()
+
+
+def level(pcm):
+    return AudioSegment(
+        pcm, sample_width=SAMPLE_WIDTH, frame_rate=SAMPLE_RATE, channels=CHANNELS
+    ).dBFS
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chapters", type=int, default=3)
+    parser.add_argument("--sentences", type=int, default=200, help="Per chapter")
+    parser.add_argument("--target-db", type=float, default=-20.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    book = make_chapters(args.chapters, args.sentences, args.seed)
+    record = {"chapters": args.chapters, "sentences": args.sentences}
+    outputs = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, process in (
+            ("pydub", lambda clips: with_pydub(clips, args.target_db)),
+            ("numpy", lambda clips: with_numpy(clips, args.target_db, workdir)),
+        ):
+            started = time.perf_counter()
+            outputs[name] = [process(clips) for clips in book]
+            record[f"{name}_seconds"] = round(time.perf_counter() - started, 3)
+    record["speedup"] = round(record["pydub_seconds"] / record["numpy_seconds"], 1)
+    record["audio_seconds"] = round(
+        sum(len(pcm) for pcm in outputs["numpy"]) / SAMPLE_WIDTH / SAMPLE_RATE, 1
+    )
+    # pydub trims to the millisecond and without padding, so lengths differ a
+    # little; levels differ because pydub counts the pauses in the loudness
+    record["length_difference"] = round(
+        sum(len(pcm) for pcm in outputs["numpy"])
+        / sum(len(pcm) for pcm in outputs["pydub"])
+        - 1,
+        3,
+    )
+    record["numpy_db"] = round(sum(map(level, outputs["numpy"])) / args.chapters, 1)
+    record["pydub_db"] = round(sum(map(level, outputs["pydub"])) / args.chapters, 1)
+    print(json.dumps(record))
+
+
+if __name__ == "__main__":
+    main()
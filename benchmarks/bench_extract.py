@@ -0,0 +1,129 @@
+"""EPUB text extraction benchmark: lxml engine against ebooklib + BeautifulSoup.
+
+Extracts every spine document of a synthetic omnibus (or of --epub FILE)
+with the previous ebooklib/BeautifulSoup path and with the lxml engine
+inline and across a process pool, checks that all of them produce the same
+titles and paragraphs, and prints the timings as one JSON record:
+
+    python benchmarks/bench_extract.py --chapters 400
+    python benchmarks/bench_extract.py --epub omnibus.epub --workers 8
+
+The baseline needs beautifulsoup4 and ebooklib, which the tool itself no
+longer depends on.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import synthetic  # noqa: E402
+from epub2tts_edge.extract import iter_chapters, read_package  # noqa: E402
+
+
+def baseline_chapters(path):
+    """The extraction as it was done before the lxml engine."""
+    import ebooklib
+    from bs4 import BeautifulSoup
+    from ebooklib import epub
+
+    warnings.filterwarnings("ignore", module="ebooklib.epub")
+    book = epub.read_epub(path)
+    items = {
+        item.get_id(): item
+        for item in book.get_items()
+        if item.get_type() == ebooklib.ITEM_DOCUMENT
+    }
+    chapters = []
+    for id, linear in book.spine:
+        item = items.get(id)
+        if linear != "yes" or item is None:
+            continue
+        soup = BeautifulSoup(item.get_content(), "html.parser")
+        h1 = soup.find("h1")
+        title = h1.text.strip() if h1 else None
+        for a in soup.find_all("a", href=True):
+            if not any(char.isalpha() for char in a.text):
+                a.extract()
+        paragraphs = ["".join(p.strings).strip() for p in soup.find_all("p")]
+        chapters.append({"title": title, "paragraphs": paragraphs})
+    return chapters
+
+
+def timed(function, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, round(best, 4)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--epub", help="Benchmark this book instead of a synthetic one")
+    parser.add_argument("--chapters", type=int, default=200)
+    parser.add_argument("--min-paragraphs", type=int, default=20)
+    parser.add_argument("--max-paragraphs", type=int, default=80)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--repeat", type=int, default=3, help="Report the best of N runs")
+    args = parser.parse_args()
+
+    path = args.epub
+    if path is None:
+        path = os.path.join(tempfile.mkdtemp(prefix="epub2tts-bench-"), "book.epub")
+        synthetic.write_epub(
+            path,
+            synthetic.make_chapters(
+                chapters=args.chapters,
+                paragraphs=(args.min_paragraphs, args.max_paragraphs),
+                seed=args.seed,
+            ),
+        )
+
+    runs = {
+        "bs4": lambda: baseline_chapters(path),
+        "lxml": lambda: list(iter_chapters(path, workers=1)),
+        f"lxml_{args.workers}_workers": lambda: list(
+            iter_chapters(path, workers=args.workers)
+        ),
+    }
+    results = {}
+    timings = {}
+    for name, function in runs.items():
+        results[name], timings[name] = timed(function, args.repeat)
+
+    reference = results["bs4"]
+    mismatches = {
+        name: sum(a != b for a, b in zip(reference, chapters))
+        + abs(len(reference) - len(chapters))
+        for name, chapters in results.items()
+    }
+    print(
+        json.dumps(
+            {
+                "epub": args.epub,
+                "size_mb": round(os.path.getsize(path) / 1024**2, 2),
+                "documents": len(read_package(path)["spine"]),
+                "paragraphs": sum(len(c["paragraphs"]) for c in reference),
+                "wall_s": timings,
+                "speedup": {
+                    name: round(timings["bs4"] / t, 2) for name, t in timings.items()
+                },
+                "mismatched_documents": mismatches,
+            }
+        )
+    )
+    if any(mismatches.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
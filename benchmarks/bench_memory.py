@@ -0,0 +1,165 @@
+"""Peak memory against book length and chapter length.
+
+Reads synthetic text books of growing size through get_book and read_book
+(the whole book parsed into lists up front) and through stream_book and
+read_book (parsed as synthesis asks for it), each in a fresh process against
+the fake TTS backend, and prints the peak RSS of every run as one JSON
+record. The book grows two ways: more chapters of the same length, and the
+same chapters made longer. Streaming is bounded if peak RSS stays within
+--tolerance of the smallest book's on both axes:
+
+    python benchmarks/bench_memory.py
+    python benchmarks/bench_memory.py --chapters 10 --paragraphs 200 --scales 1 4 16
+
+Needs ffmpeg on the PATH.
+"""
+
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import synthetic  # noqa: E402
+from epub2tts_edge import epub2tts_edge as e2t  # noqa: E402
+from epub2tts_edge.backends import get_backend  # noqa: E402
+from epub2tts_edge.cache import TTSCache  # noqa: E402
+from epub2tts_edge.segment import SegmentationCache  # noqa: E402
+
+# Little audio per character and no latency, so big books finish quickly
+BACKEND = "fake:latency=0,seconds_per_char=0.002,gap=0.01"
+
+
+def child(args):
+    """Read one book and print this process's peak RSS in MB."""
+    cache_dir = os.path.join(args.workdir, "cache")
+    if args.mode == "stream":
+        book_contents, _, _, _ = e2t.stream_book(
+            args.book,
+            args.segmenter,
+            SegmentationCache(os.path.join(cache_dir, "segments")),
+            prefetch=e2t.PREFETCH_PARAGRAPHS,
+        )
+    else:
+        book_contents, _, _, _ = e2t.get_book(args.book, args.segmenter)
+    e2t.read_book(
+        args.book,
+        book_contents,
+        "en-US-AndrewNeural",
+        cache=TTSCache(cache_dir),
+        backend=get_backend(BACKEND),
+        progress=lambda **kwargs: _Quiet(),
+    )
+    print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)
+
+
+class _Quiet:
+    def update(self, n=1):
+        pass
+
+    def close(self):
+        pass
+
+
+def measure(mode, book, workdir, segmenter):
+    # A fresh copy of the book and cache each time, so no run resumes another
+    rundir = tempfile.mkdtemp(dir=workdir)
+    try:
+        copy = os.path.join(rundir, os.path.basename(book))
+        shutil.copyfile(book, copy)
+        output = subprocess.run(
+            [
+                sys.executable,
+                os.path.abspath(__file__),
+                "--child",
+                mode,
+                "--book",
+                copy,
+                "--workdir",
+                rundir,
+                "--segmenter",
+                segmenter,
+            ],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+    finally:
+        shutil.rmtree(rundir, ignore_errors=True)
+    return round(float(output.strip().splitlines()[-1]), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chapters", type=int, default=5)
+    parser.add_argument("--paragraphs", type=int, default=100, help="Per chapter")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--segmenter", default="regex")
+    parser.add_argument("--tolerance", type=float, default=1.2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--child", choices=["list", "stream"], help=argparse.SUPPRESS)
+    parser.add_argument("--book", help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        args.mode = args.child
+        return child(args)
+
+    workdir = tempfile.mkdtemp(prefix="epub2tts-bench-")
+    runs = []
+    try:
+        for axis in ("chapters", "chapter_length"):
+            for scale in args.scales:
+                chapters = args.chapters * (scale if axis == "chapters" else 1)
+                paragraphs = args.paragraphs * (scale if axis == "chapter_length" else 1)
+                book = os.path.join(workdir, f"{axis}-{scale}.txt")
+                synthetic.write_text_book(
+                    book,
+                    synthetic.make_chapters(
+                        chapters=chapters,
+                        paragraphs=(paragraphs, paragraphs),
+                        seed=args.seed,
+                    ),
+                )
+                run = {
+                    "axis": axis,
+                    "scale": scale,
+                    "chapters": chapters,
+                    "paragraphs_per_chapter": paragraphs,
+                    "size_mb": round(os.path.getsize(book) / 1024**2, 2),
+                }
+                for mode in ("list", "stream"):
+                    run[f"{mode}_peak_rss_mb"] = measure(
+                        mode, book, workdir, args.segmenter
+                    )
+                runs.append(run)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    growth = {}
+    for axis in ("chapters", "chapter_length"):
+        axis_runs = [run for run in runs if run["axis"] == axis]
+        for mode in ("list", "stream"):
+            peaks = [run[f"{mode}_peak_rss_mb"] for run in axis_runs]
+            growth[f"{mode}_{axis}"] = round(peaks[-1] / peaks[0], 3)
+    print(
+        json.dumps(
+            {
+                "runs": runs,
+                "growth": growth,
+                "bounded": all(
+                    growth[f"stream_{axis}"] <= args.tolerance
+                    for axis in ("chapters", "chapter_length")
+                ),
+            }
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""End-to-end pipeline benchmark over synthetic books.
+
+Runs export_chapters -> get_book -> read_book -> generate_metadata -> make_m4b
+on a generated book (or, with --format direct, streams the EPUB straight into
+read_book) against the fake TTS backend, and reports wall time, CPU
+time (including ffmpeg children), peak RSS and peak temp-disk usage for each
+stage as one JSON record, so results can be compared across commits:
+
+    python benchmarks/bench_pipeline.py --chapters 50 --output results.jsonl
+    python benchmarks/bench_pipeline.py --compare before.jsonl after.jsonl
+
+Needs ffmpeg on the PATH and the NLTK punkt tokenizer, like the tool itself.
+"""
+
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import synthetic  # noqa: E402
+from epub2tts_edge import epub2tts_edge as e2t  # noqa: E402
+from epub2tts_edge.backends import get_backend  # noqa: E402
+from epub2tts_edge.cache import TTSCache  # noqa: E402
+
+
+def directory_size(path):
+    total = 0
+    for root, _, names in os.walk(path):
+        for name in names:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except FileNotFoundError:
+                pass
+    return total
+
+
+class StageRecorder:
+    """Measure each stage of a run; see the module docstring for the metrics."""
+
+    def __init__(self, workdir):
+        self.workdir = workdir
+        self.stages = []
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        peak_disk = [directory_size(self.workdir)]
+        done = threading.Event()
+
+        def sample_disk():
+            while not done.wait(0.1):
+                peak_disk[0] = max(peak_disk[0], directory_size(self.workdir))
+
+        sampler = threading.Thread(target=sample_disk, daemon=True)
+        sampler.start()
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        cpu = time.process_time()
+        wall = time.perf_counter()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall
+            cpu = time.process_time() - cpu
+            after = resource.getrusage(resource.RUSAGE_CHILDREN)
+            done.set()
+            sampler.join()
+            peak_disk[0] = max(peak_disk[0], directory_size(self.workdir))
+            child_cpu = (after.ru_utime - children.ru_utime) + (
+                after.ru_stime - children.ru_stime
+            )
+            # ru_maxrss is in KiB on Linux; for the process it is the peak so far
+            self.stages.append(
+                {
+                    "stage": name,
+                    "wall_s": round(wall, 4),
+                    "cpu_s": round(cpu, 4),
+                    "child_cpu_s": round(child_cpu, 4),
+                    "peak_rss_mb": round(
+                        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1
+                    ),
+                    "peak_child_rss_mb": round(after.ru_maxrss / 1024, 1),
+                    "peak_disk_mb": round(peak_disk[0] / 1024**2, 2),
+                }
+            )
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except OSError:
+        return None
+
+
+def run(args):
+    workdir = tempfile.mkdtemp(prefix="epub2tts-bench-")
+    cache_dir = args.cache_dir or os.path.join(workdir, "cache")
+    recorder = StageRecorder(workdir)
+    chapters = synthetic.make_chapters(
+        chapters=args.chapters,
+        paragraphs=(args.min_paragraphs, args.max_paragraphs),
+        sentences=(1, args.max_sentences),
+        seed=args.seed,
+    )
+    sourcefile = os.path.join(workdir, "book.txt")
+    backend = get_backend(args.backend)
+    try:
+        e2t.ensure_punkt()
+        if args.format == "direct":
+            sourcefile = os.path.join(workdir, "book.epub")
+            synthetic.write_epub(sourcefile, chapters)
+            title, author = e2t.get_epub_metadata(sourcefile)
+            chapter_titles = []
+            book_contents = e2t.stream_epub(sourcefile, chapter_titles)
+        elif args.format == "epub":
+            epubfile = os.path.join(workdir, "book.epub")
+            synthetic.write_epub(epubfile, chapters)
+            with recorder.stage("export_chapters"):
+                texts, _ = e2t.export_chapters(epubfile)
+            # the manual step: gather the exported chapters into one text file
+            with open(sourcefile, "w", encoding="utf-8") as out:
+                for text in texts:
+                    with open(text, encoding="utf-8") as f:
+                        out.write(f.read() + "\n")
+                    os.remove(text)
+        else:
+            synthetic.write_text_book(sourcefile, chapters)
+
+        if args.format != "direct":
+            with recorder.stage("get_book"):
+                book_contents, title, author, chapter_titles = e2t.get_book(
+                    sourcefile
+                )
+        with recorder.stage("read_book"):
+            files = e2t.read_book(
+                sourcefile,
+                book_contents,
+                "en-US-AndrewNeural",
+                concurrency=args.concurrency,
+                cache=TTSCache(cache_dir),
+                backend=backend,
+                batch_chars=args.batch_chars,
+            )
+        with recorder.stage("generate_metadata"):
+            ffmetadatafile = e2t.generate_metadata(
+                sourcefile, files, author, title, chapter_titles
+            )
+        audio_seconds = sum(
+            chapter["samples"] / chapter["sample_rate"]
+            for chapter in e2t.read_manifest(e2t.get_basefile(sourcefile), False)
+        )
+        with recorder.stage("make_m4b"):
+            e2t.make_m4b(files, sourcefile, "en-US-AndrewNeural", ffmetadatafile)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "params": {
+            "format": args.format,
+            "chapters": args.chapters,
+            "paragraphs": [args.min_paragraphs, args.max_paragraphs],
+            "max_sentences": args.max_sentences,
+            "seed": args.seed,
+            "backend": args.backend,
+            "concurrency": args.concurrency,
+            "batch_chars": args.batch_chars,
+        },
+        "requests": getattr(backend, "requests", None),
+        "audio_seconds": round(audio_seconds, 1),
+        "stages": recorder.stages,
+        "total_wall_s": round(sum(s["wall_s"] for s in recorder.stages), 4),
+    }
+
+
+def last_record(path):
+    with open(path) as f:
+        lines = [line for line in f if line.strip()]
+    return json.loads(lines[-1])
+
+
+def compare(before_path, after_path):
+    before, after = last_record(before_path), last_record(after_path)
+    print(f"{'stage':<20}{'before s':>12}{'after s':>12}{'change':>10}")
+    after_stages = {s["stage"]: s for s in after["stages"]}
+    for stage in before["stages"]:
+        other = after_stages.get(stage["stage"])
+        if other is None:
+            continue
+        change = (other["wall_s"] / stage["wall_s"] - 1) * 100 if stage["wall_s"] else 0
+        print(
+            f"{stage['stage']:<20}{stage['wall_s']:>12.3f}"
+            f"{other['wall_s']:>12.3f}{change:>+9.1f}%"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--format", choices=("txt", "epub", "direct"), default="epub")
+    parser.add_argument("--chapters", type=int, default=10)
+    parser.add_argument("--min-paragraphs", type=int, default=5)
+    parser.add_argument("--max-paragraphs", type=int, default=40)
+    parser.add_argument("--max-sentences", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--backend", default="fake:latency=0.05,jitter=0.02")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--batch-chars", type=int, default=0)
+    parser.add_argument(
+        "--cache-dir", help="Reuse a TTS cache (default: a fresh one per run)"
+    )
+    parser.add_argument("--output", help="Append the JSON record to this file")
+    parser.add_argument(
+        "--compare",
+        nargs=2,
+        metavar=("BEFORE", "AFTER"),
+        help="Compare the last records of two result files instead of running",
+    )
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    result = run(args)
+    line = json.dumps(result)
+    if args.output:
+        with open(args.output, "a") as f:
+            f.write(line + "\n")
+    print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Sentence segmentation benchmark: preprocessing time and regex accuracy.
+
+Times get_book on a multi-megabyte text book four ways: the previous
+two-pass Punkt path (tokenize while parsing, join, tokenize again for
+synthesis), one Punkt pass, the regex segmenter, and a warm segmentation
+cache. Then scores the regex segmenter's sentence boundaries against
+Punkt's, and prints everything as one JSON record:
+
+    python benchmarks/bench_segment.py --chapters 300
+    python benchmarks/bench_segment.py --text mybook.txt
+
+Needs the NLTK punkt tokenizer data.
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import synthetic  # noqa: E402
+from epub2tts_edge import epub2tts_edge as e2t  # noqa: E402
+from epub2tts_edge.segment import SegmentationCache, punkt, regex  # noqa: E402
+
+# Mixed into the synthetic text so the segmenters have abbreviations,
+# initials and ellipses to get wrong
+HARD_PHRASES = (
+    "Mr. Hale",
+    "Mrs. Hale",
+    "Dr. J. R. Watson",
+    "St. Ives",
+    "the U.S. embassy",
+    "e.g. the river",
+    "at 5 p.m. sharp",
+    "well... perhaps",
+    "No. 7",
+)
+
+
+def write_book(path, chapters, seed):
+    rng = random.Random(seed)
+    book = synthetic.make_chapters(chapters=chapters, paragraphs=(20, 60), seed=seed)
+    for chapter in book:
+        for index, paragraph in enumerate(chapter["paragraphs"]):
+            words = paragraph.split(" ")
+            for _ in range(rng.randint(0, 2)):
+                words.insert(rng.randint(1, len(words)), rng.choice(HARD_PHRASES))
+            chapter["paragraphs"][index] = " ".join(words)
+    synthetic.write_text_book(path, book)
+
+
+def two_pass(path):
+    """get_book as it was: Punkt while parsing, then again per paragraph."""
+    book_contents, _, _, _ = e2t.get_book(path, "punkt")
+    for chapter in book_contents:
+        for sentences in chapter["paragraphs"]:
+            punkt(" ".join(sentences))
+
+
+def timed(function, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return round(best, 4)
+
+
+def boundaries(sentences):
+    # sentence end offsets, ignoring whitespace, so both splits compare
+    ends = set()
+    position = 0
+    for sentence in sentences:
+        position += len("".join(sentence.split()))
+        ends.add(position)
+    return ends
+
+
+def accuracy(paragraphs):
+    agreed = found = expected = 0
+    for paragraph in paragraphs:
+        reference = boundaries(punkt(paragraph))
+        candidate = boundaries(regex(paragraph))
+        agreed += len(reference & candidate)
+        found += len(candidate)
+        expected += len(reference)
+    return {
+        "precision": round(agreed / found, 4) if found else None,
+        "recall": round(agreed / expected, 4) if expected else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--text", help="Benchmark this text book instead of a synthetic one")
+    parser.add_argument("--chapters", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="Report the best of N runs")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="epub2tts-bench-")
+    try:
+        path = args.text
+        if path is None:
+            path = os.path.join(workdir, "book.txt")
+            write_book(path, args.chapters, args.seed)
+        cache = SegmentationCache(os.path.join(workdir, "segments"))
+        e2t.get_book(path, "punkt", cache)
+
+        timings = {
+            "punkt_two_pass": timed(lambda: two_pass(path), args.repeat),
+            "punkt": timed(lambda: e2t.get_book(path, "punkt"), args.repeat),
+            "regex": timed(lambda: e2t.get_book(path, "regex"), args.repeat),
+            "cached": timed(lambda: e2t.get_book(path, "punkt", cache), args.repeat),
+        }
+        with open(path, encoding="utf-8") as f:
+            paragraphs = [
+                line.strip() for line in f if line.strip() and not line.startswith("#")
+            ]
+        result = {
+            "text": args.text,
+            "size_mb": round(os.path.getsize(path) / 1024**2, 2),
+            "paragraphs": len(paragraphs),
+            "wall_s": timings,
+            "fraction_of_two_pass": {
+                name: round(t / timings["punkt_two_pass"], 3)
+                for name, t in timings.items()
+            },
+            "regex_vs_punkt": accuracy(paragraphs),
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
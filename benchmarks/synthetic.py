@@ -0,0 +1,129 @@
+"""Generate synthetic books for benchmarks.
+
+Books are built from a seeded generator, so the same arguments always give
+the same text. Paragraph and sentence lengths vary within the given ranges,
+and a share of the sentences are short dialogue lines, like real fiction.
+"""
+
+import io
+import random
+import zipfile
+
+WORDS = (
+    "the of and to a in that was he it his her with as had for she you at on "
+    "but not be they him by which this from have were said all one or there "
+    "so when would what their we an been out if up them into no could more "
+    "time like then my other some about only its over very little now see "
+    "before after back down way must again through night house window light "
+    "river morning voice letter garden silence street winter stranger promise"
+).split()
+
+
+def _sentence(rng, words):
+    text = " ".join(rng.choice(WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + rng.choice(".....!?")
+
+
+def make_chapters(
+    chapters=10,
+    paragraphs=(5, 40),
+    sentences=(1, 8),
+    words=(3, 30),
+    dialogue=0.3,
+    seed=0,
+):
+    """Return a list of {"title", "paragraphs"} dicts of synthetic text."""
+    rng = random.Random(seed)
+    book = []
+    for number in range(1, chapters + 1):
+        chapter_paragraphs = []
+        for _ in range(rng.randint(*paragraphs)):
+            if rng.random() < dialogue:
+                text = f'"{_sentence(rng, rng.randint(2, 8))}" she said.'
+            else:
+                text = " ".join(
+                    _sentence(rng, rng.randint(*words))
+                    for _ in range(rng.randint(*sentences))
+                )
+            chapter_paragraphs.append(text)
+        book.append({"title": f"Chapter {number}", "paragraphs": chapter_paragraphs})
+    return book
+
+
+def write_text_book(path, chapters, title="Synthetic Book", author="Benchmark"):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"Title: {title}\nAuthor: {author}\n\n")
+        for chapter in chapters:
+            f.write(f"# {chapter['title']}\n\n")
+            for paragraph in chapter["paragraphs"]:
+                f.write(f"{paragraph}\n\n")
+
+
+def _cover_png():
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new("RGB", (600, 800), (40, 60, 90)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def write_epub(path, chapters, title="Synthetic Book", author="Benchmark", cover=True):
+    """Write a minimal EPUB 2 book with one XHTML document per chapter."""
+    manifest = []
+    spine = []
+    with zipfile.ZipFile(path, "w") as z:
+        z.writestr("mimetype", "application/epub+zip", compress_type=zipfile.ZIP_STORED)
+        z.writestr(
+            "META-INF/container.xml",
+            '<?xml version="1.0"?>\n'
+            '<container version="1.0" '
+            'xmlns="urn:oasis:names:tc:opendocument:xmlns:container">'
+            '<rootfiles><rootfile full-path="OEBPS/content.opf" '
+            'media-type="application/oebps-package+xml"/></rootfiles></container>',
+        )
+        for number, chapter in enumerate(chapters, start=1):
+            body = "".join(
+                # every few paragraphs carries a numeric footnote link
+                f'<p>{paragraph}<a href="#n{n}">{n}</a></p>'
+                if n % 7 == 0
+                else f"<p>{paragraph}</p>"
+                for n, paragraph in enumerate(chapter["paragraphs"])
+            )
+            z.writestr(
+                f"OEBPS/chapter{number}.xhtml",
+                '<?xml version="1.0" encoding="utf-8"?>\n'
+                '<html xmlns="http://www.w3.org/1999/xhtml"><head>'
+                f"<title>{chapter['title']}</title></head><body>"
+                f"<h1>{chapter['title']}</h1>{body}</body></html>",
+            )
+            manifest.append(
+                f'<item id="chapter{number}" href="chapter{number}.xhtml" '
+                'media-type="application/xhtml+xml"/>'
+            )
+            spine.append(f'<itemref idref="chapter{number}"/>')
+        cover_meta = ""
+        if cover:
+            z.writestr("OEBPS/cover.png", _cover_png())
+            manifest.append('<item id="cover" href="cover.png" media-type="image/png"/>')
+            cover_meta = '<meta name="cover" content="cover"/>'
+        manifest.append(
+            '<item id="ncx" href="toc.ncx" media-type="application/x-dtbncx+xml"/>'
+        )
+        z.writestr(
+            "OEBPS/toc.ncx",
+            '<?xml version="1.0" encoding="utf-8"?>\n'
+            '<ncx xmlns="http://www.daisy.org/z3986/2005/ncx/" version="2005-1">'
+            f"<head/><docTitle><text>{title}</text></docTitle><navMap/></ncx>",
+        )
+        z.writestr(
+            "OEBPS/content.opf",
+            '<?xml version="1.0" encoding="utf-8"?>\n'
+            '<package xmlns="http://www.idpf.org/2007/opf" version="2.0" '
+            'unique-identifier="id">'
+            '<metadata xmlns:dc="http://purl.org/dc/elements/1.1/">'
+            f'<dc:title>{title}</dc:title><dc:creator>{author}</dc:creator>'
+            '<dc:identifier id="id">synthetic</dc:identifier>'
+            f"<dc:language>en</dc:language>{cover_meta}</metadata>"
+            f"<manifest>{''.join(manifest)}</manifest>"
+            f"<spine toc=\"ncx\">{''.join(spine)}</spine></package>",
+        )
@@ -1 +1 @@
-rm -rf data/epub/*.flac data/epub/*.vtt data/epub/*.txt data/epub/*.mp3 data/epub/*.m4a  data/epub/*.m4b data/epub/*.png
+rm -rf data/epub/*.flac data/epub/*.vtt data/epub/*.txt data/epub/*.mp3 data/epub/*.m4a  data/epub/*.m4b data/epub/*.png data/epub/*.jsonl data/epub/*.db*
@@ -1 +1,6 @@
-from .epub2tts_edge import main
\ No newline at end of file
+def main():
+    # Imported on call, so importing the package (or running one of its
+    # modules with -m) does not load the whole tool
+    from .epub2tts_edge import main
+
+    return main()
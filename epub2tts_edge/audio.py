@@ -0,0 +1,167 @@
+import asyncio
+import os
+import subprocess
+
+from . import profiling
+
+# Edge TTS returns 24kHz mono audio; everything downstream works on 16-bit
+# PCM in that format so sentences can be joined without resampling.
+SAMPLE_RATE = 24000
+SAMPLE_WIDTH = 2
+CHANNELS = 1
+
+
+def part_format(codec):
+    """Container and file extension for chapter parts encoded with `codec`."""
+    if codec == "flac":
+        return "flac", "flac"
+    return "mp4", "m4a"
+
+
+def ms_to_samples(ms):
+    return int(round(ms * SAMPLE_RATE / 1000))
+
+
+def samples_to_ms(samples):
+    return samples * 1000 / SAMPLE_RATE
+
+
+async def decode_audio(audio, format="mp3"):
+    """Decode one TTS stream to raw PCM with a single ffmpeg pass.
+
+    Backends that already return PCM in our format skip ffmpeg entirely.
+    """
+    if format == "pcm":
+        return audio
+    with profiling.span("decode", concurrent=True):
+        return await _ffmpeg_decode(audio)
+
+
+async def _ffmpeg_decode(audio):
+    process = await asyncio.create_subprocess_exec(
+        "ffmpeg",
+        "-v",
+        "error",
+        "-i",
+        "pipe:0",
+        "-f",
+        "s16le",
+        "-ac",
+        str(CHANNELS),
+        "-ar",
+        str(SAMPLE_RATE),
+        "pipe:1",
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    pcm, err = await process.communicate(audio)
+    if process.returncode != 0:
+        raise Exception(f"ffmpeg could not decode TTS audio: {err.decode().strip()}")
+    return pcm
+
+
+class ChapterEncoder:
+    """Stream the PCM for one chapter into a single ffmpeg encoder.
+
+    Audio is written to `outfile` through a temporary name and only moved into
+    place by `close()`, so a half-written chapter never looks finished. `args`
+    go to ffmpeg after the PCM input: more inputs (metadata, a cover) and
+    output options such as maps and tags.
+    """
+
+    def __init__(
+        self, outfile, codec="flac", container="flac", bitrate=None, args=()
+    ):
+        self.outfile = outfile
+        self.tempfile = f"{outfile}.part"
+        self.samples = 0
+        self.process = subprocess.Popen(
+            [
+                "ffmpeg",
+                "-y",
+                "-v",
+                "error",
+                "-f",
+                "s16le",
+                "-ar",
+                str(SAMPLE_RATE),
+                "-ac",
+                str(CHANNELS),
+                "-i",
+                "pipe:0",
+                *args,
+                "-codec:a",
+                codec,
+                *(["-b:a", bitrate] if bitrate else []),
+                "-f",
+                container,
+                self.tempfile,
+            ],
+            stdin=subprocess.PIPE,
+        )
+
+    def write(self, pcm):
+        profiling.count("pcm_bytes", len(pcm))
+        self.process.stdin.write(pcm)
+        self.samples += len(pcm) // (SAMPLE_WIDTH * CHANNELS)
+
+    def write_silence(self, ms):
+        samples = ms_to_samples(ms)
+        chunk = bytes(SAMPLE_WIDTH * CHANNELS * SAMPLE_RATE)
+        while samples > 0:
+            n = min(samples, SAMPLE_RATE)
+            self.write(chunk[: n * SAMPLE_WIDTH * CHANNELS])
+            samples -= n
+
+    def close(self):
+        self.process.stdin.close()
+        with profiling.span("encoder_flush"):
+            returncode = self.process.wait()
+        if returncode != 0:
+            raise Exception(f"ffmpeg failed to encode {self.outfile}")
+        os.replace(self.tempfile, self.outfile)
+        return self.outfile
+
+    def abort(self):
+        self.process.kill()
+        self.process.wait()
+        if os.path.exists(self.tempfile):
+            os.remove(self.tempfile)
+
+
+def packet_duration(path):
+    """Total duration of the audio packets in `path`, in samples.
+
+    Read with a stream copy, so nothing is decoded. For AAC this includes
+    the encoder priming that a stream-copy concat keeps for every file but
+    the first, which is where each file really starts in the joined stream.
+    """
+    result = subprocess.run(
+        [
+            "ffmpeg",
+            "-v",
+            "error",
+            "-i",
+            path,
+            "-map",
+            "0:a:0",
+            "-c",
+            "copy",
+            "-f",
+            "framecrc",
+            "-",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    timebase = None
+    total = 0
+    for line in result.stdout.splitlines():
+        if line.startswith("#tb 0:"):
+            numerator, denominator = line.split(":", 1)[1].strip().split("/")
+            timebase = int(numerator) / int(denominator)
+        elif line and not line.startswith("#"):
+            total += int(line.split(",")[3])
+    return round(total * timebase * SAMPLE_RATE)
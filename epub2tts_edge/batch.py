@@ -0,0 +1,219 @@
+"""Convert a whole library of books in one process.
+
+All books share one event loop and TTS concurrency budget (a
+PriorityScheduler plus one ConcurrencyController), one synthesis cache and a
+bounded pool of final m4b encodes, instead of every book paying for its own
+interpreter, NLTK load and ramp-up. Up to `books` books are read at once;
+their TTS requests go through one priority queue, so the book that started
+first (or the smallest one, with priority "shortest") is served first and
+finishes early, while the others fill in the remaining capacity.
+"""
+
+import concurrent.futures
+import os
+import re
+import sys
+import threading
+import time
+
+from .audio import SAMPLE_RATE
+from .backends import get_backend
+from .controller import ConcurrencyController
+from .epub2tts_edge import (
+    generate_metadata,
+    get_basefile,
+    load_book,
+    make_synthesize,
+    postprocess_options,
+    read_book,
+    write_outputs,
+)
+from .manifest import read_manifest
+from .scheduler import PriorityScheduler
+
+
+# The chapter files export_chapters writes for book.epub: book-1.txt, ...
+EXPORTED_CHAPTER = re.compile(r"^(.*)-\d+\.txt$")
+
+
+def is_text_book(path):
+    """True if a .txt reads as a book: Title:/Author: lines or # headings."""
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for number, line in enumerate(f):
+            if number < 2 and line.startswith(("Title: ", "Author: ")):
+                return True
+            if line.startswith("#"):
+                return True
+    return False
+
+
+def find_books(path):
+    """The books in a directory (recursively), or listed in a text file.
+
+    A list has one path per line, relative to the list, and # comments. In a
+    directory, a book.txt next to book.epub is read instead of it, and the
+    chapter files exporting book.epub writes (book-1.txt, ...) are left out:
+    they are not books of their own, so the epub is read directly. Other
+    .txt files only count as books if is_text_book() says so.
+    """
+    if os.path.isdir(path):
+        books = {}
+        for root, dirs, names in os.walk(path):
+            dirs.sort()
+            epubs = {name[: -len(".epub")] for name in names if name.endswith(".epub")}
+            for name in sorted(names):
+                book = os.path.join(root, name)
+                if name.endswith(".txt"):
+                    exported = EXPORTED_CHAPTER.match(name)
+                    if exported and exported.group(1) in epubs:
+                        continue
+                    if not is_text_book(book):
+                        print(
+                            f"Skipping {book}: no Title:/Author: lines or # headings",
+                            file=sys.stderr,
+                        )
+                        continue
+                    books[get_basefile(book)] = book
+                elif name.endswith(".epub") and get_basefile(book) not in books:
+                    books[get_basefile(book)] = book
+        return list(books.values())
+    books = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                books.append(os.path.join(os.path.dirname(path), line))
+    return books
+
+
+class _NoProgress:
+    # Per-chapter progress bars of many books at once are just noise
+    def __init__(self, **kwargs):
+        pass
+
+    def update(self, n=1):
+        pass
+
+    def close(self):
+        pass
+
+
+class Throughput:
+    """Audio produced against wall time, over the whole library."""
+
+    def __init__(self, total):
+        self.total = total
+        self.books = 0
+        self.failed = 0
+        self.samples = 0
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+
+    def add(self, samples=0, failed=False):
+        with self._lock:
+            self.books += 1
+            self.failed += failed
+            self.samples += samples
+
+    def report(self):
+        audio_hours = self.samples / SAMPLE_RATE / 3600
+        wall_hours = (time.monotonic() - self.started) / 3600
+        rate = audio_hours / wall_hours if wall_hours else 0
+        return (
+            f"{self.books}/{self.total} books ({self.failed} failed), "
+            f"{audio_hours:.2f} h of audio in {wall_hours * 60:.1f} min: "
+            f"{rate:.1f} audio hours per wall hour"
+        )
+
+
+def convert_book(sourcefile, args, subtitle_formats, shared, priority=0):
+    """Read one book with the shared scheduler and return its audio samples."""
+    book_contents, title, author, chapter_titles, cover = load_book(
+        sourcefile, args.segmenter, shared["cache"].directory
+    )
+    files = read_book(
+        sourcefile=sourcefile,
+        book_contents=book_contents,
+        speaker=args.speaker,
+        cache=shared["cache"],
+        backend=shared["backend"],
+        subtitle_formats=subtitle_formats,
+        chapter_subtitles=args.chapter_subtitles,
+        batch_chars=args.batch_chars,
+        postprocess=postprocess_options(args),
+        progress=_NoProgress,
+        controller=shared["controller"],
+        scheduler=shared["scheduler"],
+        priority=priority,
+    )
+    ffmetadatafile = generate_metadata(sourcefile, files, author, title, chapter_titles)
+    samples = sum(
+        chapter["samples"]
+        for chapter in read_manifest(get_basefile(sourcefile), sentences=False)
+    )
+    with shared["encoders"]:
+        write_outputs(
+            args,
+            sourcefile,
+            files,
+            ffmetadatafile,
+            title,
+            author,
+            chapter_titles,
+            cover,
+        )
+    return samples
+
+
+def run_batch(args, subtitle_formats, cache):
+    """Convert every book under args.sourcefile; books with an m4b are skipped."""
+    books = [
+        book
+        for book in find_books(args.sourcefile)
+        if not os.path.exists(f"{get_basefile(book)}.m4b")
+    ]
+    if args.priority == "shortest":
+        books.sort(key=os.path.getsize)
+    print(f"Converting {len(books)} books, {args.books} at a time")
+
+    backend = get_backend(args.backend)
+    controller = ConcurrencyController(args.concurrency, maximum=args.max_concurrency)
+    throughput = Throughput(len(books))
+    failures = []
+    with PriorityScheduler(
+        make_synthesize(cache, controller, backend),
+        controller.maximum * 4,
+        workers=controller.maximum,
+    ) as scheduler:
+        shared = {
+            "cache": cache,
+            "backend": backend,
+            "controller": controller,
+            "scheduler": scheduler,
+            "encoders": threading.BoundedSemaphore(args.encoders),
+        }
+        with concurrent.futures.ThreadPoolExecutor(args.books) as executor:
+            futures = {
+                executor.submit(
+                    convert_book, book, args, subtitle_formats, shared, priority
+                ): book
+                for priority, book in enumerate(books)
+            }
+            for future in concurrent.futures.as_completed(futures):
+                book = futures[future]
+                try:
+                    samples = future.result()
+                except Exception as e:
+                    failures.append(book)
+                    throughput.add(failed=True)
+                    print(f"Failed: {book}: {e}")
+                else:
+                    throughput.add(samples)
+                    print(f"Finished {book}")
+                print(throughput.report())
+    if failures:
+        raise Exception(
+            f"{len(failures)} of {len(books)} books failed, "
+            "run again to retry just those"
+        )
+    return throughput
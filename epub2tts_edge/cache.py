@@ -0,0 +1,144 @@
+import hashlib
+import json
+import os
+import unicodedata
+
+from . import profiling
+
+
+def default_cache_dir():
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(base, "epub2tts-edge")
+
+
+def normalize_text(text):
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+class TTSCache:
+    """Content-addressed on-disk cache of synthesized sentences.
+
+    Entries are keyed by a hash of the normalized text, the voice, the TTS
+    backend and the prosody settings, and hold the audio plus the boundary
+    (subtitle) data. The cache is kept under `max_bytes` by evicting the least
+    recently used entries; every hit refreshes the entry's mtime.
+    """
+
+    def __init__(self, directory=None, max_bytes=2 * 1024**3):
+        self.directory = directory or default_cache_dir()
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.directory, exist_ok=True)
+        self._size = sum(size for _, _, size in self._entries())
+
+    @staticmethod
+    def key(text, speaker, backend="edge", rate="+0%", volume="+0%", pitch="+0Hz"):
+        payload = json.dumps(
+            {
+                "text": normalize_text(text),
+                "speaker": speaker,
+                "backend": backend,
+                "rate": rate,
+                "volume": volume,
+                "pitch": pitch,
+            },
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key, ext):
+        return os.path.join(self.directory, key[:2], f"{key}.{ext}")
+
+    def _entries(self):
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if not name.endswith(".json"):
+                    continue
+                key = name[:-5]
+                try:
+                    stat = os.stat(os.path.join(root, f"{key}.audio"))
+                    size = stat.st_size + os.path.getsize(os.path.join(root, name))
+                except FileNotFoundError:
+                    continue
+                yield key, stat.st_mtime, size
+
+    @property
+    def size(self):
+        return self._size
+
+    def contains(self, key):
+        return os.path.exists(self._path(key, "json"))
+
+    def get(self, key):
+        try:
+            with open(self._path(key, "json"), "r") as f:
+                meta = json.load(f)
+            with open(self._path(key, "audio"), "rb") as f:
+                audio = f.read()
+        except (FileNotFoundError, ValueError):
+            self.misses += 1
+            profiling.count("cache_misses")
+            return None
+        os.utime(self._path(key, "audio"))
+        self.hits += 1
+        profiling.count("cache_hits")
+        return audio, meta["subs"]
+
+    def put(self, key, audio, subs):
+        os.makedirs(os.path.dirname(self._path(key, "audio")), exist_ok=True)
+        # The metadata file is written last, so its presence marks a complete
+        # entry even if another process reads the cache concurrently.
+        for ext, data in (("audio", audio), ("json", json.dumps({"subs": subs}))):
+            path = self._path(key, ext)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb" if ext == "audio" else "w") as f:
+                f.write(data)
+            try:
+                # an entry written again replaces the old one's size
+                self._size -= os.path.getsize(path)
+            except FileNotFoundError:
+                pass
+            os.replace(tmp, path)
+            self._size += os.path.getsize(path)
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def evict(self):
+        # Drop least recently used entries until we are back under 90% of the
+        # limit, so eviction does not run again on every insert.
+        entries = sorted(self._entries(), key=lambda entry: entry[1])
+        self._size = sum(size for _, _, size in entries)
+        for key, _, size in entries:
+            if self._size <= self.max_bytes * 0.9:
+                break
+            for ext in ("json", "audio"):
+                try:
+                    os.remove(self._path(key, ext))
+                except FileNotFoundError:
+                    pass
+            self._size -= size
+
+    def wrap(self, synthesize, backend="edge"):
+        """Put the cache in front of a `synthesize(text, speaker)` coroutine."""
+
+        async def cached_synthesize(text, speaker):
+            key = self.key(text, speaker, backend)
+            entry = self.get(key)
+            if entry is not None:
+                return entry
+            audio, subs = await synthesize(text, speaker)
+            self.put(key, audio, subs)
+            return audio, subs
+
+        return cached_synthesize
+
+    def report(self):
+        total = self.hits + self.misses
+        rate = 100 * self.hits / total if total else 0
+        return (
+            f"TTS cache: {self.hits} hits, {self.misses} misses ({rate:.1f}% hit rate), "
+            f"{self._size / 1024**2:.1f} MB in {self.directory}"
+        )
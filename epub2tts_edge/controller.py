@@ -0,0 +1,131 @@
+import asyncio
+import collections
+import contextlib
+import multiprocessing
+import random
+import time
+
+# Slots of the shared state array.
+LIMIT, IN_FLIGHT, WINDOW, BASELINE, LATENCY, ERRORS, COOLDOWN = range(7)
+
+_shared_state = None
+
+
+def shared_state(concurrency):
+    """Create controller state that can be handed to worker processes."""
+    return multiprocessing.Array("d", [concurrency, 0, 0, 0, 0, 0, 0])
+
+
+def use_shared_state(state):
+    """Process pool initializer: make every controller in this process share `state`."""
+    global _shared_state
+    _shared_state = state
+
+
+def backoff_delay(attempt, base=1.0, cap=30.0):
+    """Exponential backoff with full jitter for retry number `attempt` (from 0)."""
+    return random.uniform(0, min(cap, base * 2**attempt))
+
+
+class ConcurrencyController:
+    """Adaptive (AIMD) limit on TTS requests in flight.
+
+    The limit grows by one after a full window of successful requests, as long
+    as the smoothed latency stays within `latency_factor` of the best smoothed
+    latency seen. It is cut by a quarter when latency climbs past that and halved on
+    every error, which is how throttling by the service shows up. After a cut
+    the requests already in flight are allowed to drain before the next one,
+    so one burst of slow or failed responses only counts once. The state
+    lives in a shared-memory array, so processes started with
+    `use_shared_state` share a single limit.
+    """
+
+    def __init__(
+        self, concurrency=10, minimum=1, maximum=32, latency_factor=2.0, state=None
+    ):
+        self.minimum = minimum
+        self.maximum = max(maximum, concurrency)
+        self.latency_factor = latency_factor
+        self.state = state or _shared_state or shared_state(concurrency)
+        self._waiters = collections.deque()
+
+    @property
+    def limit(self):
+        return int(self.state[LIMIT])
+
+    @property
+    def errors(self):
+        return int(self.state[ERRORS])
+
+    async def acquire(self):
+        while True:
+            with self.state.get_lock():
+                if self.state[IN_FLIGHT] < int(self.state[LIMIT]):
+                    self.state[IN_FLIGHT] += 1
+                    return
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                # Releases in other processes are not signalled, so poll too.
+                await asyncio.wait_for(waiter, 0.05)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+
+    def release(self, latency=None, error=False):
+        state = self.state
+        with state.get_lock():
+            state[IN_FLIGHT] = max(0, state[IN_FLIGHT] - 1)
+            if latency is not None:
+                if state[LATENCY] == 0:
+                    state[LATENCY] = latency
+                state[LATENCY] = 0.9 * state[LATENCY] + 0.1 * latency
+                # The baseline is the best smoothed latency seen, so a mix of
+                # short and long sentences does not look like congestion.
+                if state[BASELINE] == 0 or state[LATENCY] < state[BASELINE]:
+                    state[BASELINE] = state[LATENCY]
+            congested = (
+                latency is not None
+                and state[LATENCY] > state[BASELINE] * self.latency_factor
+            )
+            if error:
+                state[ERRORS] += 1
+            if state[COOLDOWN] > 0:
+                state[COOLDOWN] -= 1
+            elif error or congested:
+                factor = 0.5 if error else 0.75
+                state[LIMIT] = max(self.minimum, int(state[LIMIT] * factor))
+                state[WINDOW] = 0
+                state[COOLDOWN] = state[IN_FLIGHT]
+            elif latency is not None:
+                state[WINDOW] += 1
+                if state[WINDOW] >= state[LIMIT]:
+                    state[WINDOW] = 0
+                    state[LIMIT] = min(self.maximum, state[LIMIT] + 1)
+            free = int(state[LIMIT]) - int(state[IN_FLIGHT])
+        for _ in range(max(free, 1)):
+            if not self._waiters:
+                break
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+
+    @contextlib.asynccontextmanager
+    async def slot(self):
+        """Hold one request slot, feeding its latency or failure back."""
+        await self.acquire()
+        started = time.monotonic()
+        try:
+            yield
+        except Exception:
+            self.release(error=True)
+            raise
+        except BaseException:
+            self.release()
+            raise
+        self.release(latency=time.monotonic() - started)
+
+    def report(self):
+        return f"TTS concurrency: limit {self.limit}, {self.errors} failed requests"
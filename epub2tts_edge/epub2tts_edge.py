@@ -1,148 +1,103 @@
 import argparse
 import asyncio
-import concurrent.futures
-import datetime
+import bisect
+import contextlib
+import functools
+import itertools
 import os
 import re
 import subprocess
-import time
-import warnings
-from tqdm import tqdm
-
-
-from bs4 import BeautifulSoup
-import ebooklib
-from ebooklib import epub
-import edge_tts
-from lxml import etree
-from mutagen import mp4
-import nltk
-from nltk.tokenize import sent_tokenize
-from PIL import Image
-from pydub import AudioSegment
-import zipfile
+import sys
 
 
-namespaces = {
-    "calibre": "http://calibre.kovidgoyal.net/2009/metadata",
-    "dc": "http://purl.org/dc/elements/1.1/",
-    "dcterms": "http://purl.org/dc/terms/",
-    "opf": "http://www.idpf.org/2007/opf",
-    "u": "urn:oasis:names:tc:opendocument:xmlns:container",
-    "xsi": "http://www.w3.org/2001/XMLSchema-instance",
-}
+import zipfile
 
-warnings.filterwarnings("ignore", module="ebooklib.epub")
+from . import profiling, voices
+from .audio import (
+    SAMPLE_RATE,
+    ChapterEncoder,
+    decode_audio,
+    ms_to_samples,
+    part_format,
+)
+from .backends import EdgeBackend, get_backend
+from .cache import TTSCache
+from .controller import ConcurrencyController, backoff_delay
+from .fanout import FORMATS as OUTPUT_FORMATS, make_outputs
+from .journal import Journal, journal_path, source_fingerprint
+from .manifest import ManifestWriter, chapter_sentences, manifest_path, read_manifest
+from .subtitles import FORMATS as SUBTITLE_FORMATS, SubtitleWriter
+from .scheduler import SynthesisScheduler, prefetch_iter
+from .segment import SEGMENTERS, SegmentationCache, get_segmenter
 
 
-def microseconds_to_timestamp(microseconds):
-    td = datetime.timedelta(microseconds=microseconds)
-    return str(td)[:-3].replace(".", ",")
+# How far parsing may run ahead of synthesis when streaming a text book
+PREFETCH_PARAGRAPHS = 256
+# Chapter loudness for a bare --normalize, in dB RMS of the speech
+NORMALIZE_DB = -20.0
 
 
-def ensure_punkt():
-    try:
-        nltk.data.find("tokenizers/punkt")
-    except LookupError:
-        nltk.download("punkt")
-
-    nltk.download("punkt_tab")
-
-
-def chap2text_epub(chap):
-    blacklist = [
-        "[document]",
-        "noscript",
-        "header",
-        "html",
-        "meta",
-        "head",
-        "input",
-        "script",
-    ]
-    paragraphs = []
-    soup = BeautifulSoup(chap, "html.parser")
+def postprocess_options(args):
+    """The read_book `postprocess` settings asked for on the command line."""
+    return {
+        "trim": args.trim_silence,
+        "sentence_pause": args.sentence_pause,
+        "normalize": args.normalize,
+    }
 
-    # Extract chapter title (assuming it's in an <h1> tag)
-    chapter_title = soup.find("h1")
-    if chapter_title:
-        chapter_title_text = chapter_title.text.strip()
-    else:
-        chapter_title_text = None
 
-    # Always skip reading links that are just a number (footnotes)
-    for a in soup.findAll("a", href=True):
-        if not any(char.isalpha() for char in a.text):
-            a.extract()
+def get_basefile(sourcefile):
+    return re.sub(r"\.(txt|epub)$", "", sourcefile)
 
-    chapter_paragraphs = soup.find_all("p")
-    for p in chapter_paragraphs:
-        paragraph_text = "".join(p.strings).strip()
-        paragraphs.append(paragraph_text)
 
-    return chapter_title_text, paragraphs
+def ensure_punkt():
+    # Only go to the network for tokenizer data that is not installed yet
+    import nltk
+
+    for resource in ("punkt", "punkt_tab"):
+        try:
+            nltk.data.find(f"tokenizers/{resource}")
+        except LookupError:
+            nltk.download(resource)
 
 
 def get_epub_cover(epub_path):
-    try:
-        with zipfile.ZipFile(epub_path) as z:
-            t = etree.fromstring(z.read("META-INF/container.xml"))
-            rootfile_path = t.xpath(
-                "/u:container/u:rootfiles/u:rootfile", namespaces=namespaces
-            )[0].get("full-path")
-
-            t = etree.fromstring(z.read(rootfile_path))
-            cover_meta = t.xpath(
-                "//opf:metadata/opf:meta[@name='cover']", namespaces=namespaces
-            )
-            if not cover_meta:
-                print("No cover image found.")
-                return None
-            cover_id = cover_meta[0].get("content")
+    from .extract import read_package
 
-            cover_item = t.xpath(
-                "//opf:manifest/opf:item[@id='" + cover_id + "']", namespaces=namespaces
-            )
-            if not cover_item:
-                print("No cover image found.")
-                return None
-            cover_href = cover_item[0].get("href")
-            cover_path = os.path.join(os.path.dirname(rootfile_path), cover_href)
-
-            return z.open(cover_path)
-    except FileNotFoundError:
+    try:
+        cover_path = read_package(epub_path)["cover"]
+        if cover_path is None:
+            print("No cover image found.")
+            return None
+        return zipfile.ZipFile(epub_path).open(cover_path)
+    except (FileNotFoundError, KeyError):
         print(f"Could not get cover image of {epub_path}")
 
 
-def export_chapters(book, sourcefile):
-    # TODO: Add support for from_chapter and to_chapter
-    book_contents = []
+def save_epub_cover(sourcefile):
     cover_image = get_epub_cover(sourcefile)
-    cover_image_path = None
-
-    if cover_image is not None:
-        image = Image.open(cover_image)
-        image_filename = sourcefile.replace(".epub", ".png")
-        cover_image_path = os.path.join(image_filename)
-        image.save(cover_image_path)
-        print(f"Cover image saved to {cover_image_path}")
-
-    spine_ids = []
-    for spine_tuple in book.spine:
-        if spine_tuple[1] == "yes":  # if item in spine is linear
-            spine_ids.append(spine_tuple[0])
-
-    items = {}
-    for item in book.get_items():
-        if item.get_type() == ebooklib.ITEM_DOCUMENT:
-            items[item.get_id()] = item
-
-    for id in spine_ids:
-        item = items.get(id, None)
-        if item is None:
-            continue
-        chapter_title, chapter_paragraphs = chap2text_epub(item.get_content())
-        book_contents.append({"title": chapter_title, "paragraphs": chapter_paragraphs})
+    if cover_image is None:
+        return None
+    from PIL import Image
+
+    image = Image.open(cover_image)
+    cover_image_path = sourcefile.replace(".epub", ".png")
+    image.save(cover_image_path)
+    print(f"Cover image saved to {cover_image_path}")
+    return cover_image_path
+
+
+def export_chapters(sourcefile, workers=None):
+    with profiling.span("export_chapters"):
+        return _export_chapters(sourcefile, workers)
+
+
+def _export_chapters(sourcefile, workers=None):
+    # TODO: Add support for from_chapter and to_chapter
+    from .extract import iter_chapters
+
+    cover_image_path = save_epub_cover(sourcefile)
+    book_contents = list(iter_chapters(sourcefile, workers))
 
     chapters = []
     for i, chapter in enumerate(book_contents, start=1):
@@ -162,14 +117,115 @@ def export_chapters(book, sourcefile):
     return chapters, cover_image_path
 
 
-def get_book(sourcefile):
-    book_contents = []
-    book_title = sourcefile
-    book_author = "Unknown"
+def stream_epub(sourcefile, chapter_titles, workers=None, segmenter="punkt"):
+    """Yield the chapters of an epub the way get_book reads an exported one.
+
+    Spine documents are parsed lazily as synthesis asks for them, and go
+    through the same cleanup as the export/get_book round trip: a document
+    without an <h1> continues the previous chapter, and paragraphs or
+    sentences without any letters or digits are dropped. Paragraphs come out
+    as lists of sentences. Titles are appended to `chapter_titles` as each
+    chapter is handed out.
+    """
+    from .extract import iter_chapters
+
+    segment = get_segmenter(segmenter)
+    current = None
+    for chapter in iter_chapters(sourcefile, workers):
+        paragraphs = []
+        for paragraph in chapter["paragraphs"]:
+            paragraph = split_paragraph(
+                re.sub(r"[\s\n©]+", " ", paragraph).strip(), segment
+            )
+            if paragraph:
+                paragraphs.append(paragraph)
+        title = chapter["title"]
+        if title is not None or current is None:
+            if current is not None and current["paragraphs"]:
+                chapter_titles.append(current["title"])
+                yield current
+            if not title or not any(c.isalnum() for c in title):
+                title = "blank"
+            current = {"title": title, "paragraphs": []}
+        current["paragraphs"].extend(paragraphs)
+    if current is not None and current["paragraphs"]:
+        chapter_titles.append(current["title"])
+        yield current
+
+
+def get_epub_metadata(sourcefile):
+    from .extract import read_package
+
+    package = read_package(sourcefile)
+    return package["title"], package["author"]
+
+
+def split_paragraph(line, segment):
+    # Split into sentences, dropping those without any letters or digits
+    # (stray punctuation, ornaments); [] when nothing readable is left.
+    if not any(char.isalnum() for char in line):
+        return []
+    return [s for s in segment(line) if any(char.isalnum() for char in s)]
+
+
+def get_book(sourcefile, segmenter="punkt", cache=None):
+    """Parse a text book into chapters of paragraphs of sentences.
+
+    With a SegmentationCache, a book that was parsed before with the same
+    segmenter is loaded from the cache instead. stream_book reads the same
+    book lazily.
+    """
+    with profiling.span("get_book"):
+        chapters, book_title, book_author, chapter_titles = stream_book(
+            sourcefile, segmenter, cache
+        )
+        book_contents = [
+            {"title": chapter["title"], "paragraphs": list(chapter["paragraphs"])}
+            for chapter in chapters
+        ]
+        return book_contents, book_title, book_author, chapter_titles
+
+
+def stream_book(sourcefile, segmenter="punkt", cache=None, prefetch=0):
+    """Read a text book the way get_book does, one paragraph at a time.
+
+    Returns the chapters (a generator), the title, the author and a list of
+    chapter titles that fills in as chapters are handed out. Each chapter's
+    "paragraphs" is an iterator as well, and is read to its end before the
+    next chapter comes, so memory does not grow with the length of the book
+    or of its chapters. With `prefetch`, parsing and segmentation run in a
+    background thread, up to that many paragraphs ahead of the reader.
+    """
+    if cache is None:
+        events = _book_events(sourcefile, get_segmenter(segmenter))
+    else:
+        key = cache.key(sourcefile, segmenter)
+        events = cache.read(key)
+        if events is None:
+            events = cache.record(key, _book_events(sourcefile, get_segmenter(segmenter)))
+    if prefetch:
+        events = prefetch_iter(events, prefetch)
+    metadata = {"title": sourcefile, "author": "Unknown"}
+    # The title and author lines come first
+    for event in events:
+        if event[0] not in metadata:
+            events = itertools.chain([event], events)
+            break
+        metadata[event[0]] = event[1]
     chapter_titles = []
+    return (
+        _chapters(events, chapter_titles),
+        metadata["title"],
+        metadata["author"],
+        chapter_titles,
+    )
 
+
+def _book_events(sourcefile, segment):
+    # The book as a flat stream of events: ["title", title], ["author",
+    # author], ["heading", chapter title], ["untitled"] for text before the
+    # first heading, and ["paragraph", sentences].
     with open(sourcefile, "r", encoding="utf-8") as file:
-        current_chapter = {"title": "blank", "paragraphs": []}
         initialized_first_chapter = False
         lines_skipped = 0
         for line in file:
@@ -178,190 +234,584 @@ def get_book(sourcefile):
             ):
                 lines_skipped += 1
                 if line.startswith("Title: "):
-                    book_title = line.replace("Title: ", "").strip()
+                    yield ["title", line.replace("Title: ", "").strip()]
                 elif line.startswith("Author: "):
-                    book_author = line.replace("Author: ", "").strip()
+                    yield ["author", line.replace("Author: ", "").strip()]
                 continue
             line = line.strip()
             if line.startswith("#"):
-                if current_chapter["paragraphs"] or not initialized_first_chapter:
-                    if initialized_first_chapter:
-                        book_contents.append(current_chapter)
-                    current_chapter = {"title": None, "paragraphs": []}
-                    initialized_first_chapter = True
+                initialized_first_chapter = True
                 chapter_title = line[1:].strip()
                 if any(c.isalnum() for c in chapter_title):
-                    current_chapter["title"] = chapter_title
-                    chapter_titles.append(current_chapter["title"])
+                    yield ["heading", chapter_title]
                 else:
-                    current_chapter["title"] = "blank"
-                    chapter_titles.append("blank")
+                    yield ["heading", "blank"]
             elif line:
                 if not initialized_first_chapter:
-                    chapter_titles.append("blank")
                     initialized_first_chapter = True
-                if any(char.isalnum() for char in line):
-                    sentences = sent_tokenize(line)
-                    cleaned_sentences = [
-                        s for s in sentences if any(char.isalnum() for char in s)
-                    ]
-                    line = " ".join(cleaned_sentences)
-                    current_chapter["paragraphs"].append(line)
-
-        # Append the last chapter if it contains any paragraphs.
-        if current_chapter["paragraphs"]:
-            book_contents.append(current_chapter)
-
-    return book_contents, book_title, book_author, chapter_titles
-
-
-def sort_key(s):
-    # extract number from the string
-    return int(re.findall(r"\d+", s)[0])
+                    yield ["untitled"]
+                sentences = split_paragraph(line, segment)
+                if sentences:
+                    yield ["paragraph", sentences]
+
+
+def _chapters(events, chapter_titles):
+    # A chapter starts at its first paragraph; headings without paragraphs
+    # in between only leave their title behind, like get_book always did.
+    title = "blank"
+    following = {}
+    for event in events:
+        if event[0] == "heading":
+            title = event[1]
+            chapter_titles.append(title)
+        elif event[0] == "untitled":
+            title = "blank"
+            chapter_titles.append(title)
+        elif event[0] == "paragraph":
+            paragraphs = _paragraphs(event[1], events, chapter_titles, following)
+            yield {"title": title, "paragraphs": paragraphs}
+            # skip whatever the reader left of the chapter
+            for _ in paragraphs:
+                pass
+            title = following.pop("heading", title)
+
+
+def _paragraphs(first, events, chapter_titles, following):
+    yield first
+    for event in events:
+        if event[0] == "paragraph":
+            yield event[1]
+        elif event[0] == "heading":
+            chapter_titles.append(event[1])
+            following["heading"] = event[1]
+            return
+
+
+def load_book(sourcefile, segmenter="punkt", cache_dir=None, cover=None):
+    """Return the chapters, title, author, chapter titles and cover of a book.
+
+    Both kinds are read lazily, and the chapter titles fill in as the
+    chapters are consumed: an epub with stream_epub, a text book with
+    stream_book and the segmentation cache under `cache_dir`.
+    """
+    if sourcefile.endswith(".epub"):
+        title, author = get_epub_metadata(sourcefile)
+        chapter_titles = []
+        book_contents = stream_epub(sourcefile, chapter_titles, segmenter=segmenter)
+        if cover is None:
+            cover = save_epub_cover(sourcefile)
+        return book_contents, title, author, chapter_titles, cover
+    book_contents, title, author, chapter_titles = stream_book(
+        sourcefile,
+        segmenter,
+        SegmentationCache(cache_dir and os.path.join(cache_dir, "segments")),
+        prefetch=PREFETCH_PARAGRAPHS,
+    )
+    return book_contents, title, author, chapter_titles, cover
 
 
-def append_silence(tempfile, duration=1200):
-    audio = AudioSegment.from_file(tempfile)
-    # Create a silence segment
-    silence = AudioSegment.silent(duration)
-    # Append the silence segment to the audio
-    combined = audio + silence
-    # Save the combined audio back to file
-    combined.export(tempfile, format="flac")
+def _book_jobs(basefile, book_contents, speaker, journal, extension="flac"):
+    # Flatten the book into one stream of TTS jobs. Jobs without text mark
+    # chapter boundaries for the assembly stage.
+    for i, chapter in enumerate(book_contents, start=1):
+        partname = f"{basefile}-part{i}.{extension}"
+        if journal.chapter_is_done(i, partname):
+            yield {
+                "kind": "chapter",
+                "text": None,
+                "chapter": i,
+                "partname": partname,
+                "exists": True,
+            }
+            continue
+        if chapter["title"] == "":
+            chapter["title"] = "blank"
+        yield {
+            "kind": "chapter",
+            "text": None,
+            "chapter": i,
+            "partname": partname,
+            "exists": False,
+            "title": chapter["title"],
+            # unknown for a streamed chapter
+            "paragraphs": (
+                len(chapter["paragraphs"])
+                if isinstance(chapter["paragraphs"], list)
+                else None
+            ),
+        }
+        yield {
+            "kind": "title",
+            "text": chapter["title"],
+            "speaker": speaker,
+            "paragraph": 0,
+            "sentence": 0,
+        }
+        for pindex, sentences in enumerate(chapter["paragraphs"], start=1):
+            for sindex, sentence in enumerate(sentences):
+                yield {
+                    "kind": "sentence",
+                    "text": sentence,
+                    "speaker": speaker,
+                    "paragraph": pindex,
+                    "sentence": sindex,
+                    "last": sindex == len(sentences) - 1,
+                }
+    yield {"kind": "end", "text": None}
+
+
+def _batch_jobs(jobs, batch_chars):
+    # Pack consecutive sentences of a chapter into one TTS request of up to
+    # batch_chars characters. The sentences ride along as "parts" so the
+    # result can be split back at sentence and paragraph boundaries. Titles
+    # are always read alone, with their own prosody.
+    batch = []
+
+    def flush():
+        if len(batch) == 1:
+            yield batch[0]
+        elif batch:
+            yield {
+                "kind": "batch",
+                "text": " ".join(part["text"] for part in batch),
+                "speaker": batch[0]["speaker"],
+                "parts": list(batch),
+            }
+        batch.clear()
+
+    for job in jobs:
+        if job["text"] is None or job["kind"] == "title":
+            yield from flush()
+            yield job
+            continue
+        length = sum(len(part["text"]) + 1 for part in batch) + len(job["text"])
+        if batch and length > batch_chars:
+            yield from flush()
+        batch.append(job)
+    yield from flush()
+
+
+def split_batch(pcm, subs, texts):
+    """Split the audio and boundaries of a batched request back per sentence.
+
+    Each boundary is located in the joined request text to find the sentence
+    it belongs to; a sentence's audio starts halfway between the end of the
+    previous sentence's last word and its own first word.
+    """
+    joined = " ".join(texts)
+    starts = []
+    position = 0
+    for text in texts:
+        starts.append(position)
+        position += len(text) + 1
+
+    owners = []
+    cursor = 0
+    for (offset, duration), text in subs:
+        found = joined.find(text, cursor)
+        if found == -1:
+            owners.append(None)
+            continue
+        cursor = found + len(text)
+        owners.append(bisect.bisect_right(starts, found) - 1)
+
+    # boundary ticks at which each sentence starts
+    cuts = [0]
+    for index in range(1, len(texts)):
+        previous_end = None
+        next_start = None
+        for ((offset, duration), _), owner in zip(subs, owners):
+            if owner is not None and owner < index:
+                previous_end = offset + duration
+            elif owner is not None and owner >= index and next_start is None:
+                next_start = offset
+        if next_start is None:
+            cut = cuts[-1] if previous_end is None else previous_end
+            cut = max(cut, cuts[-1])
+        elif previous_end is None:
+            cut = max(cuts[-1], next_start)
+        else:
+            cut = max(cuts[-1], (previous_end + next_start) // 2)
+        cuts.append(cut)
+
+    total_samples = len(pcm) // 2
+    sample_cuts = [min(total_samples, round(cut * SAMPLE_RATE / 10**7)) for cut in cuts]
+    sample_cuts.append(total_samples)
+    pieces = []
+    for index in range(len(texts)):
+        piece_subs = [
+            ((offset - cuts[index], duration), text)
+            for ((offset, duration), text), owner in zip(subs, owners)
+            if owner == index
+        ]
+        start, end = sample_cuts[index], sample_cuts[index + 1]
+        pieces.append((pcm[start * 2 : end * 2], piece_subs))
+    return pieces
+
+
+def make_synthesize(cache, controller, backend):
+    """The coroutine read_book schedules: cached TTS, decoded to PCM."""
+    cached_edgespeak = cache.wrap(
+        functools.partial(run_edgespeak, controller=controller, backend=backend),
+        backend.name,
+    )
 
+    async def synthesize(sentence, speaker):
+        audio, subs = await cached_edgespeak(sentence, speaker)
+        return await decode_audio(audio, backend.format), subs
+
+    return synthesize
+
+
+@profiling.traced("read_book")
+def read_book(
+    sourcefile,
+    book_contents,
+    speaker,
+    concurrency=10,
+    max_concurrency=32,
+    cache=None,
+    backend=None,
+    subtitle_formats=("vtt",),
+    chapter_subtitles=False,
+    batch_chars=0,
+    codec="flac",
+    bitrate=None,
+    progress=None,
+    controller=None,
+    scheduler=None,
+    priority=0,
+    postprocess=None,
+    on_chapter=None,
+    stats=None,
+):
+    # progress(total=..., desc=...) makes a per-chapter progress bar with
+    # update() and close(); tqdm by default. A `controller` and `scheduler`
+    # shared with other books replace the book's own; the scheduler must run
+    # make_synthesize(cache, controller, backend), and serves lower
+    # `priority` first if it is a PriorityScheduler. `postprocess` may ask
+    # to "trim" clip silence, for a "sentence_pause" in ms between the
+    # sentences of a paragraph, and to "normalize" chapters to that many dB.
+    # on_chapter(number, file, samples) is called as each chapter is ready,
+    # including chapters a previous run finished (samples may be None).
+    # A `stats` dict gets the requests, characters, sentences and samples
+    # this run synthesized.
+    if progress is None:
+        from tqdm import tqdm as progress
+    postprocess = postprocess or {}
+    trim = postprocess.get("trim", False)
+    sentence_pause = postprocess.get("sentence_pause", 0)
+    normalize = postprocess.get("normalize")
+    if trim or normalize is not None:
+        from .postprocess import NormalizingEncoder, trim_sentence
 
-def read_book(sourcefile, book_contents, speaker):
     segments = []
-    subs_fragments = []
-    basefile = sourcefile.replace(".txt", "")
-    for i, chapter in enumerate(book_contents, start=1):
-        files = []
-        partname = f"{basefile}-part{i}.flac"
-
-        if os.path.isfile(partname):
-            print(f"{partname} exists, skipping to next chapter")
-            segments.append(partname)
-        else:
-            print(f"Chapter: {chapter['title']}\n")
-            if chapter["title"] == "":
-                chapter["title"] = "blank"
-            subs_fragments += asyncio.run(
-                parallel_edgespeak(
-                    [chapter["title"]], [speaker], [f"{basefile}-sntnc0.mp3"]
-                )
-            )
-            append_silence(f"{basefile}-sntnc0.mp3", 1200)
-            for pindex, paragraph in enumerate(
-                tqdm(
-                    chapter["paragraphs"],
-                    desc=f"Processing chapter {sourcefile}",
-                    unit="pg",
-                )
-            ):
-                ptemp = f"{basefile}-pgraphs{pindex}.flac"
-                if os.path.isfile(ptemp):
-                    print(f"{ptemp} exists, skipping to next paragraph")
-                else:
-                    sentences = sent_tokenize(paragraph)
-                    filenames = [
-                        f"{basefile}-sntnc" + str(z + 1) + ".mp3"
-                        for z in range(len(sentences))
-                    ]
-                    speakers = [speaker] * len(sentences)
-                    subs_fragments += asyncio.run(
-                        parallel_edgespeak(sentences, speakers, filenames)
-                    )
-                    append_silence(filenames[-1], 1200)
-                    # combine sentences in paragraph
-                    sorted_files = sorted(filenames, key=sort_key)
-                    if os.path.exists(f"{basefile}-sntnc0.mp3"):
-                        sorted_files.insert(0, f"{basefile}-sntnc0.mp3")
-                    combined = AudioSegment.empty()
-                    for file in sorted_files:
-                        combined += AudioSegment.from_file(file)
-                    combined.export(ptemp, format="flac")
-                    for file in sorted_files:
-                        os.remove(file)
-                files.append(ptemp)
-            # combine paragraphs into chapter
-            append_silence(files[-1], 2800)
-            combined = AudioSegment.empty()
-            for file in files:
-                combined += AudioSegment.from_file(file)
-            combined.export(partname, format="flac")
-            for file in files:
-                os.remove(file)
-            segments.append(partname)
-
-        # Generate subtitles
-
-        cumulative_offset = 0
-        final_subtitles = []
-        fragment_durations = []
-
-        for fragment in subs_fragments:
-            fragment_end_time = max(
-                offset + duration for (offset, duration), _ in fragment
+    chapters = set()
+    if stats is None:
+        stats = {}
+    stats.update(requests=0, chars=0, sentences=0, samples=0)
+    container, extension = part_format(codec)
+    basefile = get_basefile(sourcefile)
+    chapter = None
+    book_offset = 0
+    if cache is None:
+        cache = TTSCache()
+    if backend is None:
+        backend = EdgeBackend()
+    if controller is None:
+        controller = ConcurrencyController(concurrency, maximum=max_concurrency)
+    shared = scheduler is not None
+    if not shared:
+        scheduler = SynthesisScheduler(
+            make_synthesize(cache, controller, backend), controller.maximum * 4
+        )
+    # Sentences of a finished chapter are only read when it is skipped
+    previous = {c["file"]: c for c in read_manifest(basefile, sentences=False)}
+    journal = Journal(basefile, source_fingerprint(sourcefile))
+    manifest = ManifestWriter(basefile)
+    subtitles = SubtitleWriter(basefile, subtitle_formats, chapter_subtitles)
+
+    @profiling.traced("finish_chapter")
+    def finish_chapter(chapter):
+        chapter["progress"].close()
+        encoder = chapter["encoder"]
+        if chapter["failed"]:
+            journal.chapter_failed(chapter["chapter"], encoder.outfile)
+            return 0
+        encoder.write_silence(2800)
+        encoder.close()
+        manifest.chapter(
+            chapter["chapter"], chapter["title"], encoder.outfile, encoder.samples
+        )
+        journal.chapter_done(chapter["chapter"], encoder.outfile, encoder.samples)
+        stats["samples"] += encoder.samples
+        if on_chapter is not None:
+            on_chapter(chapter["chapter"], encoder.outfile, encoder.samples)
+        return encoder.samples
+
+    @profiling.traced("assemble_sentence")
+    def add_sentence(chapter, job, key, result, book_offset):
+        position = (chapter["chapter"], job["paragraph"], job["sentence"])
+        if job["kind"] == "sentence" and job["last"]:
+            chapter["progress"].update()
+        if isinstance(result, Exception):
+            journal.sentence_failed(*position, key, result)
+            if not chapter["failed"]:
+                # Keep synthesizing the rest of the book; the journal lets
+                # the next run retry just this part.
+                chapter["failed"] = True
+                chapter["encoder"].abort()
+            return
+        pcm, subs = result
+        if trim:
+            pcm, subs = trim_sentence(pcm, subs)
+        samples = len(pcm) // 2
+        journal.sentence_done(*position, key, samples, subs)
+        if chapter["failed"]:
+            return
+        encoder = chapter["encoder"]
+        start = encoder.samples
+        encoder.write(pcm)
+        if job["kind"] == "title" or job["last"]:
+            encoder.write_silence(1200)
+        elif sentence_pause:
+            encoder.write_silence(sentence_pause)
+        manifest.sentence(
+            *position,
+            start,
+            samples,
+            encoder.samples - start - samples,
+            subs,
+        )
+        subtitles.add(book_offset + start, subs)
+
+    # One scheduler for the whole book, so synthesis runs ahead across
+    # paragraph and chapter boundaries while earlier audio is being assembled.
+    # Each sentence is decoded once to PCM and streamed into a single encoder
+    # per chapter, with pauses written as zero samples. Exact sample counts
+    # go to the manifest, subtitle cues are written as sentences land, and
+    # every sentence's outcome goes to the journal so a failed or killed run
+    # can pick up where it stopped.
+    # A shared scheduler is left running for the other books.
+    with contextlib.nullcontext(scheduler) if shared else scheduler:
+        jobs = _book_jobs(basefile, book_contents, speaker, journal, extension)
+        if batch_chars:
+            jobs = _batch_jobs(jobs, batch_chars)
+        finished = False
+        try:
+            for job, result in scheduler.map(jobs, priority):
+                kind = job["kind"]
+                if kind in ("chapter", "end") and chapter is not None:
+                    book_offset += finish_chapter(chapter)
+                    chapter = None
+
+                if kind == "chapter":
+                    segments.append(job["partname"])
+                    chapters.add(job["chapter"])
+                    subtitles.start_chapter(len(segments), book_offset)
+                    if job["exists"]:
+                        print(f"{job['partname']} exists, skipping to next chapter")
+                        done = previous.get(job["partname"])
+                        if on_chapter is not None:
+                            samples = done["samples"] if done else None
+                            on_chapter(len(segments), job["partname"], samples)
+                        if done is None:
+                            book_offset += ms_to_samples(get_duration(job["partname"]))
+                            continue
+                        for sentence in chapter_sentences(basefile, done["chapter"]):
+                            subtitles.add(book_offset + sentence["start"], sentence["subs"])
+                        book_offset += done["samples"]
+                        continue
+                    print(f"Chapter: {job['title']}\n")
+                    encoder = ChapterEncoder(job["partname"], codec, container, bitrate)
+                    if normalize is not None:
+                        encoder = NormalizingEncoder(encoder, normalize)
+                    journal.chapter_started(job["chapter"], job["partname"])
+                    chapter = {
+                        "chapter": job["chapter"],
+                        "title": job["title"],
+                        "failed": False,
+                        "encoder": encoder,
+                        "progress": progress(
+                            total=job["paragraphs"],
+                            desc=f"Processing chapter {sourcefile}",
+                            unit="pg",
+                        ),
+                    }
+                elif kind in ("title", "sentence", "batch"):
+                    key = cache.key(job["text"], job["speaker"], backend.name)
+                    parts = job["parts"] if kind == "batch" else [job]
+                    stats["requests"] += 1
+                    stats["chars"] += len(job["text"])
+                    stats["sentences"] += len(parts)
+                    if isinstance(result, Exception):
+                        results = [result] * len(parts)
+                    elif kind == "batch":
+                        results = split_batch(
+                            result[0], result[1], [part["text"] for part in parts]
+                        )
+                    else:
+                        results = [result]
+                    for part, part_result in zip(parts, results):
+                        add_sentence(chapter, part, key, part_result, book_offset)
+            finished = True
+        finally:
+            if chapter is not None and not chapter["failed"]:
+                chapter["encoder"].abort()
+            manifest.close()
+            # Rows of chapters a previous version of the book had are stale
+            failures = journal.failures(chapters)
+            journal.close()
+            # The last complete subtitles stay until this run has the whole book
+            if finished and not failures:
+                subtitles.close()
+            else:
+                subtitles.abort()
+
+    print(cache.report())
+    print(controller.report())
+    if failures:
+        for chapter_number, paragraph, sentence, error in failures:
+            print(
+                f"Failed: chapter {chapter_number}, paragraph {paragraph}, "
+                f"sentence {sentence}: {error}"
             )
-            fragment_durations.append(fragment_end_time)
-
-            for (offset, duration), text in fragment:
-                adjusted_offset = offset + cumulative_offset
-                start_time = microseconds_to_timestamp(adjusted_offset)
-                end_time = microseconds_to_timestamp(adjusted_offset + duration)
-                final_subtitles.append((start_time, end_time, text))
+        raise Exception(
+            f"{len(failures)} sentences could not be synthesized, "
+            "run again to retry just those"
+        )
+    return segments
 
-            cumulative_offset += fragment_end_time
 
-        final_subtitles.sort(key=lambda x: x[0])
+@profiling.traced("generate_metadata")
+def generate_metadata(sourcefile, files, author, title, chapter_titles):
+    # TODO: Fix the metadata properties here
+    # Chapter lengths come from the synthesis manifest, in samples, so no
+    # chapter has to be decoded again. Files without a manifest entry fall
+    # back to measuring the audio.
+    basefile = get_basefile(sourcefile)
+    durations = chapter_samples(sourcefile, files)
+    ffmetadatafile = f"{basefile}.ffmetadata"
+    write_ffmetadata(ffmetadatafile, author, title, chapter_titles, durations)
+    return ffmetadatafile
 
-        subtitle_file = f"{basefile}.vtt"
-        print(f"Writing subtitles to {subtitle_file}")
-        with open(subtitle_file, "w") as f:
-            f.write("WEBVTT\n\n")
-            for i, (start_time, end_time, text) in enumerate(final_subtitles, 1):
-                f.write(f"{start_time} --> {end_time}\n{text}\n\n")
 
-    return segments
+def chapter_samples(sourcefile, files):
+    """The length of each chapter file in samples, from the manifest."""
+    samples = {
+        chapter["file"]: chapter["samples"]
+        for chapter in read_manifest(get_basefile(sourcefile), sentences=False)
+    }
+    durations = []
+    for file_name in files:
+        if file_name in samples:
+            durations.append(samples[file_name])
+        else:
+            durations.append(ms_to_samples(get_duration(file_name)))
+    return durations
 
 
-def generate_metadata(sourcefile, files, author, title, chapter_titles):
-    # TODO: Fix the metadata properties here
-    chap = 0
+def write_ffmetadata(ffmetadatafile, author, title, chapter_titles, durations):
+    # Chapter starts and ends are in samples
     start_time = 0
-    ffmetadatafile = sourcefile.replace(".txt", ".ffmetadata")
     with open(ffmetadatafile, "w") as file:
         file.write(";FFMETADATA1\n")
         file.write(f"ARTIST={author}\n")
         file.write(f"ALBUM={title}\n")
-        for file_name in files:
-            duration = get_duration(file_name)
+        for chapter_title, duration in zip(chapter_titles, durations):
             file.write("[CHAPTER]\n")
-            file.write("TIMEBASE=1/1000\n")
+            file.write(f"TIMEBASE=1/{SAMPLE_RATE}\n")
             file.write(f"START={start_time}\n")
             file.write(f"END={start_time + duration}\n")
-            file.write(f"title={chapter_titles[chap]}\n")
-            chap += 1
+            file.write(f"title={chapter_title}\n")
             start_time += duration
 
-    return ffmetadatafile
-
 
+@profiling.traced("get_duration")
 def get_duration(file_path):
+    from pydub import AudioSegment
+
     audio = AudioSegment.from_file(file_path)
     duration_milliseconds = len(audio)
     return duration_milliseconds
 
 
-def make_m4b(files, sourcefile, speaker, ffmetadatafile):
-    filelist = sourcefile.split("/")[-1] + ".txt"
-    basefile = sourcefile.replace(".txt", "")
-    outputm4a = f"{basefile}.m4a"
+def remove_run_state(basefile):
+    # The manifest and journal are only needed until the book is written
+    for leftover in (manifest_path(basefile), journal_path(basefile)):
+        if os.path.exists(leftover):
+            os.remove(leftover)
+
+
+def write_outputs(
+    args, sourcefile, files, ffmetadatafile, title, author, chapter_titles, cover
+):
+    """make_m4b, or a fan-out to every format in args.formats."""
+    if args.formats == ["m4b"]:
+        written = make_m4b(
+            files,
+            sourcefile,
+            args.speaker,
+            ffmetadatafile,
+            cover=cover,
+            codec=args.codec,
+            bitrate=args.bitrate,
+            threads=args.threads,
+        )
+    else:
+        written = make_outputs(
+            files,
+            sourcefile,
+            ffmetadatafile,
+            title,
+            author,
+            chapter_titles,
+            chapter_samples(sourcefile, files),
+            formats=args.formats,
+            cover=cover,
+            codec=args.codec,
+            bitrate=args.bitrate,
+            threads=args.threads,
+            parallel=args.fanout,
+        )
+    remove_run_state(get_basefile(sourcefile))
+    return written
+
+
+@profiling.traced("make_m4b")
+def make_m4b(
+    files,
+    sourcefile,
+    speaker,
+    ffmetadatafile,
+    cover=None,
+    codec="aac",
+    bitrate=None,
+    threads=0,
+    durations=None,
+    keep=False,
+):
+    # Single pass: the chapter files are concat-demuxed straight into one
+    # encode, with chapter metadata and cover art applied in the same step.
+    # `durations` (in samples) pin where each file starts; without them,
+    # copied AAC parts overlap by part of their encoder priming. The chapter
+    # files are removed afterwards unless `keep` is set.
+    basefile = get_basefile(sourcefile)
     outputm4b = f"{basefile}.m4b"
+    # Next to the output, so books with the same name in other folders (as
+    # --batch encodes at once) don't share it. Not .txt, which --batch would
+    # take for a book; ffmpeg reads the entries relative to the list, hence
+    # the absolute paths
+    filelist = f"{basefile}.ffconcat"
     with open(filelist, "w") as f:
-        for filename in files:
-            filename = filename.replace("'", "'\\''")
+        for i, filename in enumerate(files):
+            filename = os.path.abspath(filename).replace("'", "'\\''")
             f.write(f"file '{filename}'\n")
+            if durations:
+                f.write(f"duration {durations[i] / SAMPLE_RATE}\n")
+    if cover and not os.path.isfile(cover):
+        print(f"Cover image {cover} not found")
+        cover = None
     ffmpeg_command = [
         "ffmpeg",
         "-y",
@@ -371,101 +821,67 @@ def make_m4b(files, sourcefile, speaker, ffmetadatafile):
         "0",
         "-i",
         filelist,
-        "-codec:a",
-        "flac",
-        "-f",
-        "mp4",
-        "-strict",
-        "-2",
-        outputm4a,
-    ]
-    subprocess.run(ffmpeg_command)
-    ffmpeg_command = [
-        "ffmpeg",
-        "-y",
-        "-i",
-        outputm4a,
         "-i",
         ffmetadatafile,
-        "-map_metadata",
-        "1",
-        "-codec",
-        "aac",
-        outputm4b,
     ]
-    subprocess.run(ffmpeg_command)
-    os.remove(filelist)
+    if cover:
+        ffmpeg_command += ["-i", cover]
+    ffmpeg_command += ["-map", "0:a", "-map_metadata", "1", "-map_chapters", "1"]
+    if cover:
+        ffmpeg_command += [
+            "-map",
+            "2:v",
+            "-codec:v",
+            "copy",
+            "-disposition:v:0",
+            "attached_pic",
+        ]
+    ffmpeg_command += ["-codec:a", codec, "-threads", str(threads)]
+    if bitrate:
+        ffmpeg_command += ["-b:a", bitrate]
+    ffmpeg_command += ["-movflags", "+faststart", "-f", "mp4", outputm4b]
+    try:
+        subprocess.run(ffmpeg_command, check=True)
+    finally:
+        os.remove(filelist)
     os.remove(ffmetadatafile)
-    os.remove(outputm4a)
-    for f in files:
-        os.remove(f)
+    if not keep:
+        for f in files:
+            os.remove(f)
     return outputm4b
 
 
-def add_cover(cover_img, filename):
-    # TODO: add metadata to m4b file https://www.audiobookshelf.org/docs#book-audio-metadata
-    try:
-        if os.path.isfile(cover_img):
-            m4b = mp4.MP4(filename)
-            cover_image = open(cover_img, "rb").read()
-            m4b["covr"] = [mp4.MP4Cover(cover_image)]
-            m4b.save()
-        else:
-            print(f"Cover image {cover_img} not found")
-    except:
-        print(f"Cover image {cover_img} not found")
+TTS_ATTEMPTS = 5
 
 
-def run_edgespeak(sentence, speaker, filename):
-    for speakattempt in range(3):
+async def run_edgespeak(sentence, speaker, controller=None, backend=None):
+    sentence = re.sub(r"[!]+", "!", sentence)
+    sentence = re.sub(r"[?]+", "?", sentence)
+    if controller is None:
+        controller = ConcurrencyController()
+    if backend is None:
+        backend = EdgeBackend()
+    for speakattempt in range(TTS_ATTEMPTS):
         try:
-            communicate = edge_tts.Communicate(sentence, speaker)
-            subs = asyncio.run(
-                run_tts(
-                    communicate=communicate,
-                    filename=filename,
-                )
-            )
-            if os.path.getsize(filename) == 0:
-                raise Exception("Failed to save file from edge_tts") from e
-            return subs
+            async with controller.slot():
+                profiling.count("tts_requests")
+                with profiling.span("tts_request", concurrent=True, chars=len(sentence)):
+                    audio, subs = await backend.synthesize(sentence, speaker)
+                if not audio:
+                    raise Exception(f"Failed to get audio from {backend.name}")
+            profiling.count("tts_audio_bytes", len(audio))
+            return audio, subs
         except Exception as e:
+            profiling.count("tts_failed_attempts")
             print(
-                f"Attempt {speakattempt+1}/3 failed with '{sentence}' in run_edgespeak with error: {e}"
+                f"Attempt {speakattempt+1}/{TTS_ATTEMPTS} failed with '{sentence}' in run_edgespeak with error: {e}"
             )
-            # wait a few seconds in case its a transient network issue
-            time.sleep(3)
-    else:
-        print(f"Giving up on sentence '{sentence}' after 3 attempts in run_edgespeak.")
-        exit()
-
-
-async def run_tts(communicate, filename):
-    subs = []
-    with open(filename, "wb") as audio_file:
-        async for chunk in communicate.stream():
-            if chunk["type"] == "audio":
-                audio_file.write(chunk["data"])
-            elif chunk["type"] == "WordBoundary":
-                subs.append(((chunk["offset"], chunk["duration"]), chunk["text"]))
-    return subs
-
-
-async def parallel_edgespeak(sentences, speakers, filenames):
-    semaphore = asyncio.Semaphore(10)  # Limit the number of concurrent tasks
-
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        tasks = []
-        for sentence, speaker, filename in zip(sentences, speakers, filenames):
-            async with semaphore:
-                loop = asyncio.get_running_loop()
-                sentence = re.sub(r"[!]+", "!", sentence)
-                sentence = re.sub(r"[?]+", "?", sentence)
-                task = loop.run_in_executor(
-                    executor, run_edgespeak, sentence, speaker, filename
-                )
-                tasks.append(task)
-        return await asyncio.gather(*tasks)
+            # back off before retrying, in case we are being throttled
+            await asyncio.sleep(backoff_delay(speakattempt))
+    print(
+        f"Giving up on sentence '{sentence}' after {TTS_ATTEMPTS} attempts in run_edgespeak."
+    )
+    raise Exception(f"Could not synthesize '{sentence}'")
 
 
 def main():
@@ -473,7 +889,9 @@ def main():
         prog="epub2tts-edge",
         description="Read a text file to audiobook format",
     )
-    parser.add_argument("sourcefile", type=str, help="The epub or text file to process")
+    parser.add_argument(
+        "sourcefile", type=str, nargs="?", help="The epub or text file to process"
+    )
     parser.add_argument(
         "--speaker",
         type=str,
@@ -482,27 +900,326 @@ def main():
         default="en-US-AndrewNeural",
         help="Speaker to use (ex en-US-MichelleNeural)",
     )
+    parser.add_argument(
+        "--list-voices",
+        type=str,
+        nargs="?",
+        const="",
+        metavar="FILTER",
+        help="List the available voices, optionally only those matching a name or language (ex en-GB), and exit",
+    )
     parser.add_argument(
         "--cover",
         type=str,
         help="jpg image to use for cover",
     )
+    parser.add_argument(
+        "--direct",
+        action="store_true",
+        help="Read an epub straight to an audiobook, without exporting text files to edit first",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Synthesize and encode chapters in this many processes, then join them into one m4b without re-encoding (default 1)",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Keep the chapters of this build and, on the next run, redo only the chapters whose text or settings changed",
+    )
+    parser.add_argument(
+        "--progressive",
+        action="store_true",
+        help="Publish each chapter to an HLS playlist in book.hls/ as soon as it is read, then join the same audio into the m4b",
+    )
+    parser.add_argument(
+        "--estimate",
+        nargs="?",
+        const="text",
+        choices=["text", "json"],
+        help="Only parse the book (or with --batch, the library) and predict TTS requests, audio hours, wall time and disk, from the runs recorded in the cache dir",
+    )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="sourcefile is a directory of books, or a text file listing them; convert them all in this process",
+    )
+    parser.add_argument(
+        "--books",
+        type=int,
+        default=4,
+        help="With --batch, how many books to read at once (default 4)",
+    )
+    parser.add_argument(
+        "--encoders",
+        type=int,
+        default=2,
+        help="With --batch, how many final m4b encodes may run at once (default 2)",
+    )
+    parser.add_argument(
+        "--priority",
+        choices=["order", "shortest"],
+        default="order",
+        help="With --batch, serve books in the given order or smallest first (default order)",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=10,
+        help="Number of TTS requests in flight to start with (default 10)",
+    )
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=32,
+        help="Upper bound for the adaptive TTS concurrency (default 32)",
+    )
+    parser.add_argument(
+        "--batch-chars",
+        type=int,
+        default=0,
+        help="Pack consecutive sentences into TTS requests of up to this many characters (default 0, one sentence per request)",
+    )
+    parser.add_argument(
+        "--trim-silence",
+        action="store_true",
+        help="Cut the silence the TTS service leaves around each sentence",
+    )
+    parser.add_argument(
+        "--sentence-pause",
+        type=int,
+        default=0,
+        help="Pause between the sentences of a paragraph, in ms (default 0)",
+    )
+    parser.add_argument(
+        "--normalize",
+        type=float,
+        nargs="?",
+        const=NORMALIZE_DB,
+        metavar="DB",
+        help=f"Bring every chapter to the same loudness (default {NORMALIZE_DB:g} dB RMS)",
+    )
+    parser.add_argument(
+        "--backend",
+        type=str,
+        default="edge",
+        help="TTS backend: edge, or fake[:latency=0.05,jitter=0.0,failure_rate=0.0,seed=0] for offline load tests (default edge)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        help="Directory for the TTS cache (default ~/.cache/epub2tts-edge)",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=2048,
+        help="Maximum size of the TTS cache in MB (default 2048)",
+    )
+    parser.add_argument(
+        "--segmenter",
+        type=str,
+        choices=sorted(SEGMENTERS),
+        default="punkt",
+        help="Sentence segmenter: punkt (NLTK) or regex, which is much faster but knows fewer abbreviations (default punkt)",
+    )
+    parser.add_argument(
+        "--subtitles",
+        type=str,
+        default="vtt",
+        help="Comma separated subtitle formats to write, vtt and/or srt (default vtt)",
+    )
+    parser.add_argument(
+        "--chapter-subtitles",
+        action="store_true",
+        help="Also write a subtitle file for each chapter",
+    )
+    parser.add_argument(
+        "--codec",
+        type=str,
+        default="aac",
+        help="Audio codec for the m4b (default aac)",
+    )
+    parser.add_argument(
+        "--bitrate",
+        type=str,
+        help="Audio bitrate for the m4b (ex 64k, default is the encoder's own)",
+    )
+    parser.add_argument(
+        "--formats",
+        type=str,
+        default="m4b",
+        help="Comma-separated outputs to write from one decode of the audio: m4b, mp3 (one file per chapter), opus (default m4b)",
+    )
+    parser.add_argument(
+        "--fanout",
+        type=int,
+        default=0,
+        help="How many of --formats to encode at once, 0 for all of them (default 0)",
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=0,
+        help="Encoder threads, 0 lets ffmpeg decide (default 0)",
+    )
+    parser.add_argument(
+        "--profile",
+        type=str,
+        metavar="TRACE",
+        help="Record a per-stage timing trace to this file (Chrome trace JSON) and print a summary",
+    )
 
     args = parser.parse_args()
-    print(args)
-
-    ensure_punkt()
-
-    # If we get an epub, export that to txt file, then exit
-    if args.sourcefile.endswith(".epub"):
-        book = epub.read_epub(args.sourcefile)
-        export_chapters(book, args.sourcefile)
-        exit()
-
-    book_contents, book_title, book_author, chapter_titles = get_book(args.sourcefile)
+    if args.list_voices is not None:
+        print(voices.format_voices(voices.find_voices(args.list_voices)))
+        return
+    if args.sourcefile is None:
+        parser.error("the following arguments are required: sourcefile")
+    if args.backend.partition(":")[0] == "edge" and not voices.is_known(args.speaker):
+        # The index can lag behind Edge, so an unknown voice is only a warning
+        suggestions = voices.suggest(args.speaker)
+        hint = f", did you mean {' or '.join(suggestions)}?" if suggestions else ""
+        print(
+            f"Warning: unknown speaker {args.speaker}{hint} (see --list-voices)",
+            file=sys.stderr,
+        )
+    if not args.estimate:
+        print(args)
+
+    subtitle_formats = [f for f in args.subtitles.split(",") if f]
+    for subtitle_format in subtitle_formats:
+        if subtitle_format not in SUBTITLE_FORMATS:
+            parser.error(f"unknown subtitle format {subtitle_format}")
+    args.formats = [f for f in args.formats.split(",") if f]
+    for output_format in args.formats:
+        if output_format not in OUTPUT_FORMATS:
+            parser.error(f"unknown output format {output_format}")
+    if args.formats != ["m4b"] and (
+        args.workers > 1 or args.incremental or args.progressive
+    ):
+        parser.error("--workers, --incremental and --progressive only write an m4b")
+    if args.progressive and (args.workers > 1 or args.incremental or args.batch):
+        parser.error("--progressive reads one book in one process")
+    if args.batch and (args.workers > 1 or args.incremental or args.cover):
+        parser.error(
+            "--batch reads every book in one process with its own cover; "
+            "--workers, --incremental and --cover are for a single book"
+        )
+
+    if args.profile:
+        profiling.enable(args.profile)
+    try:
+        run(args, subtitle_formats)
+    finally:
+        if args.profile:
+            print(profiling.summary(profiling.write()))
+
+
+def run(args, subtitle_formats):
+    if args.segmenter == "punkt":
+        ensure_punkt()
+
+    cache = TTSCache(args.cache_dir, args.cache_size * 1024**2)
+    if args.estimate:
+        from .estimate import run_estimate
+
+        run_estimate(args, cache)
+        return
+    if args.batch:
+        from .batch import run_batch
+
+        run_batch(args, subtitle_formats, cache)
+        return
+    # Without --direct, export the epub to txt files for editing, then exit
+    if args.sourcefile.endswith(".epub") and not args.direct:
+        export_chapters(args.sourcefile)
+        return
+    book_contents, book_title, book_author, chapter_titles, cover = load_book(
+        args.sourcefile, args.segmenter, cache.directory, args.cover
+    )
+    if args.incremental:
+        from .incremental import build_incremental as build_book
+    elif args.workers > 1:
+        from .parallel import build_book
+    if args.incremental or args.workers > 1:
+        build_book(
+            sourcefile=args.sourcefile,
+            book_contents=book_contents,
+            speaker=args.speaker,
+            title=book_title,
+            author=book_author,
+            chapter_titles=chapter_titles,
+            cover=cover,
+            subtitle_formats=subtitle_formats,
+            chapter_subtitles=args.chapter_subtitles,
+            workers=args.workers,
+            concurrency=args.concurrency,
+            max_concurrency=args.max_concurrency,
+            cache_dir=cache.directory,
+            cache_size=cache.max_bytes,
+            backend=args.backend,
+            batch_chars=args.batch_chars,
+            postprocess=postprocess_options(args),
+            codec=args.codec,
+            bitrate=args.bitrate,
+        )
+        return
+    # The single-process paths record how they went, for --estimate
+    from .estimate import RunMetrics
+
+    stats = {}
+    if args.progressive:
+        from .progressive import HLSPublisher
+
+        metrics = RunMetrics(args, cache, "progressive")
+        publisher = HLSPublisher(
+            args.sourcefile, book_title, book_author, chapter_titles
+        )
+        try:
+            files = read_book(
+                sourcefile=args.sourcefile,
+                book_contents=book_contents,
+                speaker=args.speaker,
+                concurrency=args.concurrency,
+                max_concurrency=args.max_concurrency,
+                cache=cache,
+                backend=get_backend(args.backend),
+                subtitle_formats=(),
+                batch_chars=args.batch_chars,
+                postprocess=postprocess_options(args),
+                codec=args.codec,
+                bitrate=args.bitrate,
+                on_chapter=publisher.publish,
+                stats=stats,
+            )
+        finally:
+            publisher.close()
+        metrics.synthesized(stats, files)
+        publisher.finish(
+            files, args.speaker, cover, subtitle_formats, args.chapter_subtitles
+        )
+        remove_run_state(get_basefile(args.sourcefile))
+        metrics.finished(args.sourcefile)
+        return
+    metrics = RunMetrics(args, cache)
     files = read_book(
-        sourcefile=args.sourcefile, book_contents=book_contents, speaker=args.speaker
+        sourcefile=args.sourcefile,
+        book_contents=book_contents,
+        speaker=args.speaker,
+        concurrency=args.concurrency,
+        max_concurrency=args.max_concurrency,
+        cache=cache,
+        backend=get_backend(args.backend),
+        subtitle_formats=subtitle_formats,
+        chapter_subtitles=args.chapter_subtitles,
+        batch_chars=args.batch_chars,
+        postprocess=postprocess_options(args),
+        stats=stats,
     )
+    metrics.synthesized(stats, files)
     ffmetadatafile = generate_metadata(
         sourcefile=args.sourcefile,
         files=files,
@@ -510,13 +1227,17 @@ def main():
         title=book_title,
         chapter_titles=chapter_titles,
     )
-    m4bfilename = make_m4b(
-        files=files,
-        sourcefile=args.sourcefile,
-        speaker=args.speaker,
-        ffmetadatafile=ffmetadatafile,
+    write_outputs(
+        args,
+        args.sourcefile,
+        files,
+        ffmetadatafile,
+        book_title,
+        book_author,
+        chapter_titles,
+        cover,
     )
-    add_cover(args.cover, m4bfilename)
+    metrics.finished(args.sourcefile)
 
 
 if __name__ == "__main__":
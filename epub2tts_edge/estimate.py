@@ -0,0 +1,318 @@
+"""Predict what reading a book will take, from the runs before it.
+
+Every single-process run appends what it did and how long it took to
+`runs.jsonl` in the cache directory: characters, sentences and TTS requests
+(and how many of them missed the cache), audio produced, wall time of
+synthesis and of the final encode, and the bytes of chapter parts, outputs
+and new cache entries. `estimate_book` parses a book without synthesizing
+anything, counts the same things under the given voice, batching and
+concurrency, and turns them into audio hours, wall minutes and disk with a
+model fitted to the recorded runs of the same backend:
+
+- audio seconds per character, from runs with the same voice if any
+- synthesis seconds = a * (uncached requests / concurrency) + b * audio seconds
+- encode seconds, and bytes of parts, outputs and cache, per audio second
+
+Until there are runs to learn from, DEFAULTS (roughly Edge TTS) are used.
+"""
+
+import json
+import os
+import time
+
+from .audio import SAMPLE_RATE
+
+RUNS_FILE = "runs.jsonl"
+# Only the most recent runs are fitted, so the model follows the service
+RECENT_RUNS = 200
+DEFAULTS = {
+    "seconds_per_char": 0.065,
+    "request_seconds": 1.5,
+    "assembly_seconds": 0.002,
+    "encode_seconds": 0.02,
+    "part_bytes": 48000 * 0.6,
+    "output_bytes": 8000,
+    "cache_bytes": 6000,
+}
+
+
+def runs_path(cache_dir):
+    return os.path.join(cache_dir, RUNS_FILE)
+
+
+def read_runs(cache_dir):
+    runs = []
+    try:
+        with open(runs_path(cache_dir), "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    runs.append(json.loads(line))
+                except ValueError:
+                    continue
+    except FileNotFoundError:
+        pass
+    return runs[-RECENT_RUNS:]
+
+
+def record_run(cache_dir, run):
+    with open(runs_path(cache_dir), "a", encoding="utf-8") as f:
+        f.write(json.dumps(run, separators=(",", ":")) + "\n")
+
+
+def _output_bytes(basefile, formats):
+    total = 0
+    for output in formats:
+        path = f"{basefile}-mp3" if output == "mp3" else f"{basefile}.{output}"
+        if os.path.isdir(path):
+            total += sum(
+                os.path.getsize(os.path.join(path, name)) for name in os.listdir(path)
+            )
+        elif os.path.isfile(path):
+            total += os.path.getsize(path)
+    return total
+
+
+class RunMetrics:
+    """Measure one run of run(): call synthesized() then finished()."""
+
+    def __init__(self, args, cache, mode="single"):
+        self.args = args
+        self.mode = mode
+        self.cache = cache
+        self.started = time.monotonic()
+        self.misses = cache.misses
+        self.cache_bytes = cache.size
+        self.run = None
+
+    def synthesized(self, stats, files):
+        self.run = {
+            "time": round(time.time()),
+            "backend": self.args.backend.partition(":")[0],
+            "speaker": self.args.speaker,
+            "codec": self.args.codec,
+            "formats": self.args.formats,
+            "mode": self.mode,
+            "batch_chars": self.args.batch_chars,
+            "concurrency": self.args.concurrency,
+            **stats,
+            "misses": self.cache.misses - self.misses,
+            "synthesis_seconds": round(time.monotonic() - self.started, 3),
+            "part_bytes": sum(os.path.getsize(f) for f in files if os.path.isfile(f)),
+            "cache_bytes": max(0, self.cache.size - self.cache_bytes),
+        }
+        self.encoding = time.monotonic()
+
+    def finished(self, sourcefile):
+        from .epub2tts_edge import get_basefile
+
+        if self.run is None or not self.run["samples"]:
+            return
+        self.run["encode_seconds"] = round(time.monotonic() - self.encoding, 3)
+        self.run["output_bytes"] = _output_bytes(
+            get_basefile(sourcefile), self.args.formats
+        )
+        record_run(self.cache.directory, self.run)
+
+
+def _ratio(runs, numerator, denominator, default):
+    total = sum(denominator(run) for run in runs)
+    if not total:
+        return default
+    return sum(numerator(run) for run in runs) / total
+
+
+def _audio_seconds(run):
+    return run["samples"] / SAMPLE_RATE
+
+
+def fit(runs, backend, speaker, codec, formats, mode="single"):
+    """The model for a run with these settings, and how many runs it is from."""
+    runs = [run for run in runs if run.get("backend") == backend]
+    voice = [run for run in runs if run.get("speaker") == speaker] or runs
+    model = {
+        "runs": len(runs),
+        "seconds_per_char": _ratio(
+            voice,
+            _audio_seconds,
+            lambda run: run["chars"],
+            DEFAULTS["seconds_per_char"],
+        ),
+    }
+
+    # Least squares for synthesis = a * x + b * y, with x the uncached
+    # requests per unit of concurrency and y the audio produced
+    xs = [run["misses"] / run["concurrency"] for run in runs]
+    ys = [_audio_seconds(run) for run in runs]
+    ts = [run["synthesis_seconds"] for run in runs]
+    sxx = sum(x * x for x in xs)
+    syy = sum(y * y for y in ys)
+    sxy = sum(x * y for x, y in zip(xs, ys))
+    sxt = sum(x * t for x, t in zip(xs, ts))
+    syt = sum(y * t for y, t in zip(ys, ts))
+    determinant = sxx * syy - sxy * sxy
+    a = b = -1
+    if determinant > 1e-9 * max(sxx * syy, 1):
+        a = (sxt * syy - syt * sxy) / determinant
+        b = (syt * sxx - sxt * sxy) / determinant
+    if a < 0 or b < 0:
+        # Too few or too similar runs to tell the two apart: keep the
+        # default for assembly and put the rest on the requests
+        b = DEFAULTS["assembly_seconds"]
+        a = DEFAULTS["request_seconds"]
+        if sxx:
+            a = max(0, sum(t - b * y for t, y in zip(ts, ys))) / sum(xs)
+    model["request_seconds"] = a
+    model["assembly_seconds"] = b
+
+    encoded = [
+        run
+        for run in runs
+        if (run["codec"], run["formats"], run["mode"]) == (codec, formats, mode)
+    ]
+    model["encode_seconds"] = _ratio(
+        encoded,
+        lambda run: run["encode_seconds"],
+        _audio_seconds,
+        DEFAULTS["encode_seconds"],
+    )
+    model["part_bytes"] = _ratio(
+        runs, lambda run: run["part_bytes"], _audio_seconds, DEFAULTS["part_bytes"]
+    )
+    model["output_bytes"] = _ratio(
+        encoded,
+        lambda run: run["output_bytes"],
+        _audio_seconds,
+        DEFAULTS["output_bytes"],
+    )
+    # New cache entries only come from the requests that missed
+    model["cache_bytes"] = _ratio(
+        runs,
+        lambda run: run["cache_bytes"],
+        lambda run: _audio_seconds(run) * run["misses"] / run["requests"],
+        DEFAULTS["cache_bytes"],
+    )
+    return model
+
+
+def count_book(book_contents, speaker, backend, cache, batch_chars=0):
+    """Count what read_book would send for `book_contents`."""
+    from .epub2tts_edge import _batch_jobs
+
+    counts = {
+        "chapters": 0,
+        "paragraphs": 0,
+        "sentences": 0,
+        "chars": 0,
+        "requests": 0,
+        "cached": 0,
+    }
+
+    def jobs():
+        for chapter in book_contents:
+            counts["chapters"] += 1
+            yield {"kind": "chapter", "text": None}
+            yield {
+                "kind": "title",
+                "text": chapter["title"] or "blank",
+                "speaker": speaker,
+            }
+            for sentences in chapter["paragraphs"]:
+                counts["paragraphs"] += 1
+                for sentence in sentences:
+                    yield {"kind": "sentence", "text": sentence, "speaker": speaker}
+
+    batched = _batch_jobs(jobs(), batch_chars) if batch_chars else jobs()
+    for job in batched:
+        if job["text"] is None:
+            continue
+        counts["requests"] += 1
+        counts["chars"] += len(job["text"])
+        counts["sentences"] += len(job.get("parts", [job]))
+        counts["cached"] += cache.contains(cache.key(job["text"], speaker, backend))
+    return counts
+
+
+def predict(counts, model, concurrency):
+    misses = counts["requests"] - counts["cached"]
+    audio = counts["chars"] * model["seconds_per_char"]
+    synthesis = (
+        model["request_seconds"] * misses / concurrency
+        + model["assembly_seconds"] * audio
+    )
+    encode = model["encode_seconds"] * audio
+    return {
+        "audio_hours": round(audio / 3600, 2),
+        "synthesis_minutes": round(synthesis / 60, 1),
+        "encode_minutes": round(encode / 60, 1),
+        "wall_minutes": round((synthesis + encode) / 60, 1),
+        # the parts and the outputs both exist while the outputs are written
+        "temp_disk_gb": round(
+            audio * (model["part_bytes"] + model["output_bytes"]) / 1024**3, 3
+        ),
+        "cache_growth_gb": round(
+            audio * model["cache_bytes"] * misses / max(counts["requests"], 1)
+            / 1024**3,
+            3,
+        ),
+        "calibrated_from_runs": model["runs"],
+    }
+
+
+def estimate_book(sourcefile, args, cache, runs):
+    from .backends import get_backend
+    from .epub2tts_edge import load_book
+
+    backend = get_backend(args.backend)
+    # a cover other than None keeps load_book from extracting the epub's
+    book_contents, title, _, _, _ = load_book(
+        sourcefile, args.segmenter, cache.directory, cover=args.cover or ""
+    )
+    counts = count_book(
+        book_contents, args.speaker, backend.name, cache, args.batch_chars
+    )
+    mode = "progressive" if args.progressive else "single"
+    model = fit(runs, backend.name, args.speaker, args.codec, args.formats, mode)
+    return {
+        "book": sourcefile,
+        "title": title,
+        **counts,
+        **predict(counts, model, args.concurrency),
+    }
+
+
+def run_estimate(args, cache):
+    """Print an estimate per book (and a total for a library), as text or JSON."""
+    if args.batch:
+        from .batch import find_books
+
+        books = find_books(args.sourcefile)
+    else:
+        books = [args.sourcefile]
+    runs = read_runs(cache.directory)
+    estimates = [estimate_book(book, args, cache, runs) for book in books]
+    if args.estimate == "json":
+        for estimate in estimates:
+            print(json.dumps(estimate))
+        return estimates
+    for estimate in estimates:
+        print(
+            f"{estimate['book']}: {estimate['chapters']} chapters, "
+            f"{estimate['sentences']} sentences, {estimate['chars']} characters, "
+            f"{estimate['requests']} TTS requests ({estimate['cached']} cached)\n"
+            f"  {estimate['audio_hours']} h of audio in about "
+            f"{estimate['wall_minutes']} min ({estimate['synthesis_minutes']} "
+            f"synthesis, {estimate['encode_minutes']} encoding), "
+            f"{estimate['temp_disk_gb']} GB temp disk, "
+            f"{estimate['cache_growth_gb']} GB more cache"
+        )
+    if len(estimates) > 1:
+        print(
+            f"Total: {sum(e['audio_hours'] for e in estimates):.2f} h of audio, "
+            f"{sum(e['wall_minutes'] for e in estimates):.1f} min one book at a time"
+        )
+    runs_used = estimates[0]["calibrated_from_runs"] if estimates else 0
+    if runs_used:
+        print(f"Calibrated from {runs_used} past runs in {runs_path(cache.directory)}")
+    else:
+        print("No past runs with this backend yet, using default rates")
+    return estimates
@@ -0,0 +1,164 @@
+"""Extract chapter text from an EPUB with lxml, reading the zip directly.
+
+Only the package document and the spine documents that are actually read
+are pulled out of the archive, and spine documents can be parsed across a
+process pool. The text matches what the earlier ebooklib + BeautifulSoup
+path produced: the first <h1> is the chapter title, links whose text has no
+letters (footnote markers) are dropped, and every <p> is one paragraph.
+"""
+
+import concurrent.futures
+import os
+import posixpath
+import threading
+import zipfile
+from urllib.parse import unquote
+
+from lxml import etree, html
+
+NAMESPACES = {
+    "calibre": "http://calibre.kovidgoyal.net/2009/metadata",
+    "dc": "http://purl.org/dc/elements/1.1/",
+    "dcterms": "http://purl.org/dc/terms/",
+    "opf": "http://www.idpf.org/2007/opf",
+    "u": "urn:oasis:names:tc:opendocument:xmlns:container",
+    "xsi": "http://www.w3.org/2001/XMLSchema-instance",
+}
+
+_rootfile = etree.XPath(
+    "/u:container/u:rootfiles/u:rootfile/@full-path", namespaces=NAMESPACES
+)
+_metadata = etree.XPath("//opf:metadata/dc:*", namespaces=NAMESPACES)
+_cover_meta = etree.XPath(
+    "//opf:metadata/opf:meta[@name='cover']/@content", namespaces=NAMESPACES
+)
+_manifest = etree.XPath("//opf:manifest/opf:item", namespaces=NAMESPACES)
+_spine = etree.XPath("//opf:spine/opf:itemref", namespaces=NAMESPACES)
+_text = etree.XPath("descendant-or-self::text()[not(ancestor::script or ancestor::style)]")
+_parser = html.HTMLParser(encoding="utf-8")
+
+# One open archive per thread, so pool workers do not reopen it per item
+# and --batch threads reading different books do not evict each other's.
+# Keyed by pid as well: a forked worker must not share the parent's file
+# offset.
+_archives = threading.local()
+
+
+def _archive(path):
+    key = (os.getpid(), path)
+    cached = getattr(_archives, "archive", None)
+    if cached is None or cached[0] != key:
+        cached = (key, zipfile.ZipFile(path))
+        _archives.archive = cached
+    return cached[1]
+
+
+def read_package(path):
+    """Return the title, author, cover and linear spine documents of an EPUB.
+
+    `cover` and the `spine` entries are names inside the zip.
+    """
+    z = _archive(path)
+    rootfile = str(_rootfile(etree.fromstring(z.read("META-INF/container.xml")))[0])
+    opf = etree.fromstring(z.read(rootfile))
+    base = posixpath.dirname(rootfile)
+
+    metadata = {}
+    for element in _metadata(opf):
+        name = etree.QName(element).localname
+        if element.text and element.text.strip():
+            metadata.setdefault(name, element.text.strip())
+
+    items = {}
+    documents = set()
+    for item in _manifest(opf):
+        name = posixpath.normpath(posixpath.join(base, unquote(item.get("href", ""))))
+        items[item.get("id")] = name
+        properties = item.get("properties", "").split()
+        if (
+            item.get("media-type") == "application/xhtml+xml"
+            and "nav" not in properties
+            and "cover" not in properties
+        ):
+            documents.add(item.get("id"))
+
+    cover = None
+    cover_id = _cover_meta(opf)
+    if cover_id:
+        cover = items.get(cover_id[0])
+
+    spine = [
+        items[itemref.get("idref")]
+        for itemref in _spine(opf)
+        if itemref.get("linear", "yes") == "yes" and itemref.get("idref") in documents
+    ]
+    return {
+        "title": metadata.get("title", "Unknown"),
+        "author": metadata.get("creator", "Unknown"),
+        "cover": cover,
+        "spine": spine,
+    }
+
+
+def _text_of(element):
+    return "".join(_text(element))
+
+
+def chapter_text(content):
+    """Return the title (or None) and the paragraphs of one XHTML document."""
+    try:
+        body = html.document_fromstring(content, parser=_parser).find("body")
+    except (etree.ParserError, ValueError):
+        return None, []
+    if body is None:
+        return None, []
+
+    title = None
+    for h1 in body.iter("h1"):
+        title = _text_of(h1).strip()
+        break
+
+    # Always skip reading links that are just a number (footnotes)
+    for a in [a for a in body.iter("a") if a.get("href") is not None]:
+        if not any(char.isalpha() for char in _text_of(a)):
+            a.drop_tree()
+
+    return title, [_text_of(p).strip() for p in body.iter("p")]
+
+
+def _extract(path, name):
+    archive = _archive(path)
+    try:
+        content = archive.read(name)
+    except KeyError:
+        return None, []
+    return chapter_text(content)
+
+
+def iter_chapters(path, workers=None, spine=None):
+    """Yield {"title", "paragraphs"} for each spine document, in order.
+
+    Documents are parsed in a process pool of `workers` processes (default:
+    one per CPU); with one worker, or a short book, they are parsed inline
+    as they are asked for.
+    """
+    if spine is None:
+        spine = read_package(path)["spine"]
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(spine) < 2 * workers:
+        results = (_extract(path, name) for name in spine)
+        executor = None
+    else:
+        executor = concurrent.futures.ProcessPoolExecutor(workers)
+        results = executor.map(
+            _extract,
+            [path] * len(spine),
+            spine,
+            chunksize=max(1, len(spine) // (workers * 4)),
+        )
+    try:
+        for title, paragraphs in results:
+            yield {"title": title, "paragraphs": paragraphs}
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
@@ -0,0 +1,288 @@
+"""Encode the finished book to several formats from one decode.
+
+The chapter files are decoded once, as one stream of PCM, and every block
+is handed to one feeder thread per output, each writing into its own ffmpeg
+encoder. The encoders are separate processes, so they run side by side and
+several formats cost about as much wall time as the slowest of them:
+
+- m4b: one AAC stream with chapter markers and the cover, as make_m4b makes
+- mp3: one file per chapter in `{basefile}-mp3/`, with ID3 tags and the cover
+- opus: one Ogg Opus file with chapter markers
+
+`parallel` caps how many encoders are fed from one decode; the formats past
+it wait for another pass over the chapter files.
+"""
+
+import os
+import queue
+import re
+import subprocess
+import threading
+
+from . import profiling
+from .audio import CHANNELS, SAMPLE_RATE, SAMPLE_WIDTH, ChapterEncoder
+
+FORMATS = ("m4b", "mp3", "opus")
+MP3_BITRATE = "64k"
+OPUS_BITRATE = "32k"
+# One second of audio per block, and up to this many blocks queued per output
+BLOCK = SAMPLE_RATE * SAMPLE_WIDTH * CHANNELS
+QUEUED_BLOCKS = 32
+
+
+class ChapterSplitter:
+    """Quacks like ChapterEncoder, but starts a new file at each chapter.
+
+    `open_chapter(index)` returns the encoder for chapter `index`; its
+    length in samples comes from `durations`. Audio past the end of the last
+    chapter goes into it.
+    """
+
+    def __init__(self, open_chapter, durations):
+        self.open_chapter = open_chapter
+        self.durations = durations
+        self.index = 0
+        self.encoder = None
+        self.remaining = durations[0] * SAMPLE_WIDTH * CHANNELS
+        self.files = []
+
+    def write(self, pcm):
+        while pcm:
+            if self.encoder is None:
+                self.encoder = self.open_chapter(self.index)
+            last = self.index == len(self.durations) - 1
+            take = len(pcm) if last else min(len(pcm), self.remaining)
+            self.encoder.write(pcm[:take])
+            pcm = pcm[take:]
+            self.remaining -= take
+            if not last and self.remaining == 0:
+                self.files.append(self.encoder.close())
+                self.encoder = None
+                self.index += 1
+                self.remaining = self.durations[self.index] * SAMPLE_WIDTH * CHANNELS
+
+    def close(self):
+        if self.encoder is not None:
+            self.files.append(self.encoder.close())
+            self.encoder = None
+        return self.files
+
+    def abort(self):
+        if self.encoder is not None:
+            self.encoder.abort()
+
+
+class _Feeder:
+    # Writes blocks into one output from its own thread, so a slow encoder
+    # only holds up the decode once its queue is full
+    def __init__(self, output):
+        self.output = output
+        self.blocks = queue.Queue(QUEUED_BLOCKS)
+        self.error = None
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while True:
+            block = self.blocks.get()
+            if block is None:
+                return
+            if self.error is None:
+                try:
+                    self.output.write(block)
+                except Exception as e:
+                    self.error = e
+
+    def put(self, block):
+        self.blocks.put(block)
+
+    def finish(self):
+        self.blocks.put(None)
+        self.thread.join()
+        if self.error is not None:
+            raise self.error
+
+
+def safe_filename(name):
+    return re.sub(r'[\\/:*?"<>|\x00-\x1f]', "_", name).strip(" .")[:80] or "chapter"
+
+
+def _m4b(basefile, ffmetadatafile, cover, codec, bitrate, threads):
+    args = ["-i", ffmetadatafile]
+    if cover:
+        args += ["-i", cover]
+    args += ["-map", "0:a", "-map_metadata", "1", "-map_chapters", "1"]
+    if cover:
+        args += ["-map", "2:v", "-codec:v", "copy", "-disposition:v:0", "attached_pic"]
+    args += ["-threads", str(threads), "-movflags", "+faststart"]
+    return ChapterEncoder(f"{basefile}.m4b", codec, "mp4", bitrate, args)
+
+
+def ogg_timestamp(samples):
+    ms = samples * 1000 // SAMPLE_RATE
+    seconds, ms = divmod(ms, 1000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}.{ms:03d}"
+
+
+def _opus(basefile, ffmetadatafile, chapter_titles, durations):
+    # Chapters are written as the CHAPTERxxx comments Ogg players read; the
+    # ogg muxer's own conversion rounds them to the wrong second
+    args = ["-i", ffmetadatafile, "-map", "0:a", "-map_metadata", "1"]
+    args += ["-map_chapters", "-1"]
+    start = 0
+    for index, (chapter_title, duration) in enumerate(zip(chapter_titles, durations)):
+        args += ["-metadata", f"CHAPTER{index:03d}={ogg_timestamp(start)}"]
+        args += ["-metadata", f"CHAPTER{index:03d}NAME={chapter_title}"]
+        start += duration
+    return ChapterEncoder(f"{basefile}.opus", "libopus", "ogg", OPUS_BITRATE, args)
+
+
+def _mp3(basefile, title, author, chapter_titles, durations, cover):
+    directory = f"{basefile}-mp3"
+    os.makedirs(directory, exist_ok=True)
+
+    def open_chapter(index):
+        chapter_title = chapter_titles[index] if index < len(chapter_titles) else ""
+        name = f"{index + 1:03d} {safe_filename(chapter_title)}.mp3"
+        args = ["-i", cover, "-map", "0:a", "-map", "1:v"] if cover else []
+        args += [
+            "-id3v2_version",
+            "3",
+            "-metadata",
+            f"title={chapter_title}",
+            "-metadata",
+            f"album={title}",
+            "-metadata",
+            f"artist={author}",
+            "-metadata",
+            f"track={index + 1}/{len(durations)}",
+            "-metadata",
+            "genre=Audiobook",
+        ]
+        if cover:
+            args += ["-codec:v", "copy", "-metadata:s:v", "comment=Cover (front)"]
+        return ChapterEncoder(
+            os.path.join(directory, name), "libmp3lame", "mp3", MP3_BITRATE, args
+        )
+
+    return ChapterSplitter(open_chapter, durations)
+
+
+def _decode(files, filelist):
+    with open(filelist, "w") as f:
+        for filename in files:
+            filename = os.path.abspath(filename).replace("'", "'\\''")
+            f.write(f"file '{filename}'\n")
+    return subprocess.Popen(
+        [
+            "ffmpeg",
+            "-v",
+            "error",
+            "-f",
+            "concat",
+            "-safe",
+            "0",
+            "-i",
+            filelist,
+            "-f",
+            "s16le",
+            "-ac",
+            str(CHANNELS),
+            "-ar",
+            str(SAMPLE_RATE),
+            "pipe:1",
+        ],
+        stdout=subprocess.PIPE,
+    )
+
+
+def _fan_out(files, filelist, outputs):
+    feeders = [_Feeder(output) for output in outputs]
+    decoder = _decode(files, filelist)
+    try:
+        for block in iter(lambda: decoder.stdout.read(BLOCK), b""):
+            for feeder in feeders:
+                feeder.put(block)
+        if decoder.wait() != 0:
+            raise Exception("ffmpeg could not decode the chapter files")
+        errors = []
+        for feeder in feeders:
+            try:
+                feeder.finish()
+            except Exception as e:
+                errors.append(e)
+        if errors:
+            raise errors[0]
+        return [output.close() for output in outputs]
+    except BaseException:
+        decoder.kill()
+        decoder.wait()
+        for feeder in feeders:
+            if feeder.thread.is_alive():
+                feeder.blocks.put(None)
+                feeder.thread.join()
+        for output in outputs:
+            output.abort()
+        raise
+
+
+@profiling.traced("make_outputs")
+def make_outputs(
+    files,
+    sourcefile,
+    ffmetadatafile,
+    title,
+    author,
+    chapter_titles,
+    durations,
+    formats=("m4b",),
+    cover=None,
+    codec="aac",
+    bitrate=None,
+    threads=0,
+    parallel=0,
+):
+    """Write every format in `formats` from the chapter files, then remove them.
+
+    `durations` are the chapter lengths in samples, for the mp3 split.
+    Returns the paths written, per format.
+    """
+    from .epub2tts_edge import get_basefile
+
+    basefile = get_basefile(sourcefile)
+    # Next to the outputs, like make_m4b's, so same-named books don't collide
+    filelist = f"{basefile}.fanout.ffconcat"
+    if cover and not os.path.isfile(cover):
+        print(f"Cover image {cover} not found")
+        cover = None
+    makers = {
+        "m4b": lambda: _m4b(basefile, ffmetadatafile, cover, codec, bitrate, threads),
+        "mp3": lambda: _mp3(basefile, title, author, chapter_titles, durations, cover),
+        "opus": lambda: _opus(basefile, ffmetadatafile, chapter_titles, durations),
+    }
+    formats = list(formats)
+    parallel = parallel or len(formats)
+    written = {}
+    try:
+        for start in range(0, len(formats), parallel):
+            group = formats[start : start + parallel]
+            print(f"Encoding {', '.join(group)}")
+            outputs = []
+            try:
+                for name in group:
+                    outputs.append(makers[name]())
+            except BaseException:
+                for output in outputs:
+                    output.abort()
+                raise
+            with profiling.span("fan_out"):
+                written.update(zip(group, _fan_out(files, filelist, outputs)))
+    finally:
+        if os.path.exists(filelist):
+            os.remove(filelist)
+    os.remove(ffmetadatafile)
+    for f in files:
+        os.remove(f)
+    return written
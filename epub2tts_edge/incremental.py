@@ -0,0 +1,169 @@
+"""Rebuild an audiobook after a text edit, redoing only what changed.
+
+Chapters are rendered as one-chapter books (see parallel.py) into
+`{basefile}.build/`, named by a fingerprint of their text and of every
+setting that changes their audio, and kept there after the m4b is written.
+On the next run every chapter whose fingerprint already has a part is
+reused as it is; the others are rendered again, where the sentences that
+did not change come from the TTS cache and only the edited ones go to the
+service. The m4b is then stream-copied together from the parts again, so a
+one-word fix costs one chapter encode and a copy of the book.
+"""
+
+import difflib
+import hashlib
+import json
+import os
+
+from . import profiling
+from .parallel import merge_book, synthesize_chapters
+
+FORMAT_VERSION = 1
+
+
+def build_dir(basefile):
+    return f"{basefile}.build"
+
+
+def _digest(value):
+    payload = json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def sentence_fingerprints(chapter):
+    """One short hash per spoken sentence, the title first."""
+    sentences = [chapter["title"]]
+    for paragraph in chapter["paragraphs"]:
+        sentences.extend(paragraph)
+    return [_digest(sentence)[:16] for sentence in sentences]
+
+
+def chapter_fingerprint(chapter, settings):
+    return _digest([FORMAT_VERSION, settings, chapter["title"], chapter["paragraphs"]])
+
+
+def read_index(directory):
+    """The chapters of the last completed build, in book order."""
+    try:
+        with open(os.path.join(directory, "index.json"), "r", encoding="utf-8") as f:
+            return json.load(f)["chapters"]
+    except (OSError, ValueError, KeyError):
+        return []
+
+
+def write_index(directory, chapters):
+    path = os.path.join(directory, "index.json")
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        json.dump({"version": FORMAT_VERSION, "chapters": chapters}, f)
+    os.replace(f"{path}.tmp", path)
+
+
+def changed_sentences(old, new):
+    """How many of the sentences in `new` are not in `old`, in order."""
+    matcher = difflib.SequenceMatcher(None, old, new, autojunk=False)
+    return len(new) - sum(block.size for block in matcher.get_matching_blocks())
+
+
+def prune(directory, keep):
+    """Remove the files of chapter builds no longer in the book."""
+    for name in os.listdir(directory):
+        if name != "index.json" and name.split("-", 1)[0].split(".", 1)[0] not in keep:
+            os.remove(os.path.join(directory, name))
+
+
+@profiling.traced("build_incremental")
+def build_incremental(
+    sourcefile,
+    book_contents,
+    speaker,
+    title,
+    author,
+    chapter_titles,
+    cover=None,
+    subtitle_formats=("vtt",),
+    chapter_subtitles=False,
+    **options,
+):
+    """Build `{basefile}.m4b`, reusing the chapters of the previous build.
+
+    `options` go to synthesize_chapters; the codec must be one the mp4
+    container takes, since the parts are copied into the m4b as they are.
+    """
+    from .audio import packet_duration, part_format
+    from .epub2tts_edge import get_basefile
+
+    basefile = get_basefile(sourcefile)
+    directory = build_dir(basefile)
+    os.makedirs(directory, exist_ok=True)
+    _, extension = part_format(options.get("codec", "aac"))
+    settings = [
+        speaker,
+        options.get("backend", "edge"),
+        options.get("batch_chars", 0),
+        options.get("postprocess"),
+        options.get("codec", "aac"),
+        options.get("bitrate"),
+    ]
+    previous = read_index(directory)
+    known = {chapter["fingerprint"]: chapter for chapter in previous}
+
+    chapters = []
+    stale = []
+    for number, content in enumerate(book_contents, start=1):
+        content = dict(content, paragraphs=list(content["paragraphs"]))
+        if content["title"] == "":
+            content["title"] = "blank"
+        fingerprint = chapter_fingerprint(content, settings)
+        part = os.path.join(directory, fingerprint[:16])
+        chapter = {
+            "fingerprint": fingerprint,
+            "part": part,
+            "file": f"{part}-part1.{extension}",
+            "sentences": sentence_fingerprints(content),
+        }
+        if fingerprint in known and os.path.isfile(chapter["file"]):
+            chapter["duration"] = known[fingerprint]["duration"]
+        else:
+            old = previous[number - 1]["sentences"] if number <= len(previous) else []
+            changed = changed_sentences(old, chapter["sentences"])
+            print(
+                f"Chapter {number}: {changed} of {len(chapter['sentences'])} "
+                "sentences changed"
+            )
+            stale.append((chapter, content))
+        chapters.append(chapter)
+    print(f"Rebuilding {len(stale)} of {len(chapters)} chapters")
+
+    if stale:
+        synthesize_chapters(
+            sourcefile,
+            [content for _, content in stale],
+            speaker,
+            parts=[chapter["part"] for chapter, _ in stale],
+            **options,
+        )
+        for chapter, _ in stale:
+            chapter["duration"] = packet_duration(chapter["file"])
+    outputm4b = merge_book(
+        sourcefile,
+        [chapter["file"] for chapter in chapters],
+        [chapter["part"] for chapter in chapters],
+        speaker,
+        title,
+        author,
+        chapter_titles,
+        cover=cover,
+        subtitle_formats=subtitle_formats,
+        chapter_subtitles=chapter_subtitles,
+        durations=[chapter["duration"] for chapter in chapters],
+        keep=True,
+    )
+    write_index(
+        directory,
+        [
+            {key: chapter[key] for key in ("fingerprint", "sentences", "duration")}
+            for chapter in chapters
+        ],
+    )
+    prune(directory, {chapter["fingerprint"][:16] for chapter in chapters})
+    return outputm4b
@@ -0,0 +1,149 @@
+import hashlib
+import json
+import os
+import sqlite3
+
+
+def journal_path(basefile):
+    return f"{basefile}.journal.db"
+
+
+def source_fingerprint(sourcefile):
+    """The absolute path and a hash of the contents of the book being read."""
+    digest = hashlib.sha256()
+    if os.path.isfile(sourcefile):
+        with open(sourcefile, "rb") as f:
+            for block in iter(lambda: f.read(1024**2), b""):
+                digest.update(block)
+    return os.path.abspath(sourcefile), digest.hexdigest()
+
+
+class Journal:
+    """Durable per-sentence record of a run, kept in SQLite next to the book.
+
+    Every sentence is recorded as done (with its cache key, length and
+    boundary data) or failed (with the error) as soon as it is assembled, and
+    every chapter once its file is complete. A run that is killed or that
+    gives up on some sentences can then be resumed: finished chapters are
+    kept, finished sentences come back from the TTS cache, and only the
+    failed units are sent to the service again.
+
+    With `source` (see source_fingerprint) a journal written for another
+    source file, or for other contents of it, is started over: book.txt and
+    book.epub read with --direct share a basefile but not their chapters.
+    """
+
+    def __init__(self, basefile, source=None):
+        self.path = journal_path(basefile)
+        self.db = sqlite3.connect(self.path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS sentences (
+                chapter INTEGER,
+                paragraph INTEGER,
+                sentence INTEGER,
+                status TEXT,
+                key TEXT,
+                samples INTEGER,
+                subs TEXT,
+                error TEXT,
+                PRIMARY KEY (chapter, paragraph, sentence)
+            );
+            CREATE TABLE IF NOT EXISTS chapters (
+                chapter INTEGER PRIMARY KEY,
+                status TEXT,
+                file TEXT,
+                samples INTEGER,
+                size INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS source (
+                path TEXT,
+                fingerprint TEXT
+            );
+            """
+        )
+        self._uncommitted = 0
+        if source is not None:
+            self._check_source(*source)
+
+    def _check_source(self, path, fingerprint):
+        row = self.db.execute("SELECT path, fingerprint FROM source").fetchone()
+        if row == (path, fingerprint):
+            return
+        if row is not None:
+            print(f"{self.path} is from another source or edit, starting over")
+        self.db.execute("DELETE FROM sentences")
+        self.db.execute("DELETE FROM chapters")
+        self.db.execute("DELETE FROM source")
+        self.db.execute("INSERT INTO source VALUES (?, ?)", (path, fingerprint))
+        self.commit()
+
+    def _write(self, sql, params):
+        self.db.execute(sql, params)
+        self._uncommitted += 1
+        if self._uncommitted >= 100:
+            self.commit()
+
+    def commit(self):
+        self.db.commit()
+        self._uncommitted = 0
+
+    def sentence_done(self, chapter, paragraph, sentence, key, samples, subs):
+        self._write(
+            "INSERT OR REPLACE INTO sentences VALUES (?, ?, ?, 'done', ?, ?, ?, NULL)",
+            (chapter, paragraph, sentence, key, samples, json.dumps(subs)),
+        )
+
+    def sentence_failed(self, chapter, paragraph, sentence, key, error):
+        self._write(
+            "INSERT OR REPLACE INTO sentences VALUES (?, ?, ?, 'failed', ?, NULL, NULL, ?)",
+            (chapter, paragraph, sentence, key, str(error)),
+        )
+
+    def chapter_started(self, chapter, file):
+        self._write(
+            "INSERT OR REPLACE INTO chapters VALUES (?, 'started', ?, NULL, NULL)",
+            (chapter, file),
+        )
+        self._write("DELETE FROM sentences WHERE chapter = ?", (chapter,))
+        self.commit()
+
+    def chapter_done(self, chapter, file, samples):
+        self._write(
+            "INSERT OR REPLACE INTO chapters VALUES (?, 'done', ?, ?, ?)",
+            (chapter, file, samples, os.path.getsize(file)),
+        )
+        self.commit()
+
+    def chapter_failed(self, chapter, file):
+        self._write(
+            "INSERT OR REPLACE INTO chapters VALUES (?, 'failed', ?, NULL, NULL)",
+            (chapter, file),
+        )
+        self.commit()
+
+    def chapter_is_done(self, chapter, file):
+        """True if the chapter finished and its file is still the one we wrote."""
+        row = self.db.execute(
+            "SELECT file, size FROM chapters WHERE chapter = ? AND status = 'done'",
+            (chapter,),
+        ).fetchone()
+        if row is None or row[0] != file or not os.path.isfile(file):
+            return False
+        return os.path.getsize(file) == row[1]
+
+    def failures(self, chapters=None):
+        """Failed sentences, only of the chapter numbers in `chapters` if given."""
+        rows = self.db.execute(
+            "SELECT chapter, paragraph, sentence, error FROM sentences "
+            "WHERE status = 'failed' ORDER BY chapter, paragraph, sentence"
+        ).fetchall()
+        if chapters is None:
+            return rows
+        return [row for row in rows if row[0] in chapters]
+
+    def close(self):
+        self.commit()
+        self.db.close()
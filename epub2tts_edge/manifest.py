@@ -0,0 +1,126 @@
+import json
+import os
+
+from .audio import SAMPLE_RATE
+
+
+def manifest_path(basefile):
+    return f"{basefile}.manifest.jsonl"
+
+
+class ManifestWriter:
+    """Append-only record of exact sample counts produced during synthesis.
+
+    Each sentence gets a line with its start sample within the chapter, its
+    length, the silence written after it and its boundary data. A chapter line
+    is written once the chapter file is complete; sentence lines that are not
+    followed by their chapter line (an interrupted run) are ignored on read,
+    and a chapter rebuilt by a later run replaces the earlier one.
+    """
+
+    def __init__(self, basefile):
+        self.path = manifest_path(basefile)
+        self.file = open(self.path, "a+", encoding="utf-8")
+        if self.file.tell() > 0:
+            self.file.seek(self.file.tell() - 1)
+            if self.file.read(1) != "\n":
+                # finish a line torn by an interrupted run
+                self.file.write("\n")
+
+    def _write(self, record):
+        self.file.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    def sentence(self, chapter, paragraph, sentence, start, samples, silence, subs):
+        self._write(
+            {
+                "type": "sentence",
+                "chapter": chapter,
+                "paragraph": paragraph,
+                "sentence": sentence,
+                "start": start,
+                "samples": samples,
+                "silence": silence,
+                "subs": subs,
+            }
+        )
+
+    def chapter(self, chapter, title, file, samples):
+        self._write(
+            {
+                "type": "chapter",
+                "chapter": chapter,
+                "title": title,
+                "file": file,
+                "samples": samples,
+                "sample_rate": SAMPLE_RATE,
+            }
+        )
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def read_manifest(basefile, sentences=True):
+    """Return the completed chapters of a manifest, ordered by chapter number."""
+    path = manifest_path(basefile)
+    chapters = {}
+    pending = {}
+    if not os.path.isfile(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # a torn final line from an interrupted run
+                continue
+            if record["type"] == "sentence":
+                if record["paragraph"] == 0:
+                    # the chapter title starts every (re)build of a chapter
+                    pending[record["chapter"]] = []
+                if sentences:
+                    pending[record["chapter"]].append(record)
+            elif record["type"] == "chapter":
+                record["sentences"] = pending.pop(record["chapter"], [])
+                if not sentences:
+                    del record["sentences"]
+                chapters[record["chapter"]] = record
+    return [chapters[i] for i in sorted(chapters)]
+
+
+def chapter_sentences(basefile, chapter):
+    """Yield the sentence records of a completed chapter, in order.
+
+    Reads the manifest twice instead of holding the chapter: once to find
+    where the chapter's last build starts, then from there.
+    """
+    path = manifest_path(basefile)
+    start = building = None
+    offset = 0
+    with open(path, "rb") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = {"chapter": None}
+            if record["chapter"] == chapter:
+                if record["type"] == "chapter":
+                    start = building
+                elif record["paragraph"] == 0:
+                    building = offset
+            offset += len(line)
+    if start is None:
+        return
+    with open(path, "rb") as f:
+        f.seek(start)
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record["chapter"] != chapter:
+                continue
+            if record["type"] == "chapter":
+                return
+            yield record
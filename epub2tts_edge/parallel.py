@@ -0,0 +1,287 @@
+"""Synthesize chapters in parallel worker processes, then merge one audiobook.
+
+Every worker reads and encodes whole chapters on its own, as one-chapter
+books with their own journal and manifest, so an interrupted run resumes per
+chapter. The chapter parts are encoded with the final codec, and the merge
+only stream-copies them into the m4b. Chapter markers and subtitles are
+placed from the packet durations of the parts. Workers report progress and
+failures to the coordinator over a queue.
+"""
+
+import concurrent.futures
+import multiprocessing
+import os
+import queue
+
+from . import profiling
+from .audio import packet_duration
+from .cache import TTSCache
+from .controller import shared_state, use_shared_state
+from .journal import journal_path
+from .manifest import manifest_path, read_manifest
+from .subtitles import SubtitleWriter
+
+_events = None
+
+
+def _init_worker(state, events, profile):
+    global _events
+    use_shared_state(state)
+    _events = events
+    if profile:
+        profiling.enable(profile)
+
+
+class _QueueProgress:
+    """Stands in for tqdm in read_book and forwards updates to the coordinator."""
+
+    def __init__(self, chapter, total=None, **kwargs):
+        self.chapter = chapter
+
+    def update(self, n=1):
+        _events.put(("progress", self.chapter, n))
+
+    def close(self):
+        pass
+
+
+def chapter_basefile(basefile, chapter):
+    return f"{basefile}-chapter{chapter:04d}"
+
+
+def _synthesize_chapter(task):
+    from .backends import get_backend
+    from .epub2tts_edge import read_book
+
+    chapter = task["chapter"]
+    _events.put(("started", chapter, task["content"]["title"]))
+    try:
+        files = read_book(
+            sourcefile=task["part"],
+            book_contents=[task["content"]],
+            speaker=task["speaker"],
+            concurrency=task["concurrency"],
+            max_concurrency=task["max_concurrency"],
+            cache=TTSCache(task["cache_dir"], task["cache_size"]),
+            backend=get_backend(task["backend"]),
+            subtitle_formats=(),
+            batch_chars=task["batch_chars"],
+            postprocess=task["postprocess"],
+            codec=task["codec"],
+            bitrate=task["bitrate"],
+            progress=lambda **kwargs: _QueueProgress(chapter, **kwargs),
+        )
+    except Exception as e:
+        _events.put(("failed", chapter, str(e)))
+        raise
+    finally:
+        profiling.flush()
+    return files[0]
+
+
+def synthesize_chapters(
+    sourcefile,
+    book_contents,
+    speaker,
+    workers=4,
+    concurrency=10,
+    max_concurrency=32,
+    cache_dir=None,
+    cache_size=2 * 1024**3,
+    backend="edge",
+    batch_chars=0,
+    codec="aac",
+    bitrate=None,
+    postprocess=None,
+    parts=None,
+):
+    """Synthesize and encode every chapter in a pool of `workers` processes.
+
+    Returns the chapter part files in book order. Each chapter is read as a
+    one-chapter book named by `parts` (chapter_basefile by default). All
+    workers share one adaptive TTS concurrency limit. Raises once every chapter has been tried
+    if any of them failed; running again redoes only the failed ones.
+    """
+    from tqdm import tqdm
+
+    from .epub2tts_edge import get_basefile
+
+    basefile = get_basefile(sourcefile)
+    if parts is None:
+        parts = [
+            chapter_basefile(basefile, i) for i in range(1, len(book_contents) + 1)
+        ]
+    tasks = [
+        {
+            "chapter": i,
+            "content": content,
+            "part": part,
+            "speaker": speaker,
+            "concurrency": concurrency,
+            "max_concurrency": max_concurrency,
+            "cache_dir": cache_dir,
+            "cache_size": cache_size,
+            "backend": backend,
+            "batch_chars": batch_chars,
+            "postprocess": postprocess,
+            "codec": codec,
+            "bitrate": bitrate,
+        }
+        for i, (content, part) in enumerate(zip(book_contents, parts), start=1)
+    ]
+    events = multiprocessing.Queue()
+    files = {}
+    failures = {}
+    bar = tqdm(
+        total=sum(len(task["content"]["paragraphs"]) for task in tasks),
+        desc=f"Processing {len(tasks)} chapters of {sourcefile}",
+        unit="pg",
+    )
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(shared_state(concurrency), events, profiling.trace_path()),
+    ) as executor:
+        # Longest chapters first, so one long chapter does not finish last
+        futures = {
+            executor.submit(_synthesize_chapter, task): task["chapter"]
+            for task in sorted(
+                tasks, key=lambda task: -len(task["content"]["paragraphs"])
+            )
+        }
+        pending = set(futures)
+        while pending:
+            try:
+                kind, chapter, detail = events.get(timeout=0.2)
+            except queue.Empty:
+                pending = {future for future in pending if not future.done()}
+                continue
+            if kind == "progress":
+                bar.update(detail)
+            elif kind == "started":
+                bar.write(f"Chapter {chapter}: {detail}")
+            elif kind == "failed":
+                bar.write(f"Chapter {chapter} failed: {detail}")
+    bar.close()
+    # Outcomes come from the futures; the queue only drives the display, so
+    # a worker that died without reporting is still counted.
+    for future, chapter in futures.items():
+        try:
+            files[chapter] = future.result()
+        except Exception as e:
+            failures[chapter] = e
+    if failures:
+        raise Exception(
+            f"{len(failures)} of {len(tasks)} chapters failed "
+            f"({', '.join(str(chapter) for chapter in sorted(failures))}), "
+            "run again to retry just those"
+        )
+    return [files[task["chapter"]] for task in tasks]
+
+
+def merge_subtitles(basefile, parts, durations, formats, per_chapter=False):
+    """Write book subtitles from the manifests of the chapter parts.
+
+    `parts` are the basefiles of the one-chapter books, in book order.
+    """
+    subtitles = SubtitleWriter(basefile, formats, per_chapter)
+    offset = 0
+    try:
+        for number, (part, duration) in enumerate(zip(parts, durations), start=1):
+            subtitles.start_chapter(number, offset)
+            for record in read_manifest(part):
+                # After the first part, a part's audio starts once its encoder
+                # priming has played
+                lead = duration - record["samples"] if number > 1 else 0
+                for sentence in record["sentences"]:
+                    subtitles.add(offset + lead + sentence["start"], sentence["subs"])
+            offset += duration
+    except BaseException:
+        subtitles.abort()
+        raise
+    subtitles.close()
+
+
+def merge_book(
+    sourcefile,
+    files,
+    parts,
+    speaker,
+    title,
+    author,
+    chapter_titles,
+    cover=None,
+    subtitle_formats=("vtt",),
+    chapter_subtitles=False,
+    durations=None,
+    keep=False,
+):
+    """Stream-copy chapter parts into `{basefile}.m4b` with chapter markers.
+
+    `parts` are the basefiles whose manifests hold each chapter's sentences.
+    `durations` are the packet durations of `files`, if already known. The
+    part files are removed once the m4b is written, unless `keep` is set.
+    """
+    from .epub2tts_edge import get_basefile, make_m4b, write_ffmetadata
+
+    basefile = get_basefile(sourcefile)
+    with profiling.span("merge"):
+        if durations is None:
+            durations = [packet_duration(file) for file in files]
+        merge_subtitles(basefile, parts, durations, subtitle_formats, chapter_subtitles)
+        ffmetadatafile = f"{basefile}.ffmetadata"
+        write_ffmetadata(ffmetadatafile, author, title, chapter_titles, durations)
+        return make_m4b(
+            files,
+            sourcefile,
+            speaker,
+            ffmetadatafile,
+            cover=cover,
+            codec="copy",
+            durations=durations,
+            keep=keep,
+        )
+
+
+def build_book(
+    sourcefile,
+    book_contents,
+    speaker,
+    title,
+    author,
+    chapter_titles,
+    cover=None,
+    subtitle_formats=("vtt",),
+    chapter_subtitles=False,
+    **options,
+):
+    """Parallel synthesis plus a stream-copy merge into `{basefile}.m4b`.
+
+    `options` go to synthesize_chapters; the codec must be one the mp4
+    container takes, since the parts are copied into the m4b as they are.
+    """
+    from .epub2tts_edge import get_basefile
+
+    basefile = get_basefile(sourcefile)
+    book_contents = [
+        dict(chapter, paragraphs=list(chapter["paragraphs"])) for chapter in book_contents
+    ]
+    files = synthesize_chapters(sourcefile, book_contents, speaker, **options)
+    parts = [chapter_basefile(basefile, chapter) for chapter in range(1, len(files) + 1)]
+    outputm4b = merge_book(
+        sourcefile,
+        files,
+        parts,
+        speaker,
+        title,
+        author,
+        chapter_titles,
+        cover=cover,
+        subtitle_formats=subtitle_formats,
+        chapter_subtitles=chapter_subtitles,
+    )
+    for part in parts:
+        for leftover in (manifest_path(part), journal_path(part)):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+    return outputm4b
@@ -0,0 +1,127 @@
+"""Vectorized post-processing of sentence audio with NumPy.
+
+Works on the 16-bit PCM the pipeline streams anyway. Trimming cuts the
+silence TTS leaves around every clip, so the pauses between sentences are
+exactly the ones read_book writes. Normalization brings every chapter to the
+same loudness with one pass over its samples.
+"""
+
+import math
+import os
+
+import numpy as np
+
+from . import profiling
+from .audio import SAMPLE_RATE, SAMPLE_WIDTH, ms_to_samples
+
+# Loudness is measured over 10 ms frames, like pydub's silence detection
+FRAME = ms_to_samples(10)
+TRIM_THRESHOLD_DB = -50.0
+# Kept around the speech so soft onsets and endings are not clipped
+TRIM_PAD_MS = 30
+PEAK_DB = -1.0
+# Samples per block when streaming a spooled chapter into the encoder
+BLOCK = SAMPLE_RATE * 10
+
+
+def db_to_amplitude(db):
+    return 32768 * 10 ** (db / 20)
+
+
+def trim_silence(pcm, threshold_db=TRIM_THRESHOLD_DB, pad_ms=TRIM_PAD_MS):
+    """Cut leading and trailing silence from a clip.
+
+    Returns the trimmed PCM and the number of samples cut from the start. A
+    clip with no frame above `threshold_db` is returned unchanged.
+    """
+    samples = np.frombuffer(pcm, dtype=np.int16)
+    frames = len(samples) // FRAME
+    if frames == 0:
+        return pcm, 0
+    power = np.square(
+        samples[: frames * FRAME].reshape(frames, FRAME), dtype=np.float64
+    ).mean(axis=1)
+    loud = np.flatnonzero(power > db_to_amplitude(threshold_db) ** 2)
+    if loud.size == 0:
+        return pcm, 0
+    pad = ms_to_samples(pad_ms)
+    start = max(0, int(loud[0]) * FRAME - pad)
+    end = min(len(samples), (int(loud[-1]) + 1) * FRAME + pad)
+    return pcm[start * SAMPLE_WIDTH : end * SAMPLE_WIDTH], start
+
+
+def shift_subs(subs, samples):
+    """Move word boundaries (in 100 ns ticks) back by `samples`."""
+    ticks = samples * 10**7 // SAMPLE_RATE
+    return [
+        [[max(0, offset - ticks), duration], text] for (offset, duration), text in subs
+    ]
+
+
+def trim_sentence(pcm, subs):
+    pcm, cut = trim_silence(pcm)
+    if cut:
+        subs = shift_subs(subs, cut)
+    return pcm, subs
+
+
+class NormalizingEncoder:
+    """Bring a chapter to `target_db` RMS before it reaches `encoder`.
+
+    Speech is measured as it is written (pauses are left out, or they would
+    drag the level down) and spooled to disk along with the pauses. On close
+    the whole chapter is scaled once, limited so the peak stays under
+    PEAK_DB, and streamed into the encoder in blocks, so memory stays flat
+    however long the chapter is. Quacks like ChapterEncoder.
+    """
+
+    def __init__(self, encoder, target_db):
+        self.encoder = encoder
+        self.outfile = encoder.outfile
+        self.target_db = target_db
+        self.spoolfile = f"{encoder.outfile}.pcm"
+        self.spool = open(self.spoolfile, "wb")
+        self.samples = 0
+        self.energy = 0.0
+        self.speech = 0
+        self.peak = 0
+
+    def write(self, pcm):
+        samples = np.frombuffer(pcm, dtype=np.int16)
+        if len(samples):
+            self.energy += float(np.square(samples, dtype=np.float64).sum())
+            self.peak = max(self.peak, int(np.abs(samples.astype(np.int32)).max()))
+            self.speech += len(samples)
+        self.spool.write(pcm)
+        self.samples += len(samples)
+
+    def write_silence(self, ms):
+        samples = ms_to_samples(ms)
+        self.spool.write(bytes(samples * SAMPLE_WIDTH))
+        self.samples += samples
+
+    def gain(self):
+        if not self.energy:
+            return 1.0
+        rms = math.sqrt(self.energy / self.speech)
+        return min(
+            db_to_amplitude(self.target_db) / rms, db_to_amplitude(PEAK_DB) / self.peak
+        )
+
+    def close(self):
+        self.spool.close()
+        gain = self.gain()
+        with profiling.span("normalize"), open(self.spoolfile, "rb") as f:
+            for block in iter(lambda: f.read(BLOCK * SAMPLE_WIDTH), b""):
+                samples = np.frombuffer(block, dtype=np.int16) * np.float32(gain)
+                np.rint(samples, out=samples)
+                np.clip(samples, -32768, 32767, out=samples)
+                self.encoder.write(samples.astype(np.int16).tobytes())
+        os.remove(self.spoolfile)
+        return self.encoder.close()
+
+    def abort(self):
+        self.spool.close()
+        if os.path.exists(self.spoolfile):
+            os.remove(self.spoolfile)
+        self.encoder.abort()
@@ -0,0 +1,191 @@
+"""Optional instrumentation: spans, counters and Chrome/Perfetto trace export.
+
+Everything here is a no-op until `enable()` is called; `span()` then hands
+back one shared null context and `count()` returns straight away, so the
+calls can stay in hot paths. Spans are recorded as Chrome trace events with
+wall-clock timestamps, so traces written by several processes can be merged
+into one timeline.
+"""
+
+import collections
+import contextlib
+import functools
+import glob
+import itertools
+import json
+import os
+import threading
+import time
+
+_enabled = False
+_path = None
+_events = []
+_counters = collections.Counter()
+_lock = threading.Lock()
+_ids = itertools.count()
+_parts = itertools.count()
+_null = contextlib.nullcontext()
+
+
+def enable(path):
+    """Start recording; the trace will be written to `path`.
+
+    Anything recorded before is dropped: a forked worker would otherwise
+    flush its parent's events again.
+    """
+    global _enabled, _path
+    with _lock:
+        _events.clear()
+        _counters.clear()
+    _enabled = True
+    _path = path
+
+
+def enabled():
+    return _enabled
+
+
+def trace_path():
+    """Where the trace goes, or None when profiling is off."""
+    return _path if _enabled else None
+
+
+def _now():
+    return time.time_ns() // 1000
+
+
+class _Span:
+    __slots__ = ("name", "args", "concurrent", "start")
+
+    def __init__(self, name, args, concurrent):
+        self.name = name
+        self.args = args
+        self.concurrent = concurrent
+
+    def __enter__(self):
+        self.start = _now()
+        return self
+
+    def __exit__(self, *exc):
+        end = _now()
+        event = {
+            "name": self.name,
+            "cat": "epub2tts",
+            "pid": os.getpid(),
+            "tid": threading.get_native_id(),
+            "args": self.args,
+        }
+        if self.concurrent:
+            # Overlapping spans on one thread (TTS requests on the event loop)
+            # are written as async begin/end pairs so each gets its own track.
+            event["id"] = next(_ids)
+            begin = dict(event, ph="b", ts=self.start)
+            finish = dict(event, ph="e", ts=end)
+            new_events = [begin, finish]
+        else:
+            new_events = [dict(event, ph="X", ts=self.start, dur=end - self.start)]
+        with _lock:
+            _events.extend(new_events)
+
+
+def span(name, concurrent=False, **args):
+    """Time a block as `name`; pass concurrent=True for overlapping async work."""
+    if not _enabled:
+        return _null
+    return _Span(name, args, concurrent)
+
+
+def traced(name):
+    """Decorator form of `span()` for plain functions."""
+
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def count(name, n=1):
+    if _enabled:
+        with _lock:
+            _counters[name] += n
+
+
+def _snapshot():
+    with _lock:
+        events = list(_events)
+        counters = dict(_counters)
+        _events.clear()
+        _counters.clear()
+    if counters:
+        events.append(
+            {
+                "name": "counters",
+                "ph": "C",
+                "ts": _now(),
+                "pid": os.getpid(),
+                "tid": threading.get_native_id(),
+                "args": counters,
+            }
+        )
+    return events
+
+
+def flush():
+    """Write what this process recorded so far to a part file next to the trace.
+
+    Used by worker processes; `write()` in the coordinating process merges the
+    parts into the final trace.
+    """
+    if not _enabled:
+        return
+    part = f"{_path}.{os.getpid()}.{next(_parts)}.part"
+    with open(part, "w") as f:
+        json.dump(_snapshot(), f)
+
+
+def write():
+    """Write the trace, merged with any worker parts, and return its events."""
+    if not _enabled:
+        return []
+    events = _snapshot()
+    for part in sorted(glob.glob(f"{glob.escape(_path)}.*.part")):
+        with open(part) as f:
+            events.extend(json.load(f))
+        os.remove(part)
+    with open(_path, "w") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+    print(f"Wrote trace to {_path} (open it in https://ui.perfetto.dev)")
+    return events
+
+
+def summary(events):
+    """Format a table of time per span name and the totals of all counters."""
+    spans = collections.defaultdict(lambda: [0, 0])
+    begins = {}
+    counters = collections.Counter()
+    for event in events:
+        if event["ph"] == "X":
+            spans[event["name"]][0] += 1
+            spans[event["name"]][1] += event["dur"]
+        elif event["ph"] == "b":
+            begins[(event["pid"], event["id"])] = event["ts"]
+        elif event["ph"] == "e":
+            start = begins.pop((event["pid"], event["id"]), event["ts"])
+            spans[event["name"]][0] += 1
+            spans[event["name"]][1] += event["ts"] - start
+        elif event["ph"] == "C":
+            counters.update(event["args"])
+    lines = [f"{'span':<24}{'count':>10}{'total s':>12}{'mean ms':>12}"]
+    for name, (n, total) in sorted(spans.items(), key=lambda item: -item[1][1]):
+        lines.append(f"{name:<24}{n:>10}{total / 1e6:>12.3f}{total / n / 1e3:>12.2f}")
+    if counters:
+        lines.append("")
+        lines.append(f"{'counter':<24}{'total':>10}")
+        for name, total in sorted(counters.items()):
+            lines.append(f"{name:<24}{total:>10}")
+    return "\n".join(lines)
@@ -0,0 +1,230 @@
+"""Publish a book as HLS while it is still being read.
+
+Chapters are encoded once, as AAC parts. As soon as read_book finishes one,
+it is stream-copied into MPEG-TS segments under `{basefile}.hls/`, and the
+running indexes there are rewritten:
+
+- index.m3u8: an EVENT playlist that grows chapter by chapter and gets
+  #EXT-X-ENDLIST once the book is complete
+- chapters.json: title, author and, per chapter, its title, start and
+  duration in seconds on the playlist's timeline and its segments
+- subtitles.vtt, and subtitles-chapterN.vtt per chapter, on the same
+  timeline
+
+A player can start on the first chapter while the rest are rendered. When
+the book is done the same parts are stream-copied into the m4b, as with
+--workers, so nothing is encoded twice. An interrupted run picks up the
+published chapters from chapters.json.
+"""
+
+import json
+import math
+import os
+import subprocess
+
+from . import profiling
+from .audio import SAMPLE_RATE, packet_duration
+from .manifest import chapter_sentences
+from .subtitles import SubtitleWriter
+
+# Target segment length in seconds
+SEGMENT_SECONDS = 10
+
+
+def hls_dir(basefile):
+    return f"{basefile}.hls"
+
+
+def _write_atomic(path, text):
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(f"{path}.tmp", path)
+
+
+class HLSPublisher:
+    """Turn finished chapter parts into a growing HLS playlist.
+
+    Pass `publish` to read_book as `on_chapter`. Chapters are published in
+    book order: one that finishes before an earlier chapter (which failed
+    and will be retried by the next run) waits for it.
+    """
+
+    def __init__(self, sourcefile, title, author, chapter_titles):
+        from .epub2tts_edge import get_basefile
+
+        self.sourcefile = sourcefile
+        self.basefile = get_basefile(sourcefile)
+        self.directory = hls_dir(self.basefile)
+        self.title = title
+        self.author = author
+        self.chapter_titles = chapter_titles
+        self.ready = {}
+        self.chapters = []
+        self.complete = False
+        os.makedirs(self.directory, exist_ok=True)
+        try:
+            with open(os.path.join(self.directory, "chapters.json"), "r") as f:
+                self.chapters = json.load(f)["chapters"]
+        except (OSError, ValueError, KeyError):
+            self.chapters = []
+        self.subtitles = SubtitleWriter(
+            os.path.join(self.directory, "subtitles"),
+            ("vtt",),
+            per_chapter=True,
+            live=True,
+        )
+        # Cues are only kept on disk, so a resumed run writes them again
+        for number, chapter in enumerate(self.chapters, start=1):
+            self._add_subtitles(number, chapter)
+
+    @property
+    def offset(self):
+        """Where the next chapter starts on the playlist timeline, in samples."""
+        return sum(chapter["samples"] for chapter in self.chapters)
+
+    def publish(self, number, file, samples=None):
+        if number <= len(self.chapters):
+            return
+        self.ready[number] = (file, samples)
+        while len(self.chapters) + 1 in self.ready:
+            number = len(self.chapters) + 1
+            self._publish(number, *self.ready.pop(number))
+
+    @profiling.traced("publish_chapter")
+    def _publish(self, number, file, samples):
+        name = f"chapter{number:04d}"
+        playlist = os.path.join(self.directory, f"{name}.m3u8")
+        subprocess.run(
+            [
+                "ffmpeg",
+                "-y",
+                "-v",
+                "error",
+                "-i",
+                file,
+                "-map",
+                "0:a",
+                "-codec",
+                "copy",
+                "-f",
+                "hls",
+                "-hls_time",
+                str(SEGMENT_SECONDS),
+                "-hls_list_size",
+                "0",
+                "-hls_playlist_type",
+                "vod",
+                "-hls_segment_filename",
+                os.path.join(self.directory, f"{name}-%05d.ts"),
+                playlist,
+            ],
+            check=True,
+        )
+        segments = []
+        with open(playlist, "r", encoding="utf-8") as f:
+            duration = None
+            for line in f:
+                line = line.strip()
+                if line.startswith("#EXTINF:"):
+                    duration = float(line[len("#EXTINF:") :].split(",")[0])
+                elif line and not line.startswith("#"):
+                    segments.append([duration, line])
+        os.remove(playlist)
+        duration = packet_duration(file)
+        chapter = {
+            "title": self.chapter_titles[number - 1],
+            "start": self.offset / SAMPLE_RATE,
+            "duration": duration / SAMPLE_RATE,
+            "samples": duration,
+            # played before the first sentence: the AAC encoder's priming
+            "lead": duration - samples if samples is not None else 0,
+            "file": file,
+            "segments": segments,
+        }
+        self.chapters.append(chapter)
+        self._add_subtitles(number, chapter)
+        self._write_indexes()
+        print(f"Published chapter {number} to {self.directory}")
+
+    def _add_subtitles(self, number, chapter):
+        offset = round(chapter["start"] * SAMPLE_RATE)
+        self.subtitles.start_chapter(number, offset)
+        offset += chapter["lead"]
+        for sentence in chapter_sentences(self.basefile, number):
+            self.subtitles.add(offset + sentence["start"], sentence["subs"])
+        self.subtitles.end_chapter()
+
+    def _write_indexes(self):
+        segments = [
+            segment for chapter in self.chapters for segment in chapter["segments"]
+        ]
+        target = max([SEGMENT_SECONDS] + [math.ceil(d) for d, _ in segments])
+        lines = [
+            "#EXTM3U",
+            "#EXT-X-VERSION:3",
+            "#EXT-X-PLAYLIST-TYPE:EVENT",
+            f"#EXT-X-TARGETDURATION:{target}",
+            "#EXT-X-MEDIA-SEQUENCE:0",
+        ]
+        for number, chapter in enumerate(self.chapters, start=1):
+            if number > 1:
+                # every part starts its own timestamps
+                lines.append("#EXT-X-DISCONTINUITY")
+            for duration, segment in chapter["segments"]:
+                lines += [f"#EXTINF:{duration:.6f},", segment]
+        if self.complete:
+            lines.append("#EXT-X-ENDLIST")
+        _write_atomic(
+            os.path.join(self.directory, "index.m3u8"), "\n".join(lines) + "\n"
+        )
+        _write_atomic(
+            os.path.join(self.directory, "chapters.json"),
+            json.dumps(
+                {
+                    "title": self.title,
+                    "author": self.author,
+                    "complete": self.complete,
+                    "chapters": self.chapters,
+                }
+            ),
+        )
+
+    def close(self):
+        if self.subtitles is not None:
+            self.subtitles.close()
+            self.subtitles = None
+
+    @profiling.traced("finish_progressive")
+    def finish(
+        self, files, speaker, cover=None, subtitle_formats=("vtt",), per_chapter=False
+    ):
+        """End the playlist and stream-copy the parts into `{basefile}.m4b`."""
+        from .epub2tts_edge import make_m4b, write_ffmetadata
+
+        self.close()
+        self.complete = True
+        self._write_indexes()
+        durations = [chapter["samples"] for chapter in self.chapters]
+        subtitles = SubtitleWriter(self.basefile, subtitle_formats, per_chapter)
+        offset = 0
+        for number, chapter in enumerate(self.chapters, start=1):
+            subtitles.start_chapter(number, offset)
+            # Joined into one m4b, only the first part's priming is hidden
+            lead = chapter["lead"] if number > 1 else 0
+            for sentence in chapter_sentences(self.basefile, number):
+                subtitles.add(offset + lead + sentence["start"], sentence["subs"])
+            offset += chapter["samples"]
+        subtitles.close()
+        ffmetadatafile = f"{self.basefile}.ffmetadata"
+        write_ffmetadata(
+            ffmetadatafile, self.author, self.title, self.chapter_titles, durations
+        )
+        return make_m4b(
+            files,
+            self.sourcefile,
+            speaker,
+            ffmetadatafile,
+            cover=cover,
+            codec="copy",
+            durations=durations,
+        )
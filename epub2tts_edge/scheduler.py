@@ -0,0 +1,182 @@
+import asyncio
+import collections
+import concurrent.futures
+import itertools
+import queue
+import threading
+
+from . import profiling
+
+
+class _Failure:
+    def __init__(self, error):
+        self.error = error
+
+
+def prefetch_iter(iterable, size):
+    """Iterate `iterable` in a background thread, at most `size` items ahead.
+
+    Lets a CPU-bound producer such as sentence segmentation run while the
+    consumer waits on TTS or the encoder, while the bounded queue keeps
+    memory flat. An exception in the producer is raised in the consumer.
+    """
+    items = queue.Queue(size)
+    stop = threading.Event()
+    end = object()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        iterator = iter(iterable)
+        try:
+            for item in iterator:
+                if not put(item):
+                    return
+            put(end)
+        except Exception as e:
+            put(_Failure(e))
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+
+    threading.Thread(target=produce, daemon=True).start()
+    try:
+        while True:
+            item = items.get()
+            if item is end:
+                return
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+    finally:
+        stop.set()
+
+
+class SynthesisScheduler:
+    """Run TTS requests for a whole book on one long-lived event loop.
+
+    Jobs are started ahead of the consumer, up to `lookahead` at a time; how
+    many of them talk to the service at once is up to the `synthesize`
+    coroutine (see ConcurrencyController). Results are delivered in submission
+    order so the assembly stage can consume them as a plain iterator while
+    synthesis keeps running in the background.
+    """
+
+    def __init__(self, synthesize, lookahead=40):
+        self.synthesize = synthesize
+        self.lookahead = lookahead
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    async def _run(self, job):
+        return await self.synthesize(job["text"], job["speaker"])
+
+    def submit(self, job, priority=0):
+        # Jobs without text are markers; they are passed through untouched so
+        # callers can thread chapter and paragraph boundaries through the stream.
+        # Only a PriorityScheduler looks at `priority`.
+        if job.get("text") is None:
+            return None
+        return asyncio.run_coroutine_threadsafe(self._run(job), self.loop)
+
+    def map(self, jobs, priority=0):
+        """Yield (job, result) pairs in the order the jobs were given.
+
+        A job that fails yields its exception as the result, so one bad
+        sentence does not stop the rest of the book.
+        """
+        pending = collections.deque()
+        jobs = iter(jobs)
+        try:
+            for job in jobs:
+                pending.append((job, self.submit(job, priority)))
+                if len(pending) >= self.lookahead:
+                    yield self._pop(pending)
+            while pending:
+                yield self._pop(pending)
+        finally:
+            for _, future in pending:
+                if future is not None:
+                    future.cancel()
+
+    def _pop(self, pending):
+        job, future = pending.popleft()
+        if future is None:
+            return job, None
+        try:
+            with profiling.span("wait_for_tts"):
+                return job, future.result()
+        except Exception as e:
+            return job, e
+
+    def close(self):
+        if self.loop.is_closed():
+            return
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
+
+
+class PriorityScheduler(SynthesisScheduler):
+    """A SynthesisScheduler shared by several books, most urgent book first.
+
+    Jobs wait in one priority queue, lowest `priority` first and in
+    submission order within a priority, and `workers` coroutines take them
+    from it. Each book still consumes its results through its own `map`,
+    from its own thread.
+    """
+
+    def __init__(self, synthesize, lookahead=40, workers=32):
+        super().__init__(synthesize, lookahead)
+        self._order = itertools.count()
+        self._queue, self._workers = asyncio.run_coroutine_threadsafe(
+            self._start(workers), self.loop
+        ).result()
+
+    async def _start(self, workers):
+        queue = asyncio.PriorityQueue()
+        return queue, [asyncio.create_task(self._work(queue)) for _ in range(workers)]
+
+    async def _work(self, queue):
+        while True:
+            _, _, job, future = await queue.get()
+            # skip jobs whose consumer went away
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(await self._run(job))
+            except Exception as e:
+                future.set_exception(e)
+
+    def submit(self, job, priority=0):
+        if job.get("text") is None:
+            return None
+        future = concurrent.futures.Future()
+        item = (priority, next(self._order), job, future)
+        self.loop.call_soon_threadsafe(self._queue.put_nowait, item)
+        return future
+
+    async def _stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+
+    def close(self):
+        if not self.loop.is_closed():
+            asyncio.run_coroutine_threadsafe(self._stop(), self.loop).result()
+        super().close()
@@ -0,0 +1,111 @@
+import os
+
+from .audio import SAMPLE_RATE
+
+FORMATS = ("vtt", "srt")
+
+
+def format_timestamp(microseconds, separator="."):
+    milliseconds = int(round(microseconds / 1000))
+    hours, milliseconds = divmod(milliseconds, 3600000)
+    minutes, milliseconds = divmod(milliseconds, 60000)
+    seconds, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}{separator}{milliseconds:03d}"
+
+
+class _CueFile:
+    # Written under a temporary name and moved into place on close, unless
+    # `live`, so a failed run leaves the previous file alone
+    def __init__(self, path, kind, live=False):
+        self.kind = kind
+        self.count = 0
+        self.path = path
+        self.partial = path if live else f"{path}.partial"
+        self.file = open(self.partial, "w", encoding="utf-8")
+        if kind == "vtt":
+            self.file.write("WEBVTT\n\n")
+
+    def write(self, start, end, text):
+        self.count += 1
+        if self.kind == "srt":
+            self.file.write(f"{self.count}\n")
+            separator = ","
+        else:
+            separator = "."
+        start = format_timestamp(start, separator)
+        end = format_timestamp(end, separator)
+        self.file.write(f"{start} --> {end}\n{text}\n\n")
+
+    def close(self):
+        self.file.close()
+        if self.partial != self.path:
+            os.replace(self.partial, self.path)
+
+    def abort(self):
+        self.file.close()
+        if self.partial != self.path:
+            os.remove(self.partial)
+
+
+class SubtitleWriter:
+    """Append subtitle cues to WebVTT/SRT files as sentences are assembled.
+
+    Cue times are kept as numbers (sample offsets plus boundary ticks) and
+    only formatted on write, so each cue is written exactly once and memory
+    does not grow with the length of the book. With `per_chapter` every
+    chapter also gets its own files, timed from the start of that chapter.
+
+    The files only replace existing ones on close(); abort() drops them. With
+    `live` they are written in place instead, for players that follow them.
+    """
+
+    def __init__(self, basefile, formats=("vtt",), per_chapter=False, live=False):
+        self.basefile = basefile
+        self.formats = formats
+        self.per_chapter = per_chapter
+        self.live = live
+        self.files = [_CueFile(f"{basefile}.{kind}", kind, live) for kind in formats]
+        self.chapter_files = []
+        self.chapter_start = 0
+        for kind in formats:
+            print(f"Writing subtitles to {basefile}.{kind}")
+
+    def start_chapter(self, chapter, offset):
+        """Begin chapter number `chapter`, which starts `offset` samples in."""
+        self.end_chapter()
+        self.chapter_start = offset
+        if self.per_chapter:
+            self.chapter_files = [
+                _CueFile(f"{self.basefile}-chapter{chapter}.{kind}", kind, self.live)
+                for kind in self.formats
+            ]
+
+    def end_chapter(self):
+        for cue_file in self.chapter_files:
+            cue_file.close()
+        self.chapter_files = []
+        for cue_file in self.files:
+            cue_file.file.flush()
+
+    def add(self, offset, subs):
+        """Add the boundaries of a sentence that starts `offset` samples in."""
+        sentence_start = offset / SAMPLE_RATE * 1e6
+        chapter_start = self.chapter_start / SAMPLE_RATE * 1e6
+        # boundary offsets and durations are in 100-nanosecond ticks
+        for (tick_offset, duration), text in subs:
+            start = sentence_start + tick_offset / 10
+            end = start + duration / 10
+            for cue_file in self.files:
+                cue_file.write(start, end, text)
+            for cue_file in self.chapter_files:
+                cue_file.write(start - chapter_start, end - chapter_start, text)
+
+    def close(self):
+        self.end_chapter()
+        for cue_file in self.files:
+            cue_file.close()
+
+    def abort(self):
+        for cue_file in self.chapter_files + self.files:
+            cue_file.abort()
+        self.chapter_files = []
@@ -0,0 +1,321 @@
+# Generated from speakers.json by `python -m epub2tts_edge.voices speakers.json`, do not edit.
+# name: (language code, language, gender)
+VOICES = {
+    'af-ZA-AdriNeural': ('af-ZA', 'Afrikaans (South Africa)', 'female'),
+    'af-ZA-WillemNeural': ('af-ZA', 'Afrikaans (South Africa)', 'male'),
+    'am-ET-AmehaNeural': ('am-ET', 'Amharic (Ethiopia)', 'male'),
+    'am-ET-MekdesNeural': ('am-ET', 'Amharic (Ethiopia)', 'female'),
+    'ar-AE-FatimaNeural': ('ar-AE', 'Arabic (United Arab Emirates)', 'female'),
+    'ar-AE-HamdanNeural': ('ar-AE', 'Arabic (United Arab Emirates)', 'male'),
+    'ar-BH-AliNeural': ('ar-BH', 'Arabic (Bahrain)', 'male'),
+    'ar-BH-LailaNeural': ('ar-BH', 'Arabic (Bahrain)', 'female'),
+    'ar-DZ-AminaNeural': ('ar-DZ', 'Arabic (Algeria)', 'female'),
+    'ar-DZ-IsmaelNeural': ('ar-DZ', 'Arabic (Algeria)', 'male'),
+    'ar-EG-SalmaNeural': ('ar-EG', 'Arabic (Egypt)', 'female'),
+    'ar-EG-ShakirNeural': ('ar-EG', 'Arabic (Egypt)', 'male'),
+    'ar-IQ-BasselNeural': ('ar-IQ', 'Arabic (Iraq)', 'male'),
+    'ar-IQ-RanaNeural': ('ar-IQ', 'Arabic (Iraq)', 'female'),
+    'ar-JO-SanaNeural': ('ar-JO', 'Arabic (Jordan)', 'female'),
+    'ar-JO-TaimNeural': ('ar-JO', 'Arabic (Jordan)', 'male'),
+    'ar-KW-FahedNeural': ('ar-KW', 'Arabic (Kuwait)', 'male'),
+    'ar-KW-NouraNeural': ('ar-KW', 'Arabic (Kuwait)', 'female'),
+    'ar-LB-LaylaNeural': ('ar-LB', 'Arabic (Lebanon)', 'female'),
+    'ar-LB-RamiNeural': ('ar-LB', 'Arabic (Lebanon)', 'male'),
+    'ar-LY-ImanNeural': ('ar-LY', 'Arabic (Libya)', 'female'),
+    'ar-LY-OmarNeural': ('ar-LY', 'Arabic (Libya)', 'male'),
+    'ar-MA-JamalNeural': ('ar-MA', 'Arabic (Morocco)', 'male'),
+    'ar-MA-MounaNeural': ('ar-MA', 'Arabic (Morocco)', 'female'),
+    'ar-OM-AbdullahNeural': ('ar-OM', 'Arabic (Oman)', 'male'),
+    'ar-OM-AyshaNeural': ('ar-OM', 'Arabic (Oman)', 'female'),
+    'ar-QA-AmalNeural': ('ar-QA', 'Arabic (Qatar)', 'female'),
+    'ar-QA-MoazNeural': ('ar-QA', 'Arabic (Qatar)', 'male'),
+    'ar-SA-HamedNeural': ('ar-SA', 'Arabic (Saudi Arabia)', 'male'),
+    'ar-SA-ZariyahNeural': ('ar-SA', 'Arabic (Saudi Arabia)', 'female'),
+    'ar-SY-AmanyNeural': ('ar-SY', 'Arabic (Syria)', 'female'),
+    'ar-SY-LaithNeural': ('ar-SY', 'Arabic (Syria)', 'male'),
+    'ar-TN-HediNeural': ('ar-TN', 'Arabic (Tunisia)', 'male'),
+    'ar-TN-ReemNeural': ('ar-TN', 'Arabic (Tunisia)', 'female'),
+    'ar-YE-MaryamNeural': ('ar-YE', 'Arabic (Yemen)', 'female'),
+    'ar-YE-SalehNeural': ('ar-YE', 'Arabic (Yemen)', 'male'),
+    'az-AZ-BabekNeural': ('az-AZ', 'Azerbaijani (Latin, Azerbaijan)', 'male'),
+    'az-AZ-BanuNeural': ('az-AZ', 'Azerbaijani (Latin, Azerbaijan)', 'female'),
+    'bg-BG-BorislavNeural': ('bg-BG', 'Bulgarian (Bulgaria)', 'male'),
+    'bg-BG-KalinaNeural': ('bg-BG', 'Bulgarian (Bulgaria)', 'female'),
+    'bn-BD-NabanitaNeural': ('bn-BD', 'Bangla (Bangladesh)', 'female'),
+    'bn-BD-PradeepNeural': ('bn-BD', 'Bangla (Bangladesh)', 'male'),
+    'bn-IN-BashkarNeural': ('bn-IN', 'Bengali (India)', 'male'),
+    'bn-IN-TanishaaNeural': ('bn-IN', 'Bengali (India)', 'female'),
+    'bs-BA-GoranNeural': ('bs-BA', 'Bosnian (Bosnia and Herzegovina)', 'male'),
+    'bs-BA-VesnaNeural': ('bs-BA', 'Bosnian (Bosnia and Herzegovina)', 'female'),
+    'ca-ES-EnricNeural': ('ca-ES', 'Catalan (Spain)', 'male'),
+    'ca-ES-JoanaNeural': ('ca-ES', 'Catalan (Spain)', 'female'),
+    'cs-CZ-AntoninNeural': ('cs-CZ', 'Czech (Czechia)', 'male'),
+    'cs-CZ-VlastaNeural': ('cs-CZ', 'Czech (Czechia)', 'female'),
+    'cy-GB-AledNeural': ('cy-GB', 'Welsh (United Kingdom)', 'male'),
+    'cy-GB-NiaNeural': ('cy-GB', 'Welsh (United Kingdom)', 'female'),
+    'da-DK-ChristelNeural': ('da-DK', 'Danish (Denmark)', 'female'),
+    'da-DK-JeppeNeural': ('da-DK', 'Danish (Denmark)', 'male'),
+    'de-AT-IngridNeural': ('de-AT', 'German (Austria)', 'female'),
+    'de-AT-JonasNeural': ('de-AT', 'German (Austria)', 'male'),
+    'de-CH-JanNeural': ('de-CH', 'German (Switzerland)', 'male'),
+    'de-CH-LeniNeural': ('de-CH', 'German (Switzerland)', 'female'),
+    'de-DE-AmalaNeural': ('de-DE', 'German (Germany)', 'female'),
+    'de-DE-ConradNeural': ('de-DE', 'German (Germany)', 'male'),
+    'de-DE-FlorianMultilingualNeural': ('de-DE', 'German (Germany)', 'male'),
+    'de-DE-KatjaNeural': ('de-DE', 'German (Germany)', 'female'),
+    'de-DE-KillianNeural': ('de-DE', 'German (Germany)', 'male'),
+    'de-DE-SeraphinaMultilingualNeural': ('de-DE', 'German (Germany)', 'female'),
+    'el-GR-AthinaNeural': ('el-GR', 'Greek (Greece)', 'female'),
+    'el-GR-NestorasNeural': ('el-GR', 'Greek (Greece)', 'male'),
+    'en-AU-NatashaNeural': ('en-AU', 'English (Australia)', 'female'),
+    'en-AU-WilliamNeural': ('en-AU', 'English (Australia)', 'male'),
+    'en-CA-ClaraNeural': ('en-CA', 'English (Canada)', 'female'),
+    'en-CA-LiamNeural': ('en-CA', 'English (Canada)', 'male'),
+    'en-GB-LibbyNeural': ('en-GB', 'English (United Kingdom)', 'female'),
+    'en-GB-MaisieNeural': ('en-GB', 'English (United Kingdom)', 'female'),
+    'en-GB-RyanNeural': ('en-GB', 'English (United Kingdom)', 'male'),
+    'en-GB-SoniaNeural': ('en-GB', 'English (United Kingdom)', 'female'),
+    'en-GB-ThomasNeural': ('en-GB', 'English (United Kingdom)', 'male'),
+    'en-HK-SamNeural': ('en-HK', 'English (Hong Kong SAR)', 'male'),
+    'en-HK-YanNeural': ('en-HK', 'English (Hong Kong SAR)', 'female'),
+    'en-IE-ConnorNeural': ('en-IE', 'English (Ireland)', 'male'),
+    'en-IE-EmilyNeural': ('en-IE', 'English (Ireland)', 'female'),
+    'en-IN-NeerjaNeural': ('en-IN', 'English (India)', 'female'),
+    'en-IN-PrabhatNeural': ('en-IN', 'English (India)', 'male'),
+    'en-KE-AsiliaNeural': ('en-KE', 'English (Kenya)', 'female'),
+    'en-KE-ChilembaNeural': ('en-KE', 'English (Kenya)', 'male'),
+    'en-NG-AbeoNeural': ('en-NG', 'English (Nigeria)', 'male'),
+    'en-NG-EzinneNeural': ('en-NG', 'English (Nigeria)', 'female'),
+    'en-NZ-MitchellNeural': ('en-NZ', 'English (New Zealand)', 'male'),
+    'en-NZ-MollyNeural': ('en-NZ', 'English (New Zealand)', 'female'),
+    'en-PH-JamesNeural': ('en-PH', 'English (Philippines)', 'male'),
+    'en-PH-RosaNeural': ('en-PH', 'English (Philippines)', 'female'),
+    'en-SG-LunaNeural': ('en-SG', 'English (Singapore)', 'female'),
+    'en-SG-WayneNeural': ('en-SG', 'English (Singapore)', 'male'),
+    'en-TZ-ElimuNeural': ('en-TZ', 'English (Tanzania)', 'male'),
+    'en-TZ-ImaniNeural': ('en-TZ', 'English (Tanzania)', 'female'),
+    'en-US-AnaNeural': ('en-US', 'English (United States)', 'female'),
+    'en-US-AndrewMultilingualNeural': ('en-US', 'English (United States)', 'male'),
+    'en-US-AndrewNeural': ('en-US', 'English (United States)', 'male'),
+    'en-US-AriaNeural': ('en-US', 'English (United States)', 'female'),
+    'en-US-AvaMultilingualNeural': ('en-US', 'English (United States)', 'female'),
+    'en-US-AvaNeural': ('en-US', 'English (United States)', 'female'),
+    'en-US-BrianMultilingualNeural': ('en-US', 'English (United States)', 'male'),
+    'en-US-BrianNeural': ('en-US', 'English (United States)', 'male'),
+    'en-US-ChristopherNeural': ('en-US', 'English (United States)', 'male'),
+    'en-US-EmmaMultilingualNeural': ('en-US', 'English (United States)', 'female'),
+    'en-US-EmmaNeural': ('en-US', 'English (United States)', 'female'),
+    'en-US-EricNeural': ('en-US', 'English (United States)', 'male'),
+    'en-US-GuyNeural': ('en-US', 'English (United States)', 'male'),
+    'en-US-JennyNeural': ('en-US', 'English (United States)', 'female'),
+    'en-US-MichelleNeural': ('en-US', 'English (United States)', 'female'),
+    'en-US-RogerNeural': ('en-US', 'English (United States)', 'male'),
+    'en-US-SteffanNeural': ('en-US', 'English (United States)', 'male'),
+    'en-ZA-LeahNeural': ('en-ZA', 'English (South Africa)', 'female'),
+    'en-ZA-LukeNeural': ('en-ZA', 'English (South Africa)', 'male'),
+    'es-AR-ElenaNeural': ('es-AR', 'Spanish (Argentina)', 'female'),
+    'es-AR-TomasNeural': ('es-AR', 'Spanish (Argentina)', 'male'),
+    'es-BO-MarceloNeural': ('es-BO', 'Spanish (Bolivia)', 'male'),
+    'es-BO-SofiaNeural': ('es-BO', 'Spanish (Bolivia)', 'female'),
+    'es-CL-CatalinaNeural': ('es-CL', 'Spanish (Chile)', 'female'),
+    'es-CL-LorenzoNeural': ('es-CL', 'Spanish (Chile)', 'male'),
+    'es-CO-GonzaloNeural': ('es-CO', 'Spanish (Colombia)', 'male'),
+    'es-CO-SalomeNeural': ('es-CO', 'Spanish (Colombia)', 'female'),
+    'es-CR-JuanNeural': ('es-CR', 'Spanish (Costa Rica)', 'male'),
+    'es-CR-MariaNeural': ('es-CR', 'Spanish (Costa Rica)', 'female'),
+    'es-CU-BelkysNeural': ('es-CU', 'Spanish (Cuba)', 'female'),
+    'es-CU-ManuelNeural': ('es-CU', 'Spanish (Cuba)', 'male'),
+    'es-DO-EmilioNeural': ('es-DO', 'Spanish (Dominican Republic)', 'male'),
+    'es-DO-RamonaNeural': ('es-DO', 'Spanish (Dominican Republic)', 'female'),
+    'es-EC-AndreaNeural': ('es-EC', 'Spanish (Ecuador)', 'female'),
+    'es-EC-LuisNeural': ('es-EC', 'Spanish (Ecuador)', 'male'),
+    'es-ES-AlvaroNeural': ('es-ES', 'Spanish (Spain)', 'male'),
+    'es-ES-ElviraNeural': ('es-ES', 'Spanish (Spain)', 'female'),
+    'es-ES-XimenaNeural': ('es-ES', 'Spanish (Spain)', 'female'),
+    'es-GQ-JavierNeural': ('es-GQ', 'Spanish (Equatorial Guinea)', 'male'),
+    'es-GQ-TeresaNeural': ('es-GQ', 'Spanish (Equatorial Guinea)', 'female'),
+    'es-GT-AndresNeural': ('es-GT', 'Spanish (Guatemala)', 'male'),
+    'es-GT-MartaNeural': ('es-GT', 'Spanish (Guatemala)', 'female'),
+    'es-HN-CarlosNeural': ('es-HN', 'Spanish (Honduras)', 'male'),
+    'es-HN-KarlaNeural': ('es-HN', 'Spanish (Honduras)', 'female'),
+    'es-MX-DaliaNeural': ('es-MX', 'Spanish (Mexico)', 'female'),
+    'es-MX-JorgeNeural': ('es-MX', 'Spanish (Mexico)', 'male'),
+    'es-NI-FedericoNeural': ('es-NI', 'Spanish (Nicaragua)', 'male'),
+    'es-NI-YolandaNeural': ('es-NI', 'Spanish (Nicaragua)', 'female'),
+    'es-PA-MargaritaNeural': ('es-PA', 'Spanish (Panama)', 'female'),
+    'es-PA-RobertoNeural': ('es-PA', 'Spanish (Panama)', 'male'),
+    'es-PE-AlexNeural': ('es-PE', 'Spanish (Peru)', 'male'),
+    'es-PE-CamilaNeural': ('es-PE', 'Spanish (Peru)', 'female'),
+    'es-PR-KarinaNeural': ('es-PR', 'Spanish (Puerto Rico)', 'female'),
+    'es-PR-VictorNeural': ('es-PR', 'Spanish (Puerto Rico)', 'male'),
+    'es-PY-MarioNeural': ('es-PY', 'Spanish (Paraguay)', 'male'),
+    'es-PY-TaniaNeural': ('es-PY', 'Spanish (Paraguay)', 'female'),
+    'es-SV-LorenaNeural': ('es-SV', 'Spanish (El Salvador)', 'female'),
+    'es-SV-RodrigoNeural': ('es-SV', 'Spanish (El Salvador)', 'male'),
+    'es-US-AlonsoNeural': ('es-US', 'Spanish (United States)', 'male'),
+    'es-US-PalomaNeural': ('es-US', 'Spanish (United States)', 'female'),
+    'es-UY-MateoNeural': ('es-UY', 'Spanish (Uruguay)', 'male'),
+    'es-UY-ValentinaNeural': ('es-UY', 'Spanish (Uruguay)', 'female'),
+    'es-VE-PaolaNeural': ('es-VE', 'Spanish (Venezuela)', 'female'),
+    'es-VE-SebastianNeural': ('es-VE', 'Spanish (Venezuela)', 'male'),
+    'et-EE-AnuNeural': ('et-EE', 'Estonian (Estonia)', 'female'),
+    'et-EE-KertNeural': ('et-EE', 'Estonian (Estonia)', 'male'),
+    'fa-IR-DilaraNeural': ('fa-IR', 'Persian (Iran)', 'female'),
+    'fa-IR-FaridNeural': ('fa-IR', 'Persian (Iran)', 'male'),
+    'fi-FI-HarriNeural': ('fi-FI', 'Finnish (Finland)', 'male'),
+    'fi-FI-NooraNeural': ('fi-FI', 'Finnish (Finland)', 'female'),
+    'fil-PH-AngeloNeural': ('fil-PH', 'Filipino (Philippines)', 'male'),
+    'fil-PH-BlessicaNeural': ('fil-PH', 'Filipino (Philippines)', 'female'),
+    'fr-BE-CharlineNeural': ('fr-BE', 'French (Belgium)', 'female'),
+    'fr-BE-GerardNeural': ('fr-BE', 'French (Belgium)', 'male'),
+    'fr-CA-AntoineNeural': ('fr-CA', 'French (Canada)', 'male'),
+    'fr-CA-JeanNeural': ('fr-CA', 'French (Canada)', 'male'),
+    'fr-CA-SylvieNeural': ('fr-CA', 'French (Canada)', 'female'),
+    'fr-CA-ThierryNeural': ('fr-CA', 'French (Canada)', 'male'),
+    'fr-CH-ArianeNeural': ('fr-CH', 'French (Switzerland)', 'female'),
+    'fr-CH-FabriceNeural': ('fr-CH', 'French (Switzerland)', 'male'),
+    'fr-FR-DeniseNeural': ('fr-FR', 'French (France)', 'female'),
+    'fr-FR-EloiseNeural': ('fr-FR', 'French (France)', 'female'),
+    'fr-FR-HenriNeural': ('fr-FR', 'French (France)', 'male'),
+    'fr-FR-RemyMultilingualNeural': ('fr-FR', 'French (France)', 'male'),
+    'fr-FR-VivienneMultilingualNeural': ('fr-FR', 'French (France)', 'female'),
+    'ga-IE-ColmNeural': ('ga-IE', 'Irish (Ireland)', 'male'),
+    'ga-IE-OrlaNeural': ('ga-IE', 'Irish (Ireland)', 'female'),
+    'gl-ES-RoiNeural': ('gl-ES', 'Galician', 'male'),
+    'gl-ES-SabelaNeural': ('gl-ES', 'Galician', 'female'),
+    'gu-IN-DhwaniNeural': ('gu-IN', 'Gujarati (India)', 'female'),
+    'gu-IN-NiranjanNeural': ('gu-IN', 'Gujarati (India)', 'male'),
+    'he-IL-AvriNeural': ('he-IL', 'Hebrew (Israel)', 'male'),
+    'he-IL-HilaNeural': ('he-IL', 'Hebrew (Israel)', 'female'),
+    'hi-IN-MadhurNeural': ('hi-IN', 'Hindi (India)', 'male'),
+    'hi-IN-SwaraNeural': ('hi-IN', 'Hindi (India)', 'female'),
+    'hr-HR-GabrijelaNeural': ('hr-HR', 'Croatian (Croatia)', 'female'),
+    'hr-HR-SreckoNeural': ('hr-HR', 'Croatian (Croatia)', 'male'),
+    'hu-HU-NoemiNeural': ('hu-HU', 'Hungarian (Hungary)', 'female'),
+    'hu-HU-TamasNeural': ('hu-HU', 'Hungarian (Hungary)', 'male'),
+    'id-ID-ArdiNeural': ('id-ID', 'Indonesian (Indonesia)', 'male'),
+    'id-ID-GadisNeural': ('id-ID', 'Indonesian (Indonesia)', 'female'),
+    'is-IS-GudrunNeural': ('is-IS', 'Icelandic (Iceland)', 'female'),
+    'is-IS-GunnarNeural': ('is-IS', 'Icelandic (Iceland)', 'male'),
+    'it-IT-DiegoNeural': ('it-IT', 'Italian (Italy)', 'male'),
+    'it-IT-ElsaNeural': ('it-IT', 'Italian (Italy)', 'female'),
+    'it-IT-GiuseppeNeural': ('it-IT', 'Italian (Italy)', 'male'),
+    'it-IT-IsabellaNeural': ('it-IT', 'Italian (Italy)', 'female'),
+    'ja-JP-KeitaNeural': ('ja-JP', 'Japanese (Japan)', 'male'),
+    'ja-JP-NanamiNeural': ('ja-JP', 'Japanese (Japan)', 'female'),
+    'jv-ID-DimasNeural': ('jv-ID', 'Javanese (Latin, Indonesia)', 'male'),
+    'jv-ID-SitiNeural': ('jv-ID', 'Javanese (Latin, Indonesia)', 'female'),
+    'ka-GE-EkaNeural': ('ka-GE', 'Georgian (Georgia)', 'female'),
+    'ka-GE-GiorgiNeural': ('ka-GE', 'Georgian (Georgia)', 'male'),
+    'kk-KZ-AigulNeural': ('kk-KZ', 'Kazakh (Kazakhstan)', 'female'),
+    'kk-KZ-DauletNeural': ('kk-KZ', 'Kazakh (Kazakhstan)', 'male'),
+    'km-KH-PisethNeural': ('km-KH', 'Khmer (Cambodia)', 'male'),
+    'km-KH-SreymomNeural': ('km-KH', 'Khmer (Cambodia)', 'female'),
+    'kn-IN-GaganNeural': ('kn-IN', 'Kannada (India)', 'male'),
+    'kn-IN-SapnaNeural': ('kn-IN', 'Kannada (India)', 'female'),
+    'ko-KR-HyunsuNeural': ('ko-KR', 'Korean (Korea)', 'male'),
+    'ko-KR-InJoonNeural': ('ko-KR', 'Korean (Korea)', 'male'),
+    'ko-KR-SunHiNeural': ('ko-KR', 'Korean (Korea)', 'female'),
+    'lo-LA-ChanthavongNeural': ('lo-LA', 'Lao (Laos)', 'male'),
+    'lo-LA-KeomanyNeural': ('lo-LA', 'Lao (Laos)', 'female'),
+    'lt-LT-LeonasNeural': ('lt-LT', 'Lithuanian (Lithuania)', 'male'),
+    'lt-LT-OnaNeural': ('lt-LT', 'Lithuanian (Lithuania)', 'female'),
+    'lv-LV-EveritaNeural': ('lv-LV', 'Latvian (Latvia)', 'female'),
+    'lv-LV-NilsNeural': ('lv-LV', 'Latvian (Latvia)', 'male'),
+    'mk-MK-AleksandarNeural': ('mk-MK', 'Macedonian (North Macedonia)', 'male'),
+    'mk-MK-MarijaNeural': ('mk-MK', 'Macedonian (North Macedonia)', 'female'),
+    'ml-IN-MidhunNeural': ('ml-IN', 'Malayalam (India)', 'male'),
+    'ml-IN-SobhanaNeural': ('ml-IN', 'Malayalam (India)', 'female'),
+    'mn-MN-BataaNeural': ('mn-MN', 'Mongolian (Mongolia)', 'male'),
+    'mn-MN-YesuiNeural': ('mn-MN', 'Mongolian (Mongolia)', 'female'),
+    'mr-IN-AarohiNeural': ('mr-IN', 'Marathi (India)', 'female'),
+    'mr-IN-ManoharNeural': ('mr-IN', 'Marathi (India)', 'male'),
+    'ms-MY-OsmanNeural': ('ms-MY', 'Malay (Malaysia)', 'male'),
+    'ms-MY-YasminNeural': ('ms-MY', 'Malay (Malaysia)', 'female'),
+    'mt-MT-GraceNeural': ('mt-MT', 'Maltese (Malta)', 'female'),
+    'mt-MT-JosephNeural': ('mt-MT', 'Maltese (Malta)', 'male'),
+    'my-MM-NilarNeural': ('my-MM', 'Burmese (Myanmar)', 'female'),
+    'my-MM-ThihaNeural': ('my-MM', 'Burmese (Myanmar)', 'male'),
+    'nb-NO-FinnNeural': ('nb-NO', 'Norwegian Bokmål (Norway)', 'male'),
+    'nb-NO-PernilleNeural': ('nb-NO', 'Norwegian Bokmål (Norway)', 'female'),
+    'ne-NP-HemkalaNeural': ('ne-NP', 'Nepali (Nepal)', 'female'),
+    'ne-NP-SagarNeural': ('ne-NP', 'Nepali (Nepal)', 'male'),
+    'nl-BE-ArnaudNeural': ('nl-BE', 'Dutch (Belgium)', 'male'),
+    'nl-BE-DenaNeural': ('nl-BE', 'Dutch (Belgium)', 'female'),
+    'nl-NL-ColetteNeural': ('nl-NL', 'Dutch (Netherlands)', 'female'),
+    'nl-NL-FennaNeural': ('nl-NL', 'Dutch (Netherlands)', 'female'),
+    'nl-NL-MaartenNeural': ('nl-NL', 'Dutch (Netherlands)', 'male'),
+    'pl-PL-MarekNeural': ('pl-PL', 'Polish (Poland)', 'male'),
+    'pl-PL-ZofiaNeural': ('pl-PL', 'Polish (Poland)', 'female'),
+    'ps-AF-GulNawazNeural': ('ps-AF', 'Pashto (Afghanistan)', 'male'),
+    'ps-AF-LatifaNeural': ('ps-AF', 'Pashto (Afghanistan)', 'female'),
+    'pt-BR-AntonioNeural': ('pt-BR', 'Portuguese (Brazil)', 'male'),
+    'pt-BR-FranciscaNeural': ('pt-BR', 'Portuguese (Brazil)', 'female'),
+    'pt-BR-ThalitaNeural': ('pt-BR', 'Portuguese (Brazil)', 'female'),
+    'pt-PT-DuarteNeural': ('pt-PT', 'Portuguese (Portugal)', 'male'),
+    'pt-PT-RaquelNeural': ('pt-PT', 'Portuguese (Portugal)', 'female'),
+    'ro-RO-AlinaNeural': ('ro-RO', 'Romanian (Romania)', 'female'),
+    'ro-RO-EmilNeural': ('ro-RO', 'Romanian (Romania)', 'male'),
+    'ru-RU-DmitryNeural': ('ru-RU', 'Russian (Russia)', 'male'),
+    'ru-RU-SvetlanaNeural': ('ru-RU', 'Russian (Russia)', 'female'),
+    'si-LK-SameeraNeural': ('si-LK', 'Sinhala (Sri Lanka)', 'male'),
+    'si-LK-ThiliniNeural': ('si-LK', 'Sinhala (Sri Lanka)', 'female'),
+    'sk-SK-LukasNeural': ('sk-SK', 'Slovak (Slovakia)', 'male'),
+    'sk-SK-ViktoriaNeural': ('sk-SK', 'Slovak (Slovakia)', 'female'),
+    'sl-SI-PetraNeural': ('sl-SI', 'Slovenian (Slovenia)', 'female'),
+    'sl-SI-RokNeural': ('sl-SI', 'Slovenian (Slovenia)', 'male'),
+    'so-SO-MuuseNeural': ('so-SO', 'Somali (Somalia)', 'male'),
+    'so-SO-UbaxNeural': ('so-SO', 'Somali (Somalia)', 'female'),
+    'sq-AL-AnilaNeural': ('sq-AL', 'Albanian (Albania)', 'female'),
+    'sq-AL-IlirNeural': ('sq-AL', 'Albanian (Albania)', 'male'),
+    'sr-RS-NicholasNeural': ('sr-RS', 'Serbian (Cyrillic, Serbia)', 'male'),
+    'sr-RS-SophieNeural': ('sr-RS', 'Serbian (Cyrillic, Serbia)', 'female'),
+    'su-ID-JajangNeural': ('su-ID', 'Sundanese (Indonesia)', 'male'),
+    'su-ID-TutiNeural': ('su-ID', 'Sundanese (Indonesia)', 'female'),
+    'sv-SE-MattiasNeural': ('sv-SE', 'Swedish (Sweden)', 'male'),
+    'sv-SE-SofieNeural': ('sv-SE', 'Swedish (Sweden)', 'female'),
+    'sw-KE-RafikiNeural': ('sw-KE', 'Swahili (Kenya)', 'male'),
+    'sw-KE-ZuriNeural': ('sw-KE', 'Swahili (Kenya)', 'female'),
+    'sw-TZ-DaudiNeural': ('sw-TZ', 'Swahili (Tanzania)', 'male'),
+    'sw-TZ-RehemaNeural': ('sw-TZ', 'Swahili (Tanzania)', 'female'),
+    'ta-IN-PallaviNeural': ('ta-IN', 'Tamil (India)', 'female'),
+    'ta-IN-ValluvarNeural': ('ta-IN', 'Tamil (India)', 'male'),
+    'ta-LK-KumarNeural': ('ta-LK', 'Tamil (Sri Lanka)', 'male'),
+    'ta-LK-SaranyaNeural': ('ta-LK', 'Tamil (Sri Lanka)', 'female'),
+    'ta-MY-KaniNeural': ('ta-MY', 'Tamil (Malaysia)', 'female'),
+    'ta-MY-SuryaNeural': ('ta-MY', 'Tamil (Malaysia)', 'male'),
+    'ta-SG-AnbuNeural': ('ta-SG', 'Tamil (Singapore)', 'male'),
+    'ta-SG-VenbaNeural': ('ta-SG', 'Tamil (Singapore)', 'female'),
+    'te-IN-MohanNeural': ('te-IN', 'Telugu (India)', 'male'),
+    'te-IN-ShrutiNeural': ('te-IN', 'Telugu (India)', 'female'),
+    'th-TH-NiwatNeural': ('th-TH', 'Thai (Thailand)', 'male'),
+    'th-TH-PremwadeeNeural': ('th-TH', 'Thai (Thailand)', 'female'),
+    'tr-TR-AhmetNeural': ('tr-TR', 'Turkish (Turkey)', 'male'),
+    'tr-TR-EmelNeural': ('tr-TR', 'Turkish (Turkey)', 'female'),
+    'uk-UA-OstapNeural': ('uk-UA', 'Ukrainian (Ukraine)', 'male'),
+    'uk-UA-PolinaNeural': ('uk-UA', 'Ukrainian (Ukraine)', 'female'),
+    'ur-IN-GulNeural': ('ur-IN', 'Urdu (India)', 'female'),
+    'ur-IN-SalmanNeural': ('ur-IN', 'Urdu (India)', 'male'),
+    'ur-PK-AsadNeural': ('ur-PK', 'Urdu (Pakistan)', 'male'),
+    'ur-PK-UzmaNeural': ('ur-PK', 'Urdu (Pakistan)', 'female'),
+    'uz-UZ-MadinaNeural': ('uz-UZ', 'Uzbek (Latin, Uzbekistan)', 'female'),
+    'uz-UZ-SardorNeural': ('uz-UZ', 'Uzbek (Latin, Uzbekistan)', 'male'),
+    'vi-VN-HoaiMyNeural': ('vi-VN', 'Vietnamese (Vietnam)', 'female'),
+    'vi-VN-NamMinhNeural': ('vi-VN', 'Vietnamese (Vietnam)', 'male'),
+    'zh-CN-XiaoxiaoNeural': ('zh-CN', 'Chinese (Mandarin, Simplified)', 'female'),
+    'zh-CN-XiaoyiNeural': ('zh-CN', 'Chinese (Mandarin, Simplified)', 'female'),
+    'zh-CN-YunjianNeural': ('zh-CN', 'Chinese (Mandarin, Simplified)', 'male'),
+    'zh-CN-YunxiNeural': ('zh-CN', 'Chinese (Mandarin, Simplified)', 'male'),
+    'zh-CN-YunxiaNeural': ('zh-CN', 'Chinese (Mandarin, Simplified)', 'male'),
+    'zh-CN-YunyangNeural': ('zh-CN', 'Chinese (Mandarin, Simplified)', 'male'),
+    'zh-CN-liaoning-XiaobeiNeural': ('zh-CN-liaoning', 'Chinese (Northeastern Mandarin, Simplified)', 'female'),
+    'zh-CN-shaanxi-XiaoniNeural': ('zh-CN-shaanxi', 'Chinese (Zhongyuan Mandarin Shaanxi, Simplified)', 'female'),
+    'zh-HK-HiuGaaiNeural': ('zh-HK', 'Chinese (Cantonese, Traditional)', 'female'),
+    'zh-HK-HiuMaanNeural': ('zh-HK', 'Chinese (Cantonese, Traditional)', 'female'),
+    'zh-HK-WanLungNeural': ('zh-HK', 'Chinese (Cantonese, Traditional)', 'male'),
+    'zh-TW-HsiaoChenNeural': ('zh-TW', 'Chinese (Taiwanese Mandarin, Traditional)', 'female'),
+    'zh-TW-HsiaoYuNeural': ('zh-TW', 'Chinese (Taiwanese Mandarin, Traditional)', 'female'),
+    'zh-TW-YunJheNeural': ('zh-TW', 'Chinese (Taiwanese Mandarin, Traditional)', 'male'),
+    'zu-ZA-ThandoNeural': ('zu-ZA', 'Zulu (South Africa)', 'female'),
+    'zu-ZA-ThembaNeural': ('zu-ZA', 'Zulu (South Africa)', 'male'),
+}
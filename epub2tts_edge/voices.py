@@ -0,0 +1,76 @@
+"""Voice lookup for --list-voices and --speaker validation.
+
+Reads a small generated module instead of speakers.json or edge-tts, so
+listing and checking voices costs next to nothing at startup. Rebuild the
+index after updating speakers.json:
+
+    python -m epub2tts_edge.voices speakers.json
+"""
+
+import difflib
+import json
+import os
+import sys
+
+from .voice_index import VOICES
+
+# Edge voices that speakers.json predates, including the default speaker
+EXTRA_VOICES = {
+    "en-US-AndrewNeural": ("en-US", "English (United States)", "male"),
+    "en-US-BrianNeural": ("en-US", "English (United States)", "male"),
+    "en-US-EmmaNeural": ("en-US", "English (United States)", "female"),
+}
+
+INDEX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "voice_index.py")
+
+
+def find_voices(query=""):
+    """Voices whose name, language code or language contains `query`."""
+    query = query.lower()
+    return [
+        (name, *details)
+        for name, details in VOICES.items()
+        if not query
+        or query in name.lower()
+        or any(query in detail.lower() for detail in details[:2])
+    ]
+
+
+def format_voices(voices):
+    lines = [f"{'Name':<40}{'Gender':<8}Language"]
+    for name, _, language, gender in voices:
+        lines.append(f"{name:<40}{gender:<8}{language}")
+    return "\n".join(lines)
+
+
+def is_known(name):
+    return name in VOICES
+
+
+def suggest(name):
+    return difflib.get_close_matches(name, VOICES, n=3, cutoff=0.6)
+
+
+def build_index(speakers_path, index_path=INDEX_PATH):
+    with open(speakers_path, "r", encoding="utf-8") as f:
+        speakers = {
+            name: (speaker["languageCode"], speaker["language"], speaker["gender"])
+            for name, speaker in json.load(f).items()
+        }
+    speakers.update(EXTRA_VOICES)
+    with open(index_path, "w", encoding="utf-8") as f:
+        f.write(
+            "# Generated from speakers.json by `python -m epub2tts_edge.voices"
+            " speakers.json`, do not edit.\n"
+        )
+        f.write("# name: (language code, language, gender)\n")
+        f.write("VOICES = {\n")
+        for name, details in sorted(speakers.items()):
+            f.write(f"    {name!r}: {details!r},\n")
+        f.write("}\n")
+    return len(speakers)
+
+
+if __name__ == "__main__":
+    count = build_index(sys.argv[1] if len(sys.argv) > 1 else "speakers.json")
+    print(f"Wrote {count} voices to {INDEX_PATH}")
@@ -0,0 +1,546 @@
+"""Render books chapter by chapter through a work queue in a shared directory.
+
+`submit` splits books into chapter tasks under a queue directory that every
+worker can reach: a local directory for several workers on one machine, or
+a network share for several hosts. Any number of `work` processes claim
+chapters with leases, render each one with read_book and publish the part
+and its manifest back to the queue. `assemble` waits until every chapter of
+a book is done and stream-copies the parts into the m4b, as --workers does.
+
+    epub2tts-edge-queue submit /shared/queue book.epub --speaker en-US-EmmaNeural
+    epub2tts-edge-queue work /shared/queue        # on any number of hosts
+    epub2tts-edge-queue assemble /shared/queue
+
+A lease is a file whose mtime its worker keeps refreshing. One that has not
+been refreshed for `lease` seconds has expired and can be taken over, so the
+chapters of a killed worker are picked up again; hosts need roughly synced
+clocks. Claims only rely on exclusive creates and renames. Publishing a
+chapter is idempotent, so a chapter rendered twice after a lost lease does
+no harm.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import socket
+import threading
+import time
+import uuid
+
+from .cache import TTSCache, default_cache_dir
+from .epub2tts_edge import (
+    NORMALIZE_DB,
+    ensure_punkt,
+    get_basefile,
+    load_book,
+    postprocess_options,
+    read_book,
+)
+from .journal import journal_path
+from .manifest import manifest_path
+from .parallel import merge_book
+from .segment import SEGMENTERS
+from .subtitles import FORMATS as SUBTITLE_FORMATS
+
+JOB_FILE = "job.json"
+
+
+def job_id(sourcefile, speaker):
+    digest = hashlib.sha256(
+        f"{os.path.abspath(sourcefile)}:{speaker}".encode("utf-8")
+    ).hexdigest()
+    return f"{os.path.basename(get_basefile(sourcefile))}-{digest[:10]}"
+
+
+def _write_json(path, value):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(value, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def _read_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class WorkQueue:
+    """Chapter tasks, leases and finished parts under one directory.
+
+    Each book is a job directory holding job.json, one task file per
+    chapter, a lease file per chapter being rendered, the published parts
+    and a done marker per finished chapter.
+    """
+
+    def __init__(self, directory, lease=300):
+        self.directory = directory
+        self.lease = lease
+        self.token = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        os.makedirs(os.path.join(directory, "jobs"), exist_ok=True)
+
+    def _path(self, job, *names):
+        return os.path.join(self.directory, "jobs", job, *names)
+
+    def _lease_path(self, job, chapter):
+        return self._path(job, "leases", f"{chapter:04d}")
+
+    def _done_path(self, job, chapter):
+        return self._path(job, "done", f"{chapter:04d}.json")
+
+    def part_basefile(self, job, chapter):
+        return self._path(job, "parts", f"chapter{chapter:04d}")
+
+    def submit(
+        self,
+        sourcefile,
+        book_contents,
+        speaker,
+        title,
+        author,
+        chapter_titles,
+        cover=None,
+        settings=None,
+    ):
+        """Queue a book, one task per chapter; a book already queued is kept."""
+        job = job_id(sourcefile, speaker)
+        if os.path.exists(self._path(job, JOB_FILE)):
+            return job
+        # Build the job next to its final place and rename it in, so workers
+        # never see half a job
+        staging = os.path.join(self.directory, "jobs", f".{job}.{self.token}")
+        os.makedirs(os.path.join(staging, "tasks"))
+        for name in ("leases", "done", "parts"):
+            os.makedirs(os.path.join(staging, name))
+        paragraphs = []
+        for chapter, content in enumerate(book_contents, start=1):
+            _write_json(os.path.join(staging, "tasks", f"{chapter:04d}.json"), content)
+            paragraphs.append(len(content["paragraphs"]))
+        _write_json(
+            os.path.join(staging, JOB_FILE),
+            {
+                "sourcefile": os.path.abspath(sourcefile),
+                "speaker": speaker,
+                "title": title,
+                "author": author,
+                "chapter_titles": chapter_titles,
+                "cover": cover and os.path.abspath(cover),
+                "paragraphs": paragraphs,
+                "settings": settings or {},
+                "submitted": time.time(),
+            },
+        )
+        try:
+            os.rename(staging, self._path(job))
+        except OSError:
+            # queued by someone else in the meantime
+            shutil.rmtree(staging, ignore_errors=True)
+        return job
+
+    def jobs(self):
+        """Queued jobs, oldest first."""
+        jobs = []
+        for job in os.listdir(os.path.join(self.directory, "jobs")):
+            if job.startswith("."):
+                continue
+            try:
+                jobs.append((self.job(job)["submitted"], job))
+            except FileNotFoundError:
+                continue
+        return [job for _, job in sorted(jobs)]
+
+    def job(self, job):
+        return _read_json(self._path(job, JOB_FILE))
+
+    def task(self, job, chapter):
+        return _read_json(self._path(job, "tasks", f"{chapter:04d}.json"))
+
+    def is_done(self, job, chapter):
+        return os.path.exists(self._done_path(job, chapter))
+
+    def pending(self):
+        """Yield (job, chapter) for every unfinished chapter, longest first per job."""
+        for job in self.jobs():
+            try:
+                paragraphs = self.job(job)["paragraphs"]
+            except FileNotFoundError:
+                continue
+            chapters = sorted(
+                range(1, len(paragraphs) + 1), key=lambda c: -paragraphs[c - 1]
+            )
+            for chapter in chapters:
+                if not self.is_done(job, chapter):
+                    yield job, chapter
+
+    def _expired(self, path):
+        try:
+            return time.time() - os.stat(path).st_mtime > self.lease
+        except FileNotFoundError:
+            return True
+
+    def _take_over(self, path):
+        # Renaming is atomic, so of several workers taking over the same
+        # expired lease only one gets it
+        if not self._expired(path):
+            return False
+        stale = f"{path}.{self.token}"
+        try:
+            os.rename(path, stale)
+        except FileNotFoundError:
+            return True
+        if not self._expired(stale):
+            # renewed or claimed again since the check; put it back
+            try:
+                os.link(stale, path)
+            except FileExistsError:
+                pass
+            os.remove(stale)
+            return False
+        os.remove(stale)
+        return True
+
+    def claim(self, job, chapter):
+        path = self._lease_path(job, chapter)
+        for _ in range(2):
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                if not self._take_over(path):
+                    return False
+                continue
+            except FileNotFoundError:
+                # the job was assembled and removed
+                return False
+            with os.fdopen(fd, "w") as f:
+                f.write(self.token)
+            if self.is_done(job, chapter):
+                self.release(job, chapter)
+                return False
+            return True
+        return False
+
+    def owns(self, job, chapter):
+        try:
+            with open(self._lease_path(job, chapter), "r") as f:
+                return f.read() == self.token
+        except FileNotFoundError:
+            return False
+
+    def renew(self, job, chapter):
+        if not self.owns(job, chapter):
+            return False
+        os.utime(self._lease_path(job, chapter))
+        return True
+
+    def release(self, job, chapter):
+        if self.owns(job, chapter):
+            os.remove(self._lease_path(job, chapter))
+
+    def complete(self, job, chapter, partfile, basefile):
+        """Publish a rendered part and its manifest, then mark the chapter done.
+
+        `basefile` is the one-chapter book the part was rendered as.
+        """
+        target_base = self.part_basefile(job, chapter)
+        extension = os.path.splitext(partfile)[1]
+        published = {"file": f"{target_base}{extension}", "worker": self.token}
+        for source, target in (
+            (partfile, published["file"]),
+            (manifest_path(basefile), manifest_path(target_base)),
+        ):
+            tmp = f"{target}.{self.token}.tmp"
+            shutil.copyfile(source, tmp)
+            os.replace(tmp, target)
+        _write_json(self._done_path(job, chapter), published)
+
+    def finished(self, job, chapter):
+        return _read_json(self._done_path(job, chapter))
+
+    def status(self, job):
+        """Counts of done, leased and waiting chapters of a job."""
+        chapters = len(self.job(job)["paragraphs"])
+        done = leased = 0
+        for chapter in range(1, chapters + 1):
+            if self.is_done(job, chapter):
+                done += 1
+            elif not self._expired(self._lease_path(job, chapter)):
+                leased += 1
+        return {
+            "chapters": chapters,
+            "done": done,
+            "leased": leased,
+            "waiting": chapters - done - leased,
+        }
+
+    def remove(self, job):
+        shutil.rmtree(self._path(job), ignore_errors=True)
+
+
+class _Heartbeat(threading.Thread):
+    """Keeps renewing a lease while its chapter renders."""
+
+    def __init__(self, queue, job, chapter):
+        super().__init__(daemon=True)
+        self.queue = queue
+        self.job = job
+        self.chapter = chapter
+        self.lost = False
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.queue.lease / 3):
+            if not self.queue.renew(self.job, self.chapter):
+                self.lost = True
+                return
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def render_chapter(
+    queue, job, chapter, work_dir, cache, backend, concurrency=10, max_concurrency=32
+):
+    """Render one claimed chapter locally and publish it to the queue."""
+    info = queue.job(job)
+    settings = info["settings"]
+    basefile = os.path.join(work_dir, job, f"chapter{chapter:04d}")
+    os.makedirs(os.path.dirname(basefile), exist_ok=True)
+    heartbeat = _Heartbeat(queue, job, chapter)
+    heartbeat.start()
+    try:
+        # A journal kept in the local work dir lets this host resume the
+        # chapter if the worker is restarted
+        files = read_book(
+            sourcefile=basefile,
+            book_contents=[queue.task(job, chapter)],
+            speaker=info["speaker"],
+            concurrency=concurrency,
+            max_concurrency=max_concurrency,
+            cache=cache,
+            backend=backend,
+            subtitle_formats=(),
+            batch_chars=settings.get("batch_chars", 0),
+            postprocess=settings.get("postprocess"),
+            codec=settings.get("codec", "aac"),
+            bitrate=settings.get("bitrate"),
+        )
+    finally:
+        heartbeat.stop()
+    if heartbeat.lost:
+        print(f"Lease on {job} chapter {chapter} was taken over, publishing anyway")
+    queue.complete(job, chapter, files[0], basefile)
+    for leftover in (files[0], manifest_path(basefile), journal_path(basefile)):
+        if os.path.exists(leftover):
+            os.remove(leftover)
+
+
+def work(
+    queue,
+    work_dir=None,
+    cache=None,
+    backend="edge",
+    concurrency=10,
+    max_concurrency=32,
+    wait=False,
+    poll=5,
+):
+    """Claim and render chapters until no chapter is left to do.
+
+    Chapters leased by other workers count as left to do, so an idle worker
+    stays around to take them over if their leases expire. With `wait`,
+    keep polling for new books as well. Returns the number of chapters
+    rendered.
+    """
+    from .backends import get_backend
+
+    work_dir = work_dir or os.path.join(default_cache_dir(), "queue")
+    cache = cache or TTSCache()
+    backend = get_backend(backend)
+    failed = set()
+    rendered = 0
+    while True:
+        claimed = None
+        remaining = False
+        for task in queue.pending():
+            if task in failed:
+                continue
+            remaining = True
+            if queue.claim(*task):
+                claimed = task
+                break
+        if claimed is None:
+            if not remaining and not wait:
+                return rendered
+            time.sleep(poll)
+            continue
+        job, chapter = claimed
+        print(f"Rendering {job} chapter {chapter}")
+        try:
+            render_chapter(
+                queue, job, chapter, work_dir, cache, backend, concurrency, max_concurrency
+            )
+            rendered += 1
+        except Exception as e:
+            # Leave it to other workers or a later run
+            print(f"{job} chapter {chapter} failed: {e}")
+            failed.add(claimed)
+        finally:
+            queue.release(job, chapter)
+
+
+def assemble(queue, jobs=None, poll=5):
+    """Wait for every chapter of each job, merge it into an m4b and drop the job.
+
+    The m4b and subtitles are written next to the source book, under the
+    path it was submitted with. Returns the m4b files.
+    """
+    outputs = []
+    for job in jobs or queue.jobs():
+        info = queue.job(job)
+        chapters = range(1, len(info["paragraphs"]) + 1)
+        last = None
+        while True:
+            status = queue.status(job)
+            if status["done"] == status["chapters"]:
+                break
+            if status != last:
+                print(
+                    f"{job}: {status['done']}/{status['chapters']} chapters done, "
+                    f"{status['leased']} rendering"
+                )
+                last = status
+            time.sleep(poll)
+        settings = info["settings"]
+        outputs.append(
+            merge_book(
+                info["sourcefile"],
+                [queue.finished(job, chapter)["file"] for chapter in chapters],
+                [queue.part_basefile(job, chapter) for chapter in chapters],
+                info["speaker"],
+                info["title"],
+                info["author"],
+                info["chapter_titles"],
+                cover=info["cover"],
+                subtitle_formats=settings.get("subtitle_formats", ("vtt",)),
+                chapter_subtitles=settings.get("chapter_subtitles", False),
+            )
+        )
+        queue.remove(job)
+    return outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="epub2tts-edge-queue",
+        description="Render books chapter by chapter through a shared work queue",
+    )
+    parser.add_argument("queue", help="Queue directory, shared by all workers")
+    parser.add_argument(
+        "--lease",
+        type=int,
+        default=300,
+        help="Seconds without a heartbeat after which a chapter is given to another worker",
+    )
+    parser.add_argument(
+        "--poll", type=float, default=5, help="Seconds between looks at the queue"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    submit = commands.add_parser("submit", help="Queue books, one task per chapter")
+    submit.add_argument("sourcefiles", nargs="+", help="Text books or epubs")
+    submit.add_argument("--speaker", type=str, default="en-US-AndrewNeural")
+    submit.add_argument("--cover", type=str, help="Cover image, for a single book")
+    submit.add_argument("--batch-chars", type=int, default=0)
+    submit.add_argument("--trim-silence", action="store_true")
+    submit.add_argument("--sentence-pause", type=int, default=0, help="ms")
+    submit.add_argument("--normalize", type=float, nargs="?", const=NORMALIZE_DB)
+    submit.add_argument("--segmenter", choices=sorted(SEGMENTERS), default="punkt")
+    submit.add_argument("--subtitles", type=str, default="vtt")
+    submit.add_argument("--chapter-subtitles", action="store_true")
+    submit.add_argument("--codec", type=str, default="aac")
+    submit.add_argument("--bitrate", type=str)
+
+    worker = commands.add_parser("work", help="Claim and render chapters")
+    worker.add_argument("--backend", type=str, default="edge")
+    worker.add_argument("--concurrency", type=int, default=10)
+    worker.add_argument("--max-concurrency", type=int, default=32)
+    worker.add_argument("--cache-dir", type=str)
+    worker.add_argument("--cache-size", type=int, default=2048, help="MB")
+    worker.add_argument(
+        "--work-dir", type=str, help="Local directory chapters are rendered in"
+    )
+    worker.add_argument(
+        "--wait", action="store_true", help="Keep waiting for new books when idle"
+    )
+
+    coordinator = commands.add_parser(
+        "assemble", help="Wait for books to finish and write their m4b files"
+    )
+    coordinator.add_argument("jobs", nargs="*", help="Jobs to assemble (default: all)")
+
+    commands.add_parser("status", help="Show the progress of every queued book")
+
+    args = parser.parse_args()
+    queue = WorkQueue(args.queue, args.lease)
+
+    if args.command == "submit":
+        subtitle_formats = [f for f in args.subtitles.split(",") if f]
+        for subtitle_format in subtitle_formats:
+            if subtitle_format not in SUBTITLE_FORMATS:
+                parser.error(f"unknown subtitle format {subtitle_format}")
+        if args.segmenter == "punkt":
+            ensure_punkt()
+        for sourcefile in args.sourcefiles:
+            book_contents, title, author, chapter_titles, cover = load_book(
+                sourcefile, args.segmenter, cover=args.cover
+            )
+            book_contents = [
+                dict(chapter, paragraphs=list(chapter["paragraphs"]))
+                for chapter in book_contents
+            ]
+            job = queue.submit(
+                sourcefile,
+                book_contents,
+                args.speaker,
+                title,
+                author,
+                chapter_titles,
+                cover=cover,
+                settings={
+                    "batch_chars": args.batch_chars,
+                    "postprocess": postprocess_options(args),
+                    "codec": args.codec,
+                    "bitrate": args.bitrate,
+                    "subtitle_formats": subtitle_formats,
+                    "chapter_subtitles": args.chapter_subtitles,
+                },
+            )
+            print(f"Queued {sourcefile} as {job}, {len(book_contents)} chapters")
+    elif args.command == "work":
+        rendered = work(
+            queue,
+            work_dir=args.work_dir,
+            cache=TTSCache(args.cache_dir, args.cache_size * 1024**2),
+            backend=args.backend,
+            concurrency=args.concurrency,
+            max_concurrency=args.max_concurrency,
+            wait=args.wait,
+            poll=args.poll,
+        )
+        print(f"Rendered {rendered} chapters")
+    elif args.command == "assemble":
+        for outputm4b in assemble(queue, args.jobs, args.poll):
+            print(f"Wrote {outputm4b}")
+    else:
+        for job in queue.jobs():
+            status = queue.status(job)
+            print(
+                f"{job}: {status['done']}/{status['chapters']} chapters done, "
+                f"{status['leased']} rendering, {status['waiting']} waiting"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,28 @@
 import json
-from ebooklib import epub
+import os
 from concurrent.futures import ProcessPoolExecutor, as_completed
 
 from epub2tts_edge import epub2tts_edge as e2t
+from epub2tts_edge import profiling
+from epub2tts_edge.controller import shared_state, use_shared_state
 
-speakers = json.load(open("speakers.json"))
+speakers = json.load(open(os.path.join(os.path.dirname(__file__), "speakers.json")))
+
+
+def init_worker(state, profile):
+    use_shared_state(state)
+    if profile:
+        profiling.enable(profile)
 
 
 def process_chapter(chapter_sourcefile, cover_image_path, speaker):
+    try:
+        build_chapter(chapter_sourcefile, cover_image_path, speaker)
+    finally:
+        profiling.flush()
+
+
+def build_chapter(chapter_sourcefile, cover_image_path, speaker):
     book_contents, book_title, book_author, chapter_titles = e2t.get_book(
         sourcefile=chapter_sourcefile
     )
@@ -24,15 +39,14 @@ def process_chapter(chapter_sourcefile, cover_image_path, speaker):
         chapter_titles=chapter_titles,
     )
 
-    m4bfilename = e2t.make_m4b(
+    e2t.make_m4b(
         files=files,
         sourcefile=chapter_sourcefile,
         speaker=speaker,
         ffmetadatafile=ffmetadatafile,
+        cover=cover_image_path,
     )
 
-    e2t.add_cover(cover_image_path, m4bfilename)
-
 
 def main(
     sourcefile="data/epub/1984.epub",
@@ -40,13 +54,21 @@ def main(
     max_workers=4,
     from_chapter=1,
     to_chapter=1,
+    concurrency=10,
+    profile=None,
 ):
+    if profile:
+        profiling.enable(profile)
     e2t.ensure_punkt()
 
-    book = epub.read_epub(sourcefile)
-    chapters, cover_image_path = e2t.export_chapters(book=book, sourcefile=sourcefile)
+    chapters, cover_image_path = e2t.export_chapters(sourcefile=sourcefile)
 
-    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+    # All workers draw TTS requests from one adaptive concurrency limit.
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=init_worker,
+        initargs=(shared_state(concurrency), profile),
+    ) as executor:
         futures = [
             executor.submit(process_chapter, chapter, cover_image_path, speaker)
             for chapter in chapters[
@@ -60,6 +82,9 @@ def main(
             except Exception as e:
                 print(f"Error processing chapter: {e}")
 
+    if profile:
+        print(profiling.summary(profiling.write()))
+
 
 if __name__ == "__main__":
     main()
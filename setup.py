@@ -15,7 +15,8 @@ setup(
     install_requires=requirements,
     entry_points={
         'console_scripts': [
-            'epub2tts-edge = epub2tts_edge:main'
+            'epub2tts-edge = epub2tts_edge:main',
+            'epub2tts-edge-queue = epub2tts_edge.workqueue:main'
         ]
     },
 )
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The tests import the package and main.py from the checkout, wherever
+# pytest is started from
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
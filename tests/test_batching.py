@@ -0,0 +1,86 @@
+import asyncio
+import unittest
+
+from epub2tts_edge.audio import SAMPLE_RATE
+from epub2tts_edge.backends import FakeBackend
+from epub2tts_edge.epub2tts_edge import _batch_jobs, split_batch
+
+
+def job(kind, text=None):
+    return {"kind": kind, "text": text, "speaker": "fake"}
+
+
+def synthesize(text):
+    backend = FakeBackend(latency=0)
+    return asyncio.run(backend.synthesize(text, "fake"))
+
+
+class BatchJobsTest(unittest.TestCase):
+    def test_sentences_are_packed_up_to_the_limit(self):
+        jobs = [job("chapter")] + [job("sentence", "x" * 9) for _ in range(5)]
+        batched = list(_batch_jobs(iter(jobs), 20))
+        self.assertEqual(
+            [j["kind"] for j in batched], ["chapter", "batch", "batch", "sentence"]
+        )
+        self.assertEqual(batched[1]["text"], "x" * 9 + " " + "x" * 9)
+        self.assertEqual(len(batched[1]["parts"]), 2)
+
+    def test_titles_and_chapter_marks_are_never_packed(self):
+        jobs = [
+            job("chapter"),
+            job("title", "One"),
+            job("sentence", "a"),
+            job("sentence", "b"),
+            job("chapter"),
+            job("title", "Two"),
+            job("sentence", "c"),
+        ]
+        batched = list(_batch_jobs(iter(jobs), 100))
+        self.assertEqual(
+            [(j["kind"], j["text"]) for j in batched],
+            [
+                ("chapter", None),
+                ("title", "One"),
+                ("batch", "a b"),
+                ("chapter", None),
+                ("title", "Two"),
+                ("sentence", "c"),
+            ],
+        )
+
+
+class SplitBatchTest(unittest.TestCase):
+    def test_split_follows_the_sentences(self):
+        texts = ["Hello there.", "General Kenobi, you are a bold one!", "Back away."]
+        pcm, subs = synthesize(" ".join(texts))
+        pieces = split_batch(pcm, subs, texts)
+
+        self.assertEqual(len(pieces), 3)
+        self.assertEqual(b"".join(piece for piece, _ in pieces), pcm)
+        for text, (piece, piece_subs) in zip(texts, pieces):
+            self.assertEqual([word for _, word in piece_subs], text.split())
+            # every boundary lies inside its own piece
+            for (offset, duration), _ in piece_subs:
+                self.assertGreaterEqual(offset, 0)
+                end = (offset + duration) * SAMPLE_RATE // 10**7
+                self.assertLessEqual(end, len(piece) // 2)
+
+    def test_pieces_are_about_as_long_as_the_sentences_alone(self):
+        texts = ["One two three.", "Four five."]
+        pcm, subs = synthesize(" ".join(texts))
+        for text, (piece, _) in zip(texts, split_batch(pcm, subs, texts)):
+            alone, _ = synthesize(text)
+            # the cut is halfway through the gap between the sentences
+            gap = 0.08 * SAMPLE_RATE * 2
+            self.assertAlmostEqual(len(piece), len(alone), delta=gap)
+
+    def test_boundaries_missing_from_the_text_are_dropped(self):
+        texts = ["Alpha beta.", "Gamma."]
+        pcm, subs = synthesize(" ".join(texts))
+        subs = subs + [((subs[-1][0][0], 1), "unknown")]
+        pieces = split_batch(pcm, subs, texts)
+        self.assertEqual([w for _, w in pieces[1][1]], ["Gamma."])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+
+from epub2tts_edge.backends import FakeBackend
+from epub2tts_edge.cache import TTSCache
+
+
+class TTSCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def cache(self, max_bytes=2 * 1024**3):
+        return TTSCache(self.directory.name, max_bytes)
+
+    def age(self, cache, key, seconds):
+        path = cache._path(key, "audio")
+        when = time.time() - seconds
+        os.utime(path, (when, when))
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = self.cache(max_bytes=3500)
+        keys = [cache.key(text, "fake", "fake") for text in ("a", "b", "c", "d")]
+        for seconds, key in zip((300, 200, 100), keys):
+            cache.put(key, bytes(1000), [])
+            self.age(cache, key, seconds)
+        # reading the oldest entry makes it the most recently used
+        self.assertIsNotNone(cache.get(keys[0]))
+        cache.put(keys[3], bytes(1000), [])
+
+        self.assertTrue(cache.contains(keys[0]))
+        self.assertFalse(cache.contains(keys[1]))
+        self.assertTrue(cache.contains(keys[2]))
+        self.assertTrue(cache.contains(keys[3]))
+        self.assertLessEqual(cache.size, 3500 * 0.9)
+        self.assertEqual(cache.size, self.cache().size)
+
+    def test_overwriting_an_entry_keeps_the_size(self):
+        cache = self.cache()
+        key = cache.key("a", "fake", "fake")
+        cache.put(key, bytes(1000), [])
+        size = cache.size
+        cache.put(key, bytes(1000), [])
+        self.assertEqual(cache.size, size)
+        self.assertEqual(self.cache().size, size)
+
+    def test_wrap_only_calls_the_backend_on_a_miss(self):
+        cache = self.cache()
+        backend = FakeBackend(latency=0)
+        synthesize = cache.wrap(backend.synthesize, backend.name)
+        first = asyncio.run(synthesize("Hello  there.", "fake"))
+        # the same text after normalization is a hit
+        second = asyncio.run(synthesize("Hello there.", "fake"))
+        self.assertEqual(backend.requests, 1)
+        self.assertEqual(first[0], second[0])
+        # boundaries come back from JSON as lists
+        self.assertEqual([[list(t), word] for t, word in first[1]], second[1])
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertNotEqual(
+            cache.key("Hello there.", "fake", "fake"),
+            cache.key("Hello there.", "other", "fake"),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import asyncio
+import unittest
+
+from epub2tts_edge.controller import (
+    IN_FLIGHT,
+    ConcurrencyController,
+    backoff_delay,
+    shared_state,
+)
+
+
+def controller(concurrency=4, **kwargs):
+    return ConcurrencyController(concurrency, state=shared_state(concurrency), **kwargs)
+
+
+class AIMDTest(unittest.TestCase):
+    def test_limit_grows_by_one_per_window_of_successes(self):
+        c = controller(4, maximum=6)
+        for _ in range(3):
+            c.release(latency=1.0)
+        self.assertEqual(c.limit, 4)
+        c.release(latency=1.0)
+        self.assertEqual(c.limit, 5)
+        for _ in range(5):
+            c.release(latency=1.0)
+        self.assertEqual(c.limit, 6)
+        for _ in range(20):
+            c.release(latency=1.0)
+        self.assertEqual(c.limit, 6)
+
+    def test_errors_halve_the_limit_down_to_the_minimum(self):
+        c = controller(8, minimum=2)
+        c.release(error=True)
+        self.assertEqual(c.limit, 4)
+        c.release(error=True)
+        c.release(error=True)
+        self.assertEqual(c.limit, 2)
+        self.assertEqual(c.errors, 3)
+
+    def test_congestion_cuts_the_limit_by_a_quarter(self):
+        c = controller(8)
+        c.release(latency=1.0)
+        # smoothed latency climbs past twice the best seen
+        c.release(latency=50.0)
+        self.assertEqual(c.limit, 6)
+
+    def test_requests_in_flight_drain_before_the_next_cut(self):
+        c = controller(8)
+        c.state[IN_FLIGHT] = 3
+        c.release(error=True)
+        self.assertEqual(c.limit, 4)
+        # the two requests that were in flight during the cut
+        c.release(error=True)
+        c.release(error=True)
+        self.assertEqual(c.limit, 4)
+        c.release(error=True)
+        self.assertEqual(c.limit, 2)
+
+    def test_slot_feeds_back_failures(self):
+        c = controller(4)
+
+        async def fail():
+            async with c.slot():
+                raise RuntimeError("throttled")
+
+        with self.assertRaises(RuntimeError):
+            asyncio.run(fail())
+        self.assertEqual((c.limit, c.errors, c.state[IN_FLIGHT]), (2, 1, 0))
+
+    def test_acquire_waits_for_a_free_slot(self):
+        c = controller(1)
+
+        async def run():
+            await c.acquire()
+            waiting = asyncio.ensure_future(c.acquire())
+            await asyncio.sleep(0.01)
+            self.assertFalse(waiting.done())
+            c.release(latency=1.0)
+            await asyncio.wait_for(waiting, 1)
+
+        asyncio.run(run())
+        self.assertEqual(c.state[IN_FLIGHT], 1)
+
+
+class BackoffTest(unittest.TestCase):
+    def test_backoff_is_capped_full_jitter(self):
+        for attempt in range(10):
+            delay = backoff_delay(attempt, base=1.0, cap=8.0)
+            self.assertGreaterEqual(delay, 0)
+            self.assertLessEqual(delay, min(8.0, 2**attempt))
+
+
+if __name__ == "__main__":
+    unittest.main()
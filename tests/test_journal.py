@@ -0,0 +1,128 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from epub2tts_edge import epub2tts_edge as e2t
+from epub2tts_edge.backends import FakeBackend
+from epub2tts_edge.cache import TTSCache
+from epub2tts_edge.journal import Journal, journal_path, source_fingerprint
+
+
+class FailingBackend(FakeBackend):
+    """FakeBackend that fails every request for text containing `fail`."""
+
+    def __init__(self, fail=None):
+        super().__init__(latency=0)
+        self.fail = fail
+        self.texts = []
+
+    async def synthesize(self, text, speaker):
+        self.texts.append(text)
+        if self.fail and self.fail in text:
+            self.requests += 1
+            raise Exception("Simulated TTS failure")
+        return await super().synthesize(text, speaker)
+
+
+class NoProgress:
+    def __init__(self, **kwargs):
+        pass
+
+    def update(self, n=1):
+        pass
+
+    def close(self):
+        pass
+
+
+def book():
+    return [
+        {"title": "One", "paragraphs": [["First sentence.", "Second sentence."]]},
+        {"title": "Two", "paragraphs": [["Broken sentence."], ["Last one."]]},
+        {"title": "Three", "paragraphs": [["The end."]]},
+    ]
+
+
+@unittest.skipIf(shutil.which("ffmpeg") is None, "needs ffmpeg")
+class JournalResumeTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.sourcefile = os.path.join(self.directory, "book.txt")
+        with open(self.sourcefile, "w") as f:
+            f.write("# One\n")
+        self.cache = TTSCache(os.path.join(self.directory, "cache"))
+        # no waiting between retries
+        patcher = mock.patch.object(e2t, "backoff_delay", lambda attempt: 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def read(self, backend):
+        return e2t.read_book(
+            self.sourcefile,
+            book(),
+            "fake",
+            cache=self.cache,
+            backend=backend,
+            subtitle_formats=(),
+            progress=NoProgress,
+        )
+
+    def test_a_failed_run_resumes_with_only_the_failed_sentences(self):
+        failing = FailingBackend(fail="Broken")
+        with self.assertRaises(Exception) as raised:
+            self.read(failing)
+        self.assertIn("1 sentences could not be synthesized", str(raised.exception))
+        basefile = e2t.get_basefile(self.sourcefile)
+        journal = Journal(basefile, source_fingerprint(self.sourcefile))
+        self.assertEqual([row[:3] for row in journal.failures({1, 2, 3})], [(2, 1, 0)])
+        self.assertTrue(journal.chapter_is_done(1, f"{basefile}-part1.flac"))
+        self.assertFalse(journal.chapter_is_done(2, f"{basefile}-part2.flac"))
+        self.assertTrue(journal.chapter_is_done(3, f"{basefile}-part3.flac"))
+        journal.close()
+        # every attempt at the broken sentence, and nothing else, failed
+        self.assertEqual(failing.requests, e2t.TTS_ATTEMPTS + 7)
+
+        resumed = FailingBackend()
+        files = self.read(resumed)
+        self.assertEqual(
+            [os.path.basename(f) for f in files],
+            ["book-part1.flac", "book-part2.flac", "book-part3.flac"],
+        )
+        self.assertTrue(all(os.path.isfile(f) for f in files))
+        # chapters 1 and 3 were kept, chapter 2's other sentences came from
+        # the cache
+        self.assertEqual(resumed.texts, ["Broken sentence."])
+
+    def test_failures_of_chapters_no_longer_in_the_book_are_ignored(self):
+        basefile = e2t.get_basefile(self.sourcefile)
+        journal = Journal(basefile, source_fingerprint(self.sourcefile))
+        journal.sentence_failed(7, 1, 0, "key", "gone")
+        journal.close()
+        files = self.read(FailingBackend())
+        self.assertEqual(len(files), 3)
+
+    def test_an_edited_source_starts_the_journal_over(self):
+        files = self.read(FailingBackend())
+        for f in files:
+            os.utime(f, (0, 0))
+        self.read(FailingBackend())
+        # an unchanged source resumes: nothing is encoded again
+        self.assertEqual([os.path.getmtime(f) for f in files], [0, 0, 0])
+
+        with open(self.sourcefile, "a") as f:
+            f.write("Edited.\n")
+        edited = FailingBackend()
+        self.read(edited)
+        # every chapter was encoded again, with its sentences from the cache
+        self.assertTrue(all(os.path.getmtime(f) > 0 for f in files))
+        self.assertEqual(edited.texts, [])
+        basefile = e2t.get_basefile(self.sourcefile)
+        self.assertTrue(os.path.exists(journal_path(basefile)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import multiprocessing
+import os
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+import main
+from epub2tts_edge import profiling
+
+
+def work(n):
+    with profiling.span("worker_span", n=n):
+        profiling.count("worker_calls")
+    profiling.flush()
+    return os.getpid()
+
+
+class MergedTraceTest(unittest.TestCase):
+    def tearDown(self):
+        profiling._enabled = False
+
+    def test_parent_spans_are_not_repeated_by_forked_workers(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "trace.json")
+            profiling.enable(path)
+            with profiling.span("export_chapters"):
+                profiling.count("parent_calls")
+            with ProcessPoolExecutor(
+                max_workers=2,
+                mp_context=multiprocessing.get_context("fork"),
+                initializer=main.init_worker,
+                initargs=(None, path),
+            ) as executor:
+                list(executor.map(work, range(4)))
+            events = profiling.write()
+            self.assertFalse(
+                [name for name in os.listdir(directory) if name.endswith(".part")]
+            )
+
+        names = [event["name"] for event in events]
+        self.assertEqual(names.count("export_chapters"), 1)
+        self.assertEqual(names.count("worker_span"), 4)
+        counters = [event["args"] for event in events if event["name"] == "counters"]
+        self.assertEqual(sum(c.get("parent_calls", 0) for c in counters), 1)
+        self.assertEqual(sum(c.get("worker_calls", 0) for c in counters), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
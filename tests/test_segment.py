@@ -0,0 +1,36 @@
+import unittest
+
+from epub2tts_edge.segment import get_segmenter, regex
+
+
+class RegexSegmenterTest(unittest.TestCase):
+    def test_splits_after_sentence_ends(self):
+        self.assertEqual(
+            regex("It rained. Did it stop? No! It went on…  and on."),
+            ["It rained.", "Did it stop?", "No!", "It went on…", "and on."],
+        )
+
+    def test_closing_quotes_stay_with_their_sentence(self):
+        self.assertEqual(
+            regex('"Come in," she said. "Sit down." He sat.'),
+            ['"Come in," she said.', '"Sit down."', "He sat."],
+        )
+
+    def test_abbreviations_initials_and_dotted_tokens_do_not_split(self):
+        self.assertEqual(
+            regex("Mr. Smith met J. R. Jones at 5 p.m. in the U.S. office. Done."),
+            ["Mr. Smith met J. R. Jones at 5 p.m. in the U.S. office.", "Done."],
+        )
+
+    def test_text_without_an_end_is_one_sentence(self):
+        self.assertEqual(regex("  no full stop here "), ["no full stop here"])
+        self.assertEqual(regex(""), [])
+
+    def test_get_segmenter(self):
+        self.assertIs(get_segmenter("regex"), regex)
+        with self.assertRaises(ValueError):
+            get_segmenter("nope")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import os
+import tempfile
+import time
+import unittest
+
+from epub2tts_edge.manifest import manifest_path
+from epub2tts_edge.workqueue import WorkQueue
+
+BOOK = [
+    {"title": "One", "paragraphs": [["A."], ["B."]]},
+    {"title": "Two", "paragraphs": [["C."], ["D."], ["E."]]},
+]
+
+
+class WorkQueueTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.first = WorkQueue(self.directory, lease=60)
+        self.second = WorkQueue(self.directory, lease=60)
+        self.job = self.first.submit(
+            os.path.join(self.directory, "book.txt"),
+            BOOK,
+            "fake",
+            "Book",
+            "Author",
+            ["One", "Two"],
+        )
+
+    def expire(self, queue, chapter):
+        when = time.time() - 120
+        os.utime(queue._lease_path(self.job, chapter), (when, when))
+
+    def test_submit_queues_one_task_per_chapter_longest_first(self):
+        self.assertEqual(self.second.jobs(), [self.job])
+        self.assertEqual(list(self.second.pending()), [(self.job, 2), (self.job, 1)])
+        self.assertEqual(self.second.task(self.job, 2), BOOK[1])
+        # queuing the same book again keeps the job
+        again = self.second.submit(
+            os.path.join(self.directory, "book.txt"), [], "fake", "", "", []
+        )
+        self.assertEqual(again, self.job)
+        self.assertEqual(len(self.second.job(self.job)["paragraphs"]), 2)
+
+    def test_a_chapter_is_claimed_once(self):
+        self.assertTrue(self.first.claim(self.job, 1))
+        self.assertFalse(self.second.claim(self.job, 1))
+        self.assertTrue(self.first.owns(self.job, 1))
+        self.assertFalse(self.second.owns(self.job, 1))
+        self.assertTrue(self.second.claim(self.job, 2))
+
+    def test_an_expired_lease_is_taken_over(self):
+        self.assertTrue(self.first.claim(self.job, 1))
+        self.expire(self.first, 1)
+        self.assertTrue(self.second.claim(self.job, 1))
+        self.assertTrue(self.second.owns(self.job, 1))
+        # the first worker finds out when it tries to renew
+        self.assertFalse(self.first.renew(self.job, 1))
+        self.first.release(self.job, 1)
+        self.assertTrue(self.second.owns(self.job, 1))
+
+    def test_a_renewed_lease_is_kept(self):
+        self.assertTrue(self.first.claim(self.job, 1))
+        self.expire(self.first, 1)
+        self.assertTrue(self.first.renew(self.job, 1))
+        self.assertFalse(self.second.claim(self.job, 1))
+
+    def test_finished_chapters_are_not_claimed_again(self):
+        self.assertTrue(self.first.claim(self.job, 1))
+        basefile = os.path.join(self.directory, "rendered")
+        with open(f"{basefile}-part1.m4a", "wb") as f:
+            f.write(b"audio")
+        with open(manifest_path(basefile), "w") as f:
+            f.write("")
+        self.first.complete(self.job, 1, f"{basefile}-part1.m4a", basefile)
+        self.first.release(self.job, 1)
+
+        self.assertTrue(self.second.is_done(self.job, 1))
+        self.assertFalse(self.second.claim(self.job, 1))
+        self.assertEqual(list(self.second.pending()), [(self.job, 2)])
+        published = self.second.finished(self.job, 1)["file"]
+        with open(published, "rb") as f:
+            self.assertEqual(f.read(), b"audio")
+
+
+if __name__ == "__main__":
+    unittest.main()